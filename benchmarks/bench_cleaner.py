@@ -0,0 +1,209 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# Cleaner benchmarks. Run from the repo root:
+#
+#   python -m benchmarks.bench_cleaner --out bench.json
+#   python -m benchmarks.bench_cleaner --compare bench.json --threshold 0.15
+#
+# The corpus is generated from a fixed seed so runs are comparable.
+
+from typing import Callable, Dict, List, Optional
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+from cleaner import clean_text, strip_diacritics
+from items import ItemIndex
+
+
+ITEMS = [
+    "Ash Prime Set", "Rhino Prime Systems", "Primed Continuity", "Arcane Energize",
+    "Galvanized Aptitude", "Nikana Prime Blade", "Wisp Prime Neuroptics", "Condition Overload",
+    "Riven Mod (Veiled)", "Forma Blueprint", "Axi A12 Relic", "Meso N11 Relic",
+]
+PLAYERS = [
+    "Tenno42", "Zoë_Prime", "Ångström", "Ñandú", "Søren-Lotus", "Jürgen", "Ækirø",
+    "Chloé", "Łukasz", "Ольга", "李小龙", "Dragonfly_九", "Þór", "Renée",
+]
+SMART = ["‘", "’", "“", "”", "–", "—", "…", "−"]
+INVISIBLE = ["​", "‌", "‍", "﻿", " ", " ", " "]
+
+
+def whisper(rng: random.Random) -> str:
+    """A plain warframe.market-style whisper, as copied from the site."""
+    item = rng.choice(ITEMS)
+    player = rng.choice(PLAYERS)
+    price = rng.randint(5, 900)
+    verb = rng.choice(["buy", "sell"])
+    return f'/w {player} Hi! I want to {verb}: "{item}" for {price} platinum. (warframe.market)'
+
+
+def noisy_whisper(rng: random.Random) -> str:
+    """A whisper with the kind of Unicode junk that breaks Warframe chat."""
+    words = whisper(rng).split(" ")
+    out: List[str] = []
+    for word in words:
+        if rng.random() < 0.25:
+            word = rng.choice(SMART) + word + rng.choice(SMART)
+        if rng.random() < 0.2:
+            word += rng.choice(INVISIBLE)
+        out.append(word)
+    sep = rng.choice([" ", "  ", " ", " \r\n", "\t"])
+    text = sep.join(out)
+    if rng.random() < 0.3:
+        text += " 谢谢 ありがとう"
+    return text
+
+
+def build_corpus(seed: int = 1337, messages: int = 2000, blob_mb: float = 4.0) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+    plain = [whisper(rng) for _ in range(messages)]
+    noisy = [noisy_whisper(rng) for _ in range(messages)]
+    blob: List[str] = []
+    size = 0
+    while size < blob_mb * 1024 * 1024:
+        line = noisy_whisper(rng) + "\r\n"
+        blob.append(line)
+        size += len(line)
+    return {
+        "whispers": plain,
+        "unicode_heavy": noisy,
+        "blob": ["".join(blob)],
+    }
+
+
+def item_index(seed: int = 1337, names: int = 20_000) -> ItemIndex:
+    """The item names above plus made-up ones, about the size of a full item list."""
+    rng = random.Random(seed)
+    syllables = ["ka", "ro", "ni", "tha", "vex", "lo", "mir", "dra", "zen", "qua", "tor", "lum", "sar", "bel"]
+
+    def word() -> str:
+        return "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).capitalize()
+
+    made_up = [" ".join(word() for _ in range(rng.randint(1, 4))) for _ in range(names)]
+    return ItemIndex(ITEMS + made_up)
+
+
+def _time_calls(func: Callable[[str], str], texts: List[str], repeat: int) -> Dict[str, float]:
+    samples: List[float] = []
+    chars = 0
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            func(text)
+            samples.append(time.perf_counter() - start)
+            chars += len(text)
+    total = sum(samples)
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "mean_us": statistics.fmean(samples) * 1e6,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p95_us": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1e6,
+        "mb_per_s": (chars / (1024 * 1024)) / total if total else 0.0,
+    }
+
+
+def run(corpus: Dict[str, List[str]], repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for name, texts in corpus.items():
+        # Big blobs are slow per call; fewer rounds keep the suite quick
+        rounds = 1 if name == "blob" else repeat
+        for ascii_only in (False, True):
+            for single_line in (True, False):
+                label = f"clean_text[ascii_only={ascii_only},single_line={single_line}]/{name}"
+
+                def func(text: str, a: bool = ascii_only, s: bool = single_line) -> str:
+                    return clean_text(text, ascii_only=a, single_line=s)
+
+                results[label] = _time_calls(func, texts, rounds)
+        results[f"strip_diacritics/{name}"] = _time_calls(strip_diacritics, texts, rounds)
+    # Item names are fixed up after cleaning, one chat message at a time
+    items = item_index()
+    for name in ("whispers", "unicode_heavy"):
+        if name in corpus:
+            cleaned = [clean_text(text) for text in corpus[name]]
+            results[f"items.canonicalize/{name}"] = _time_calls(items.canonicalize, cleaned, repeat)
+    return results
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """Names of benchmarks whose throughput dropped by more than threshold."""
+    regressions: List[str] = []
+    for label, now in current.items():
+        before = baseline.get(label)
+        if not before or not before.get("mb_per_s"):
+            continue
+        change = now["mb_per_s"] / before["mb_per_s"] - 1.0
+        if change < -threshold:
+            regressions.append(f"{label}: {before['mb_per_s']:.2f} -> {now['mb_per_s']:.2f} MB/s ({change:+.1%})")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, float]]) -> None:
+    width = max(len(label) for label in results)
+    print(f"{'benchmark':<{width}}  {'p50 us':>10}  {'p95 us':>10}  {'MB/s':>8}")
+    for label, r in results.items():
+        print(f"{label:<{width}}  {r['p50_us']:>10.1f}  {r['p95_us']:>10.1f}  {r['mb_per_s']:>8.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark cleaner.clean_text and strip_diacritics")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file from an earlier --out")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed throughput drop (default 0.10)")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds over the message corpora")
+    parser.add_argument("--messages", type=int, default=2000, help="messages per corpus")
+    parser.add_argument("--blob-mb", type=float, default=4.0, help="size of the large blob in MB")
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(seed=args.seed, messages=args.messages, blob_mb=args.blob_mb)
+    results = run(corpus, repeat=args.repeat)
+    print_table(results)
+
+    if args.out:
+        payload = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "seed": args.seed,
+                "messages": args.messages,
+                "blob_mb": args.blob_mb,
+            },
+            "results": results,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# Startup benchmarks. Run from the repo root:
+#
+#   python -m benchmarks.bench_startup --out startup.json
+#   python -m benchmarks.bench_startup --pyinstaller --exclude PIL --exclude numpy
+#
+# "first window" launches the app with PASTEPRIME_STARTUP_PROBE set, which makes
+# it record when its window maps and exit. It needs a display.
+
+from typing import Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min_ms": samples[0] * 1000.0,
+        "median_ms": statistics.median(samples) * 1000.0,
+        "max_ms": samples[-1] * 1000.0,
+    }
+
+
+def time_command(cmd: List[str], runs: int) -> Dict[str, float]:
+    """Wall time of a command that starts and exits on its own."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return _summary(samples)
+
+
+def import_profile(module: str = "main", top: int = 10) -> Dict[str, object]:
+    """Parse `python -X importtime` into the module's total and the heaviest imports."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:   self |  cumulative |   package.module" (indent = nesting)
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    total = next((cum for name, _self, cum in rows if name == module), 0)
+    heaviest = sorted(rows, key=lambda r: r[2], reverse=True)
+    return {
+        "total_ms": total / 1000.0,
+        "heaviest": [{"module": n, "self_ms": s / 1000.0, "cumulative_ms": c / 1000.0} for n, s, c in heaviest[:top]],
+    }
+
+
+def time_first_window(cmd: List[str], runs: int, timeout: float = 60.0) -> Optional[Dict[str, float]]:
+    """Launch-to-first-<Map> time, or None if the app never mapped (e.g. no display)."""
+    samples = []
+    for _ in range(runs):
+        fd, probe = tempfile.mkstemp(prefix="pasteprime-probe-")
+        os.close(fd)
+        os.remove(probe)
+        env = dict(os.environ, PASTEPRIME_STARTUP_PROBE=probe)
+        start = time.time()
+        try:
+            subprocess.run(cmd, cwd=REPO_ROOT, env=env, timeout=timeout, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except subprocess.TimeoutExpired:
+            return None
+        if not os.path.exists(probe):
+            return None
+        with open(probe, "r", encoding="utf-8") as f:
+            mapped = float(f.read())
+        os.remove(probe)
+        samples.append(mapped - start)
+    return _summary(samples)
+
+
+def _dir_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for name in filenames:
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return total
+
+
+def build_variant(name: str, workdir: str, *, onefile: bool, excludes: List[str]) -> List[str]:
+    """Build main.py with PyInstaller (same data and icon as PastePrime.spec); returns the command to run it."""
+    sep = ";" if os.name == "nt" else ":"
+    cmd = [
+        sys.executable, "-m", "PyInstaller", "--noconfirm", "--windowed",
+        "--name", name,
+        "--distpath", os.path.join(workdir, "dist"),
+        "--workpath", os.path.join(workdir, "build"),
+        "--specpath", workdir,
+        "--add-data", f"{os.path.join(REPO_ROOT, 'assets', 'icon.ico')}{sep}assets",
+        "--onefile" if onefile else "--onedir",
+    ]
+    for module in excludes:
+        cmd += ["--exclude-module", module]
+    subprocess.run(cmd + [os.path.join(REPO_ROOT, "main.py")], cwd=workdir, check=True, stdout=subprocess.DEVNULL)
+    exe = name + (".exe" if os.name == "nt" else "")
+    if onefile:
+        return [os.path.join(workdir, "dist", exe)]
+    return [os.path.join(workdir, "dist", name, exe)]
+
+
+def pyinstaller_variants(runs: int, excludes: List[str]) -> Dict[str, Dict[str, object]]:
+    variants = [("onefile", True, []), ("onedir", False, [])]
+    if excludes:
+        variants += [("onefile-excludes", True, excludes), ("onedir-excludes", False, excludes)]
+    results: Dict[str, Dict[str, object]] = {}
+    workdir = tempfile.mkdtemp(prefix="pasteprime-build-")
+    try:
+        for name, onefile, excluded in variants:
+            exe_cmd = build_variant(f"PastePrime-{name}", workdir, onefile=onefile, excludes=excluded)
+            target = exe_cmd[0] if onefile else os.path.dirname(exe_cmd[0])
+            results[name] = {
+                "excludes": excluded,
+                "size_mb": _dir_size(target) / (1024 * 1024),
+                "first_window": time_first_window(exe_cmd, runs),
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure Paste Prime cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--pyinstaller", action="store_true", help="also build and time PyInstaller variants")
+    parser.add_argument("--exclude", action="append", default=[], help="module to exclude in the extra PyInstaller variants")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, object] = {
+        "interpreter": time_command([sys.executable, "-c", "pass"], args.runs),
+        "import_main": time_command([sys.executable, "-c", "import main"], args.runs),
+        "import_profile": import_profile(),
+        "first_window": time_first_window([sys.executable, "main.py"], args.runs),
+    }
+    if args.pyinstaller:
+        results["pyinstaller"] = pyinstaller_variants(args.runs, args.exclude)
+
+    print(f"interpreter     {results['interpreter']['median_ms']:8.1f} ms")
+    print(f"import main     {results['import_main']['median_ms']:8.1f} ms")
+    first = results["first_window"]
+    print(f"first window    {first['median_ms']:8.1f} ms" if first else "first window         n/a (no display?)")
+    print("heaviest imports (cumulative):")
+    for row in results["import_profile"]["heaviest"]:
+        print(f"  {row['module']:<40} {row['cumulative_ms']:8.1f} ms")
+    for name, variant in results.get("pyinstaller", {}).items():
+        window = variant["first_window"]
+        timing = f"{window['median_ms']:8.1f} ms" if window else "     n/a"
+        print(f"pyinstaller {name:<18} {timing}  {variant['size_mb']:6.1f} MB")
+
+    if args.out:
+        payload = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "runs": args.runs,
+            },
+            "results": results,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# End-to-end load test: replays a recorded clipboard session through the
+# app's real read, clean and write-back pipeline, against an in-memory
+# clipboard. Record a session with the app, then replay it from the repo root:
+#
+#   PASTEPRIME_RECORD=session.jsonl PASTEPRIME_RECORD_CONTENT=redacted python main.py
+#   python -m benchmarks.replay_session session.jsonl --speed 10
+#   python -m benchmarks.replay_session --synthetic 2000 --speed 0 --poll 0.3
+#
+# Copies recorded without their text are replayed as generated text of the
+# same size. The Tk thread isn't involved; results are taken straight from
+# the pipeline's worker.
+
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import json
+import platform
+import random
+import sys
+import threading
+import time
+
+import diagnostics
+from benchmarks.bench_cleaner import noisy_whisper, whisper
+from cleaner import CleanCache
+from clipboard import FakeClipboard, PollSchedule
+from pipeline import LARGE_PAYLOAD_CHARS, LARGE_POLICIES, ClipboardPipeline, PipelineResult
+from session import read_session
+
+
+def synthetic_session(copies: int, seed: int = 1337) -> List[Dict[str, Any]]:
+    """Copies a few seconds apart, with bursts and the odd giant paste."""
+    rng = random.Random(seed)
+    events: List[Dict[str, Any]] = []
+    t = 0.0
+    while len(events) < copies:
+        t += rng.expovariate(1 / 2.0)
+        burst = rng.randint(3, 8) if rng.random() < 0.1 else 1
+        for _ in range(burst):
+            if rng.random() < 0.01:
+                events.append({"t": t, "event": "copy", "size": rng.randint(2, 6) * 1024 * 1024})
+            else:
+                text = noisy_whisper(rng) if rng.random() < 0.6 else whisper(rng)
+                events.append({"t": t, "event": "copy", "size": len(text), "text": text})
+            if rng.random() < 0.05:
+                events.append({"t": t + 0.2, "event": "manual"})
+            t += rng.uniform(0.02, 0.1)
+    return events
+
+
+def materialize(events: List[Dict[str, Any]], seed: int = 1337) -> List[Optional[str]]:
+    """The text to put on the clipboard for each event (None for non-copies)."""
+    generated: Dict[str, str] = {}
+    texts: List[Optional[str]] = []
+    for index, event in enumerate(events):
+        if event["event"] != "copy":
+            texts.append(None)
+            continue
+        text = event.get("text")
+        if text is None:
+            key = event.get("digest") or f"#{index}"
+            text = generated.get(key)
+            if text is None:
+                text = generated[key] = _filler(event["size"], random.Random(f"{seed}:{key}"))
+        texts.append(text)
+    return texts
+
+
+def _filler(size: int, rng: random.Random) -> str:
+    parts: List[str] = []
+    length = 0
+    while length < size:
+        line = noisy_whisper(rng) + "\r\n"
+        parts.append(line)
+        length += len(line)
+    return "".join(parts)[:size]
+
+
+def replay(
+    events: List[Dict[str, Any]],
+    *,
+    speed: float = 1.0,
+    poll: Optional[float] = None,
+    poll_ceiling: Optional[float] = None,
+    ascii_only: bool = False,
+    large_above: int = LARGE_PAYLOAD_CHARS,
+    large_policy: str = "defer",
+    settle: float = 2.0,
+    seed: int = 1337,
+) -> Dict[str, Any]:
+    """Replay events against a fresh pipeline and report what happened.
+
+    speed 1 keeps the recorded timing, 10 is ten times faster and 0 sends
+    each copy as soon as the one before it has been handled (or settle
+    seconds have passed). Copies sent faster than the pipeline handles them
+    coalesce; throughput is only reported when none were missed. With poll set the pipeline polls instead of
+    being told about each copy: at that interval, or adaptively between it
+    and poll_ceiling.
+    """
+    texts = materialize(events, seed)
+    recorder = diagnostics.enable(window=max(1000, 4 * len(events)))
+    recorder.reset()
+    clipboard = FakeClipboard()
+    lock = threading.Lock()
+    # id() of an injected text -> (event index, injected at); texts stay alive in `texts`
+    injected: Dict[int, Tuple[int, float]] = {}
+    manual_sent: List[float] = []
+    # event index -> (latency, chars) of each copy the pipeline got to
+    handled: Dict[int, Tuple[float, int]] = {}
+    counts = {"wrote": 0, "deferred": 0, "manual_done": 0}
+    last_result = [time.perf_counter()]
+
+    def publish(result: PipelineResult) -> None:
+        now = time.perf_counter()
+        with lock:
+            last_result[0] = now
+            if result.deferred:
+                counts["deferred"] += 1
+                return
+            if result.kind == "manual":
+                if manual_sent:
+                    diagnostics.record("replay.manual_latency", now - manual_sent.pop(0))
+                counts["manual_done"] += 1
+            if result.original is not None:
+                found = injected.get(id(result.original))
+                if found is not None and found[0] not in handled:
+                    handled[found[0]] = (now - found[1], len(result.original))
+                    diagnostics.record("replay.copy_latency", now - found[1])
+            if result.wrote:
+                counts["wrote"] += 1
+
+    schedule = None
+    if poll is not None:
+        # Recorded gaps shrink with speed, so the schedule does too; missed changes
+        # and skipped wakeups then come out as they would in real time
+        scale = 1.0 / speed if speed > 0 else 1.0
+        ceiling = max(poll, poll_ceiling or poll)
+        schedule = PollSchedule(poll * scale, ceiling * scale, idle_after=20.0 * scale)
+    pipeline = ClipboardPipeline(clipboard, CleanCache(), publish, poll=schedule)
+    pipeline.ascii_only = ascii_only
+    pipeline.large_above = large_above
+    pipeline.large_policy = large_policy
+    if poll is None:
+        clipboard.start(pipeline.check)
+
+    def caught_up(index: int) -> bool:
+        with lock:
+            if index in handled:
+                return True
+        # Held back by large_policy "skip", or coalesced with a later copy
+        return pipeline.idle and pipeline.seen.matches(clipboard.text)
+
+    copies = unchanged = 0
+    start = time.perf_counter()
+    for index, (event, text) in enumerate(zip(events, texts)):
+        if speed > 0:
+            delay = start + event["t"] / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if event["event"] == "copy":
+            copies += 1
+            if text == clipboard.text:
+                # Nothing for the app to notice
+                unchanged += 1
+                continue
+            with lock:
+                injected[id(text)] = (index, time.perf_counter())
+            clipboard.copy(text)
+            if speed <= 0:
+                deadline = time.perf_counter() + settle
+                while not caught_up(index) and time.perf_counter() < deadline:
+                    time.sleep(0.0005)
+        elif event["event"] == "manual":
+            with lock:
+                manual_sent.append(time.perf_counter())
+            pipeline.clean_now()
+    sent = time.perf_counter()
+
+    # Let the pipeline finish: every copy accounted for, or nothing left for it
+    # to do (coalesced copies are never seen), or quiet for settle seconds
+    expected = copies - unchanged
+    while True:
+        now = time.perf_counter()
+        with lock:
+            if not manual_sent and len(handled) >= expected:
+                break
+            quiet_since = max(last_result[0], sent)
+        if not manual_sent and pipeline.idle and pipeline.seen.matches(clipboard.text):
+            break
+        if now - quiet_since >= settle:
+            now = quiet_since
+            break
+        time.sleep(0.001)
+    finished = now
+    pipeline.stop()
+    with lock:
+        done = len(handled)
+        chars = sum(size for _, size in handled.values())
+        latencies = sorted(latency for latency, _ in handled.values())
+    diagnostics.disable()
+
+    wall = finished - start
+    missed = expected - done
+    # Coalesced copies cost nothing, so a rate over a run that missed some means nothing
+    measured = wall > 0 and not missed
+    timings = recorder.summary()
+    return {
+        "events": len(events),
+        "copies": copies,
+        "unchanged": unchanged,
+        "handled": done,
+        "missed": missed,
+        "wrote": counts["wrote"],
+        "deferred": counts["deferred"],
+        "manual": counts["manual_done"],
+        "wall_s": wall,
+        "send_s": sent - start,
+        "copies_per_s": done / wall if measured else None,
+        "mb_per_s": chars / (1024 * 1024) / wall if measured else None,
+        "latency_max_ms": latencies[-1] * 1000.0 if latencies else 0.0,
+        "poll": schedule.stats() if schedule is not None else None,
+        "timings": timings,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(
+        f"{report['copies']} copies ({report['unchanged']} unchanged), {report['handled']} handled, "
+        f"{report['missed']} missed, {report['wrote']} written back, {report['deferred']} deferred, "
+        f"{report['manual']} manual"
+    )
+    if report["poll"]:
+        poll = report["poll"]
+        print(f"{poll['polls']} polls, {poll['skipped']} wakeups skipped vs. polling at the floor")
+    if report["copies_per_s"] is None:
+        rate = f"no throughput, {report['missed']} copies coalesced (try a lower --speed)"
+    else:
+        rate = f"{report['copies_per_s']:.1f} copies/s, {report['mb_per_s']:.2f} MB/s"
+    print(f"{report['wall_s']:.2f} s ({report['send_s']:.2f} s sending): {rate}")
+    timings = report["timings"]
+    if not timings:
+        return
+    width = max(len(name) for name in timings)
+    print(f"\n{'metric':<{width}}  {'count':>7}  {'p50 ms':>9}  {'p95 ms':>9}  {'p99 ms':>9}")
+    for name, t in timings.items():
+        print(f"{name:<{width}}  {t['count']:>7}  {t['p50_ms']:>9.2f}  {t['p95_ms']:>9.2f}  {t['p99_ms']:>9.2f}")
+    print(f"\nslowest copy: {report['latency_max_ms']:.2f} ms from copy to cleaned")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a recorded clipboard session through the cleaning pipeline")
+    parser.add_argument("session", nargs="?", help="file recorded with PASTEPRIME_RECORD")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="replay N generated copies instead")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="time factor; 0 sends each copy once the last is handled (default 1)"
+    )
+    parser.add_argument("--poll", type=float, help="poll at this interval instead of being notified of copies")
+    parser.add_argument("--poll-ceiling", type=float, help="back off to this interval while idle (default: --poll)")
+    parser.add_argument("--ascii-only", action="store_true")
+    parser.add_argument("--large-above", type=int, default=LARGE_PAYLOAD_CHARS)
+    parser.add_argument("--large-policy", choices=LARGE_POLICIES, default="defer")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds of quiet that end the replay")
+    parser.add_argument("--out", help="write the report to this JSON file")
+    parser.add_argument("--seed", type=int, default=1337)
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        header: Dict[str, Any] = {"synthetic": args.synthetic}
+        events = synthetic_session(args.synthetic, args.seed)
+    elif args.session:
+        header, events = read_session(args.session)
+    else:
+        parser.error("give a session file or --synthetic N")
+
+    report = replay(
+        events,
+        speed=args.speed,
+        poll=args.poll,
+        poll_ceiling=args.poll_ceiling,
+        ascii_only=args.ascii_only,
+        large_above=args.large_above,
+        large_policy=args.large_policy,
+        settle=args.settle,
+        seed=args.seed,
+    )
+    print_report(report)
+
+    if args.out:
+        payload = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "session": header,
+                "speed": args.speed,
+                "poll": args.poll,
+                "poll_ceiling": args.poll_ceiling,
+            },
+            "report": report,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# numpy versions of TextCleaner's table, whitespace and ASCII steps, for very
+# large texts. cleaner imports this lazily, and only when numpy is installed;
+# output is identical to the pure-Python steps.
+
+from typing import Dict, Optional
+
+import numpy as np
+
+from cleaner import _ASCII_TABLE
+
+SPACE = 0x20
+# str.isspace() for every codepoint up to the last whitespace character (U+3000),
+# which is also what \s matches in WHITESPACE_PATTERN
+_IS_SPACE = np.array([chr(i).isspace() for i in range(0x3001)], dtype=bool)
+
+
+class _LookupTable:
+    """A str.translate table as arrays: codepoint -> row, row -> replacement.
+
+    Replacements of any length work; most are one character or deletions,
+    which skip the general (np.repeat) path.
+    """
+
+    def __init__(self, table: Dict[int, Optional[str]]) -> None:
+        keys = sorted(table)
+        replacements = [table[k] or "" for k in keys]
+        self._size = keys[-1] + 1 if keys else 0
+        self._rows = np.full(self._size, -1, dtype=np.int32)
+        self._rows[keys] = np.arange(len(keys), dtype=np.int32)
+        self._lengths = np.array([len(r) for r in replacements], dtype=np.int64)
+        self._first = np.array([ord(r[0]) if r else 0 for r in replacements], dtype=np.uint32)
+        # Full replacement codepoints for each multi-character length in use
+        self._wide: Dict[int, np.ndarray] = {}
+        for length in set(self._lengths.tolist()) - {0, 1}:
+            wide = np.zeros((len(keys), length), dtype=np.uint32)
+            for row, replacement in enumerate(replacements):
+                if len(replacement) == length:
+                    wide[row] = [ord(c) for c in replacement]
+            self._wide[length] = wide
+
+    def apply(self, a: np.ndarray) -> np.ndarray:
+        if not self._size or not len(a):
+            return a
+        rows = self._rows.take(a, mode="clip")
+        if int(a.max()) >= self._size:
+            # clip mapped those onto the last key
+            rows[a >= self._size] = -1
+        hit = rows >= 0
+        if not hit.any():
+            return a
+        hit_rows = rows[hit]
+        hit_lengths = self._lengths[hit_rows]
+        if self._wide and (hit_lengths > 1).any():
+            lengths = np.ones(len(a), dtype=np.int64)
+            lengths[hit] = hit_lengths
+            out = np.repeat(a, lengths)
+            hit_starts = (np.cumsum(lengths) - lengths)[hit]
+            single = hit_lengths == 1
+            out[hit_starts[single]] = self._first[hit_rows[single]]
+            for length, wide in self._wide.items():
+                chosen = hit_lengths == length
+                rows_l = hit_rows[chosen]
+                starts_l = hit_starts[chosen]
+                for j in range(length):
+                    out[starts_l + j] = wide[rows_l, j]
+            return out
+        out = a.copy()
+        out[hit] = self._first[hit_rows]
+        deleted = hit_lengths == 0
+        if deleted.any():
+            keep = np.ones(len(a), dtype=bool)
+            keep[np.flatnonzero(hit)[deleted]] = False
+            out = out[keep]
+        return out
+
+
+class BulkEngine:
+    """TextCleaner's steps after NFKC and rules, vectorized over a codepoint array."""
+
+    def __init__(self, table: Dict[int, Optional[str]]) -> None:
+        self._table = _LookupTable(table)
+
+    def clean(self, text: str, *, ascii_only: bool) -> str:
+        """Translate, collapse whitespace, strip and optionally force ASCII."""
+        a = _collapse(self._table.apply(_codepoints(text)))
+        start, end = 0, len(a)
+        # After collapsing, each end holds at most one space
+        if end and a[0] == SPACE:
+            start = 1
+        if end > start and a[end - 1] == SPACE:
+            end -= 1
+        a = a[start:end]
+        if ascii_only:
+            a = _transliterate(a)
+        return _text(a)
+
+    def map(self, text: str) -> str:
+        """Translate and collapse whitespace runs to one space, without stripping."""
+        return _text(_collapse(self._table.apply(_codepoints(text))))
+
+    @staticmethod
+    def to_ascii(text: str) -> str:
+        """Same as cleaner.force_ascii."""
+        if text.isascii():
+            return text
+        return _text(_transliterate(_codepoints(text)))
+
+
+def _codepoints(text: str) -> np.ndarray:
+    # Lone surrogates (seen in some clipboard contents) survive the round trip
+    return np.frombuffer(text.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+
+
+def _text(a: np.ndarray) -> str:
+    return a.tobytes().decode("utf-32-le", errors="surrogatepass")
+
+
+def _collapse(a: np.ndarray) -> np.ndarray:
+    """Each whitespace run becomes one space, like WHITESPACE_PATTERN.sub(" ", ...)."""
+    if not len(a):
+        return a
+    space = np.zeros(len(a), dtype=bool)
+    small = a < len(_IS_SPACE)
+    space[small] = _IS_SPACE[a[small]]
+    if not space.any():
+        return a
+    # Keep non-space characters and the first character of every space run
+    keep = ~space
+    keep[0] = True
+    keep[1:] |= ~space[:-1]
+    return np.where(space, np.uint32(SPACE), a)[keep]
+
+
+def _transliterate(a: np.ndarray) -> np.ndarray:
+    high = np.unique(a[a >= 0x80])
+    if not len(high):
+        return a
+    # Per codepoint, the same answers force_ascii gives (and memoizes)
+    return _LookupTable({int(c): _ASCII_TABLE[int(c)] for c in high}).apply(a)
@@ -11,14 +11,45 @@
 ==============================================================
 """
 
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
+import hashlib
+import importlib.util
+import os
 import re
+import sys
+import threading
+import time
 import unicodedata
 
+import diagnostics
 
-ZERO_WIDTH_PATTERN = re.compile(r"[\u200B-\u200D\uFEFF]")
-NON_BREAKING_SPACES_PATTERN = re.compile(r"[\u00A0\u202F\u2007]")
+if TYPE_CHECKING:
+    from bulk import BulkEngine
+    from rules import RuleSet
+
+
+ZERO_WIDTH_CHARS = "\u200B\u200C\u200D\uFEFF"
+NON_BREAKING_SPACES = "\u00A0\u202F\u2007"
+
+ZERO_WIDTH_PATTERN = re.compile(f"[{ZERO_WIDTH_CHARS}]")
+NON_BREAKING_SPACES_PATTERN = re.compile(f"[{NON_BREAKING_SPACES}]")
 WHITESPACE_PATTERN = re.compile(r"\s+")
 
+# Longest message Warframe chat accepts; longer text is split into several
+CHAT_MESSAGE_LIMIT = 180
+
+# Streaming works on slices of this many characters at a time
+STREAM_PIECE_SIZE = 64 * 1024
+# Upper bound on characters held back while waiting for a safe split point
+STREAM_MAX_CARRY = 4 * STREAM_PIECE_SIZE
+
+# Texts at least this long go through the numpy engine (bulk.py) when numpy is
+# installed; about 3x faster there, and big enough to be worth importing numpy.
+# Streams are cut into pieces of this size so each piece qualifies.
+BULK_THRESHOLD = 256 * 1024
+
 
 SMART_QUOTES = {
     "": "",  # SUB char sometimes appears in weird copies
@@ -46,13 +77,522 @@ CHAR_REPLACEMENTS = {
 }
 
 
+# Letters NFKD leaves alone (no decomposition) but that still have an obvious
+# ASCII spelling. Checked before decomposing, so й can be "y" rather than "i"
+ASCII_TRANSLITERATIONS = {
+    "ß": "ss", "ẞ": "SS",
+    "Æ": "AE", "æ": "ae", "Œ": "OE", "œ": "oe",
+    "Ø": "O", "ø": "o", "Ð": "D", "ð": "d", "Þ": "Th", "þ": "th",
+    "Đ": "D", "đ": "d", "Ħ": "H", "ħ": "h", "Ł": "L", "ł": "l",
+    "Ŧ": "T", "ŧ": "t", "Ŋ": "NG", "ŋ": "ng", "ı": "i", "ĸ": "k",
+    "ƒ": "f", "Ɲ": "N", "ɲ": "n",
+    # Russian / Ukrainian / Belarusian, roughly BGN/PCGN without diacritics
+    "А": "A", "Б": "B", "В": "V", "Г": "G", "Д": "D", "Е": "E", "Ё": "Yo",
+    "Ж": "Zh", "З": "Z", "И": "I", "Й": "Y", "К": "K", "Л": "L", "М": "M",
+    "Н": "N", "О": "O", "П": "P", "Р": "R", "С": "S", "Т": "T", "У": "U",
+    "Ф": "F", "Х": "Kh", "Ц": "Ts", "Ч": "Ch", "Ш": "Sh", "Щ": "Shch",
+    "Ъ": "", "Ы": "Y", "Ь": "", "Э": "E", "Ю": "Yu", "Я": "Ya",
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo",
+    "ж": "zh", "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u",
+    "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch",
+    "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+    "Є": "Ye", "є": "ye", "І": "I", "і": "i", "Ї": "Yi", "ї": "yi",
+    "Ґ": "G", "ґ": "g", "Ў": "U", "ў": "u",
+    # Greek
+    "Α": "A", "Β": "V", "Γ": "G", "Δ": "D", "Ε": "E", "Ζ": "Z", "Η": "I",
+    "Θ": "Th", "Ι": "I", "Κ": "K", "Λ": "L", "Μ": "M", "Ν": "N", "Ξ": "X",
+    "Ο": "O", "Π": "P", "Ρ": "R", "Σ": "S", "Τ": "T", "Υ": "Y", "Φ": "F",
+    "Χ": "Ch", "Ψ": "Ps", "Ω": "O",
+    "α": "a", "β": "v", "γ": "g", "δ": "d", "ε": "e", "ζ": "z", "η": "i",
+    "θ": "th", "ι": "i", "κ": "k", "λ": "l", "μ": "m", "ν": "n", "ξ": "x",
+    "ο": "o", "π": "p", "ρ": "r", "σ": "s", "ς": "s", "τ": "t", "υ": "y",
+    "φ": "f", "χ": "ch", "ψ": "ps", "ω": "o",
+    # Punctuation NFKD doesn't decompose
+    "«": '"', "»": '"', "‹": "'", "›": "'", "©": "(c)", "®": "(R)",
+    "×": "x", "÷": "/", "•": "*", "·": ".",
+}
+
+
+class _LazyTable(dict):
+    """str.translate table that works out each codepoint the first time it's seen.
+
+    translate() looks every character up with __getitem__, so a miss lands in
+    __missing__, which stores the answer for next time. The table only ever
+    holds codepoints that have actually shown up.
+    """
+
+    def __init__(self, convert) -> None:
+        super().__init__()
+        self._convert = convert
+
+    def __missing__(self, code: int) -> Optional[str]:
+        out = self._convert(chr(code)) or None
+        self[code] = out
+        return out
+
+
+def _without_marks(ch: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKD", ch) if not unicodedata.combining(c))
+
+
+def _transliterate(ch: str) -> str:
+    if ch in ASCII_TRANSLITERATIONS:
+        return ASCII_TRANSLITERATIONS[ch]
+    out = []
+    for c in _without_marks(ch):
+        if c.isascii():
+            out.append(c)
+        elif c in ASCII_TRANSLITERATIONS:
+            out.append(ASCII_TRANSLITERATIONS[c])
+        # Anything else has no sensible spelling and is dropped
+    return "".join(out)
+
+
+_DIACRITICS_TABLE = _LazyTable(_without_marks)
+_ASCII_TABLE = _LazyTable(_transliterate)
+
+# After NFKD, text made only of ASCII and the common combining accents needs
+# nothing but the accents dropped, which encode() does in C. None of the
+# ASCII_TRANSLITERATIONS keys decompose into just these characters
+_NEEDS_TRANSLITERATION = re.compile("[^\x00-\x7f\u0300-\u036f]")
+
+
 def strip_diacritics(text: str) -> str:
     """Remove diacritics by decomposing and dropping combining chars."""
-    normalized = unicodedata.normalize("NFKD", text)
-    return "".join(ch for ch in normalized if not unicodedata.combining(ch))
+    if text.isascii():
+        return text
+    # Decomposing one codepoint at a time gives the same letters as decomposing
+    # the whole string; only the order of the dropped marks could differ
+    return text.translate(_DIACRITICS_TABLE)
+
+
+def force_ascii(text: str) -> str:
+    """Transliterate to ASCII (the ascii_only step).
+
+    Accents are stripped, letters like ß, Ø and Æ and Cyrillic/Greek are spelled
+    out (ss, O, AE, Zh...), and whatever still has no ASCII form is dropped.
+    """
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize("NFKD", text)
+    if _NEEDS_TRANSLITERATION.search(decomposed) is None:
+        return decomposed.encode("ascii", errors="ignore").decode("ascii")
+    return text.translate(_ASCII_TABLE)
+
+
+def _build_translation_table(*, single_line: bool) -> Dict[int, Optional[str]]:
+    """Fold every single-character substitution into one str.translate table.
+
+    Order matters only if a replacement could produce another key, and none of
+    ours do, so applying them all at once matches the old sequential passes.
+    """
+    table: Dict[int, Optional[str]] = {}
+    for ch in ZERO_WIDTH_CHARS:
+        table[ord(ch)] = None
+    for ch in NON_BREAKING_SPACES:
+        table[ord(ch)] = " "
+    for src, dst in {**SMART_QUOTES, **CHAR_REPLACEMENTS}.items():
+        table[ord(src)] = dst or None
+    if single_line:
+        # "\r\n" becomes two spaces here, which the whitespace collapse folds into one
+        table[ord("\r")] = " "
+        table[ord("\n")] = " "
+    return table
+
+
+def _is_stable_starter(ch: str) -> bool:
+    """True if NFKC can never merge ch with anything before it.
+
+    Splitting a stream just before such a character normalizes each side
+    independently with the same result as normalizing the whole.
+    """
+    if ch < "\u0300":
+        return True
+    return _is_stable_starter_slow(ch)
+
+
+@lru_cache(maxsize=4096)
+def _is_stable_starter_slow(ch: str) -> bool:
+    # Combining marks, spacing vowel signs and conjoining jamo can all attach
+    # to the preceding character; so can anything that decomposes into one
+    head = unicodedata.normalize("NFKD", ch)[0]
+    for c in (ch, head):
+        if unicodedata.combining(c) or unicodedata.category(c)[0] == "M" or "\u1100" <= c <= "\u11FF":
+            return False
+    return True
+
+
+def _stable_pieces(chunks: Iterable[str], piece_size: Optional[int] = None) -> Iterator[str]:
+    """Re-slice chunks so every piece ends just before a stable starter."""
+    if piece_size is None:
+        piece_size, max_carry = STREAM_PIECE_SIZE, STREAM_MAX_CARRY
+    else:
+        max_carry = 4 * piece_size
+    carry = ""
+    for chunk in chunks:
+        for start in range(0, len(chunk), piece_size):
+            buf = carry + chunk[start:start + piece_size]
+            cut = len(buf) - 1
+            while cut > 0 and not _is_stable_starter(buf[cut]):
+                cut -= 1
+            if cut <= 0:
+                if len(buf) < max_carry:
+                    carry = buf
+                    continue
+                # Thousands of marks with no base character is not stream-safe
+                # text (UAX #15); flush rather than buffer without bound
+                cut = len(buf)
+            carry = buf[cut:]
+            yield buf[:cut]
+    if carry:
+        yield carry
+
+
+# What analyze() says about each character cleaning would change
+CHANGE_CATEGORIES = (
+    "invisible",    # zero-width chars, BOM, stray control chars: removed
+    "space",        # non-breaking spaces: become plain spaces
+    "punctuation",  # smart quotes, dashes, ellipsis: ASCII equivalents
+    "newline",      # line breaks, in single-line mode
+    "whitespace",   # tabs, doubled, leading and trailing spaces: collapsed
+    "unicode",      # NFKC compatibility forms (ｆｕｌｌｗｉｄｔｈ, ligatures...)
+    "rule",         # the user's replacement rules
+    "non_ascii",    # transliterated or dropped by ascii_only
+)
+
+
+def _table_categories(single_line: bool) -> Dict[int, str]:
+    categories = {ord(ch): "invisible" for ch in ZERO_WIDTH_CHARS}
+    categories.update((ord(ch), "space") for ch in NON_BREAKING_SPACES)
+    for src, dst in {**SMART_QUOTES, **CHAR_REPLACEMENTS}.items():
+        categories[ord(src)] = "punctuation" if dst else "invisible"
+    if single_line:
+        categories[ord("\r")] = categories[ord("\n")] = "newline"
+    return categories
+
+
+@lru_cache(maxsize=4096)
+def _nfkc_changes(ch: str) -> bool:
+    return unicodedata.normalize("NFKC", ch) != ch
+
+
+def common_affixes(old: str, new: str) -> Tuple[int, int]:
+    """Lengths of the shared prefix and (non-overlapping) shared suffix."""
+    limit = min(len(old), len(new))
+    # Binary search on slice equality: comparisons run in C
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[:mid] == new[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    prefix = lo
+    lo, hi = 0, limit - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return prefix, lo
+
+
+class Analysis:
+    """What cleaning would change in a text, from analyze().
+
+    changes lists (start, end, category) spans of the input in order, with
+    neighbouring characters of one category merged; categories are those in
+    CHANGE_CATEGORIES. needs_cleaning is never False for text that cleaning
+    would change (it can be True for text only user rules map onto itself).
+    Scanning stops once limit spans are found, setting truncated.
+    """
+
+    __slots__ = ("changes", "needs_cleaning", "truncated")
+
+    def __init__(self, changes: List[Tuple[int, int, str]], truncated: bool = False) -> None:
+        self.changes = changes
+        self.needs_cleaning = bool(changes)
+        self.truncated = truncated
+
+    def __repr__(self) -> str:
+        return f"Analysis(needs_cleaning={self.needs_cleaning}, changes={len(self.changes)}, truncated={self.truncated})"
+
+    def counts(self) -> Dict[str, int]:
+        """Characters per category."""
+        out: Dict[str, int] = {}
+        for start, end, category in self.changes:
+            out[category] = out.get(category, 0) + end - start
+        return out
+
+
+class TextCleaner:
+    """Precompiled cleaning pipeline for one set of options.
+
+    Build it once (or grab a shared one from get_cleaner) and call clean()
+    as often as needed; the output is identical to clean_text().
+
+    User rules (rules.RuleSet) run right after NFKC. Their single-character
+    entries override the built-in table.
+    """
+
+    def __init__(self, *, ascii_only: bool = False, single_line: bool = True, rules: Optional["RuleSet"] = None) -> None:
+        self.ascii_only = ascii_only
+        self.single_line = single_line
+        self.rules = rules
+        self._table = _build_translation_table(single_line=single_line)
+        if rules is not None:
+            self._table.update(rules.single)
+        self._bulk: Optional["BulkEngine"] = None
+        # For analyze(): built the first time it's called
+        self._categories: Optional[Dict[int, str]] = None
+        self._triggers: Tuple[str, ...] = ()
+        self._scans: Optional[Tuple[Pattern[str], Pattern[str]]] = None
+
+    def __repr__(self) -> str:
+        return f"TextCleaner(ascii_only={self.ascii_only}, single_line={self.single_line}, rules={self.rules!r})"
+
+    def clean(self, text: str) -> str:
+        if not text:
+            return ""
+        if len(text) >= BULK_THRESHOLD and _bulk_installed():
+            with diagnostics.span("clean.bulk"):
+                return self._bulk_engine().clean(self._prepare(text), ascii_only=self.ascii_only)
+        if diagnostics.recorder is not None:
+            return self._clean_timed(text, diagnostics.recorder)
+        text = WHITESPACE_PATTERN.sub(" ", self._map(text)).strip()
+        return self._to_ascii(text) if self.ascii_only else text
+
+    def _clean_timed(self, text: str, recorder: "diagnostics.Recorder") -> str:
+        # Same steps as clean(), with a timer around each one
+        clock = time.perf_counter
+        start = clock()
+        if not text.isascii():
+            text = unicodedata.normalize("NFKC", text)
+        t_nfkc = clock()
+        if self.rules is not None:
+            text = self.rules.apply(text)
+        t_rules = clock()
+        # Zero-width removal and replacements are a single translate pass
+        text = text.translate(self._table)
+        t_translate = clock()
+        text = WHITESPACE_PATTERN.sub(" ", text).strip()
+        t_whitespace = clock()
+        recorder.add("clean.nfkc", t_nfkc - start)
+        if self.rules is not None:
+            recorder.add("clean.rules", t_rules - t_nfkc)
+        recorder.add("clean.translate", t_translate - t_rules)
+        recorder.add("clean.whitespace", t_whitespace - t_translate)
+        if self.ascii_only:
+            text = self._to_ascii(text)
+            recorder.add("clean.ascii", clock() - t_whitespace)
+        recorder.add("clean.total", clock() - start)
+        return text
+
+    __call__ = clean
 
+    def stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Clean an iterable of text chunks, yielding cleaned chunks.
 
-def clean_text(text: str, *, ascii_only: bool = False, single_line: bool = True) -> str:
+        Joining the output gives exactly clean(''.join(chunks)), but only a
+        bounded window of the input is held in memory at any time.
+        """
+        pending_space = False
+        started = False
+        bulk = _bulk_installed()
+        piece_size = BULK_THRESHOLD if bulk else None
+        pieces = (self._normalize(piece) for piece in _stable_pieces(chunks, piece_size))
+        if self.rules is not None:
+            # Rule patterns can straddle pieces; the rule stream holds those back
+            pieces = self.rules.stream(pieces)
+        for piece in pieces:
+            big = bulk and len(piece) >= BULK_THRESHOLD
+            if big:
+                text = self._bulk_engine().map(piece)
+            else:
+                text = WHITESPACE_PATTERN.sub(" ", piece.translate(self._table))
+            body = text.strip()
+            if not body:
+                # All whitespace: only matters as a separator between words
+                pending_space = pending_space or bool(text)
+                continue
+            if started and (pending_space or text[0] == " "):
+                body = " " + body
+            # A trailing run may continue into the next piece, so defer it
+            pending_space = text[-1] == " "
+            started = True
+            if self.ascii_only:
+                body = self._bulk_engine().to_ascii(body) if big else self._to_ascii(body)
+            if body:
+                yield body
+
+    def analyze(self, text: str, limit: Optional[int] = None) -> Analysis:
+        """Find what clean() would change, without cleaning (see Analysis).
+
+        One regex pass finds everything the translate table or the whitespace
+        collapse would touch. Only text that isn't NFKC-normalized, or any
+        non-ASCII text with ascii_only, gets its non-ASCII runs looked at
+        character by character. Clean ASCII text never gets that far: a few
+        substring checks rule everything out first.
+        """
+        if not text:
+            return Analysis([])
+        if self._scans is None:
+            self._categories, self._triggers, self._scans = self._build_scans()
+        if text.isascii() and not self._maybe_dirty(text):
+            if self.rules is None or self.rules.pattern is None or self.rules.pattern.search(text) is None:
+                return Analysis([])
+        categories = self._categories
+        assert categories is not None
+        spans: List[Tuple[int, int, str]] = []
+        # Leading and trailing spaces; other whitespace is the scan's
+        lead = len(text) - len(text.lstrip(" "))
+        if lead:
+            spans.append((0, lead, "whitespace"))
+        trail = len(text.rstrip(" "))
+        if trail < len(text) and trail >= lead:
+            spans.append((trail, len(text), "whitespace"))
+        unicode = not text.isascii() and (self.ascii_only or not unicodedata.is_normalized("NFKC", text))
+        if self.rules is not None and self.rules.pattern is not None:
+            for match in self.rules.pattern.finditer(text):
+                spans.append((match.start(), match.end(), "rule"))
+                if limit is not None and len(spans) >= limit:
+                    return Analysis(spans, True)
+        scan = self._scans[1] if unicode else self._scans[0]
+        for match in scan.finditer(text):
+            start, end = match.span()
+            kind = match.lastgroup
+            if kind == "run":
+                self._analyze_run(text, start, end, categories, spans)
+            elif kind == "table":
+                spans.append((start, end, categories[ord(text[start])]))
+            elif kind == "double":
+                # The first space stays
+                spans.append((start + 1, end, "whitespace"))
+            else:
+                spans.append((start, end, "whitespace"))
+            if limit is not None and len(spans) >= limit:
+                break
+        else:
+            limit = None
+        spans.sort()
+        merged: List[Tuple[int, int, str]] = []
+        for span in spans:
+            if merged and merged[-1][2] == span[2] and merged[-1][1] >= span[0]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], span[1]), span[2])
+            else:
+                merged.append(span)
+        return Analysis(merged, limit is not None)
+
+    def _maybe_dirty(self, text: str) -> bool:
+        # ASCII only: str.__contains__ is far quicker than any regex here
+        if text[0].isspace() or text[-1].isspace():
+            return True
+        return any(trigger in text for trigger in self._triggers)
+
+    def _analyze_run(self, text: str, start: int, end: int, categories: Dict[int, str], spans: List[Tuple[int, int, str]]) -> None:
+        # A run of non-ASCII characters, one at a time
+        flagged = set()
+        for i in range(start, end):
+            ch = text[i]
+            category = categories.get(ord(ch))
+            if category is None:
+                if ch.isspace():
+                    category = "whitespace"
+                elif _nfkc_changes(ch):
+                    category = "unicode"
+                elif self.ascii_only:
+                    category = "non_ascii"
+                else:
+                    continue
+            flagged.add(i)
+            spans.append((i, i + 1, category))
+        # Each character may be fine alone and the run still change: it can
+        # compose with itself or its ASCII neighbour (e + U+0301 -> é, Hangul
+        # jamo -> syllables, two-part Indic vowels) or have its marks reordered
+        lead = max(0, start - 1)
+        segment = text[lead:end]
+        if unicodedata.is_normalized("NFKC", segment):
+            return
+        prefix, suffix = common_affixes(segment, unicodedata.normalize("NFKC", segment))
+        first = max(start, lead + prefix)
+        last = min(end, max(first + 1, lead + len(segment) - suffix))
+        for i in range(first, last):
+            if i not in flagged:
+                spans.append((i, i + 1, "unicode"))
+
+    def _build_scans(self) -> Tuple[Dict[int, str], Tuple[str, ...], Tuple[Pattern[str], Pattern[str]]]:
+        categories = _table_categories(self.single_line)
+        if self.rules is not None:
+            categories.update((code, "rule") for code in self.rules.single)
+        triggers = {chr(code) for code in self._table if code < 0x80}
+        triggers.update(chr(code) for code in range(0x80) if chr(code).isspace() and code != 0x20)
+        keys = "".join(re.escape(chr(code)) for code in sorted(self._table))
+        table = f"(?P<table>[{keys}])|" if keys else ""
+        body = table + r"(?P<ws>[^\S ]+)|(?P<double>  +)"
+        # The lookahead lets the engine skip ahead on one character class
+        # instead of trying every alternative at every position. The second
+        # form also takes whole non-ASCII runs, for a closer look
+        start = f"[{keys}]|" if keys else ""
+        plain = re.compile(f"(?={start}[^\\S ]|  )(?:{body})")
+        with_runs = re.compile(f"(?={start}[^\\S ]|  |[^\\x00-\\x7f])(?:(?P<run>[^\\x00-\\x7f]+)|{body})")
+        return categories, tuple(sorted(triggers)) + ("  ",), (plain, with_runs)
+
+    def _prepare(self, text: str) -> str:
+        text = self._normalize(text)
+        if self.rules is not None:
+            text = self.rules.apply(text)
+        return text
+
+    def _map(self, text: str) -> str:
+        # Zero-width removal, NBSPs, smart punctuation and newlines in one pass
+        return self._prepare(text).translate(self._table)
+
+    def _bulk_engine(self) -> "BulkEngine":
+        if self._bulk is None:
+            from bulk import BulkEngine
+
+            self._bulk = BulkEngine(self._table)
+        return self._bulk
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        # NFKC never changes pure ASCII, so skip it for the common case
+        if not text.isascii():
+            text = unicodedata.normalize("NFKC", text)
+        return text
+
+    @staticmethod
+    def _to_ascii(text: str) -> str:
+        return force_ascii(text)
+
+
+@lru_cache(maxsize=None)
+def _bulk_installed() -> bool:
+    """Whether the numpy engine can be used. PASTEPRIME_NO_NUMPY=1 turns it off."""
+    if os.environ.get("PASTEPRIME_NO_NUMPY"):
+        return False
+    try:
+        return importlib.util.find_spec("numpy") is not None
+    except (ImportError, ValueError):
+        return False
+
+
+# Small bound so rule sets replaced by a reload don't pile up
+@lru_cache(maxsize=32)
+def get_cleaner(*, ascii_only: bool = False, single_line: bool = True, rules: Optional["RuleSet"] = None) -> TextCleaner:
+    """Return the shared TextCleaner for these options."""
+    return TextCleaner(ascii_only=ascii_only, single_line=single_line, rules=rules)
+
+
+def clean_text(
+    text: str,
+    *,
+    ascii_only: bool = False,
+    single_line: bool = True,
+    rules: Optional["RuleSet"] = None,
+) -> str:
     """Clean text for reliable pasting into Warframe chat.
 
     Steps:
@@ -61,37 +601,375 @@ def clean_text(text: str, *, ascii_only: bool = False, single_line: bool = True)
     - Replace non-breaking spaces with regular spaces
     - Replace smart quotes/dashes/ellipsis with ASCII equivalents
     - Collapse whitespace
-    - Optionally force ASCII (strip diacritics and drop non-ASCII)
+    - Optionally force ASCII (transliterate, drop what has no ASCII form)
     - Optionally enforce single line
+
+    rules adds user replacement rules (see rules.py) on top of the built-in ones.
+    Very long texts use the numpy engine in bulk.py when numpy is installed;
+    the result is the same.
     """
-    if not text:
-        return ""
+    return get_cleaner(ascii_only=ascii_only, single_line=single_line, rules=rules).clean(text)
 
-    # Normalize
-    text = unicodedata.normalize("NFKC", text)
 
-    # Remove zero width and BOM-like characters
-    text = ZERO_WIDTH_PATTERN.sub("", text)
+def analyze(
+    text: str,
+    *,
+    ascii_only: bool = False,
+    single_line: bool = True,
+    rules: Optional["RuleSet"] = None,
+    limit: Optional[int] = None,
+) -> Analysis:
+    """Whether clean_text would change text, and where and how, in one scan.
 
-    # Replace non-breaking spaces with normal space
-    text = NON_BREAKING_SPACES_PATTERN.sub(" ", text)
+    limit=1 is the cheap "is this already clean?" check.
+    """
+    return get_cleaner(ascii_only=ascii_only, single_line=single_line, rules=rules).analyze(text, limit)
 
-    # Replace common smart punctuation
-    for src, dst in {**SMART_QUOTES, **CHAR_REPLACEMENTS}.items():
-        text = text.replace(src, dst)
 
-    # Normalize newlines to spaces if single line requested
-    if single_line:
-        text = text.replace("\r\n", " ").replace("\n", " ").replace("\r", " ")
+def clean_stream(
+    chunks: Iterable[str],
+    *,
+    ascii_only: bool = False,
+    single_line: bool = True,
+    rules: Optional["RuleSet"] = None,
+) -> Iterator[str]:
+    """Streaming clean_text: yields cleaned chunks for an iterable of text chunks.
+
+    Handles chunk boundaries that split a "\\r\\n" pair, a whitespace run or a
+    character from its combining marks. Memory use stays bounded regardless of
+    input size, and ''.join() of the output equals clean_text() of the input.
+    """
+    return get_cleaner(ascii_only=ascii_only, single_line=single_line, rules=rules).stream(chunks)
+
+
+def clean_many(
+    texts: Iterable[str],
+    *,
+    ascii_only: bool = False,
+    single_line: bool = True,
+    rules: Optional["RuleSet"] = None,
+) -> List[str]:
+    """Clean a batch of texts with one shared cleaner (no per-call option lookup)."""
+    clean = get_cleaner(ascii_only=ascii_only, single_line=single_line, rules=rules).clean
+    return [clean(text) for text in texts]
+
+
+def split_messages(text: str, limit: int = CHAT_MESSAGE_LIMIT) -> List[str]:
+    """Split cleaned text into chat-sized messages at word boundaries.
+
+    Single pass over the text; a word longer than the limit is cut mid-word.
+    """
+    return [text[start:end] for start, end in _message_bounds(text, limit)]
+
+
+def count_messages(text: str, limit: int = CHAT_MESSAGE_LIMIT) -> int:
+    """How many messages split_messages would produce, without building them."""
+    return sum(1 for _ in _message_bounds(text, limit))
+
+
+def _message_bounds(text: str, limit: int) -> Iterator[Tuple[int, int]]:
+    if limit <= 0:
+        raise ValueError("limit must be positive")
+    start = 0
+    end_of_text = len(text)
+    while start < end_of_text:
+        if text[start] == " ":
+            start += 1
+            continue
+        end = start + limit
+        if end >= end_of_text:
+            cut = end_of_text
+        else:
+            # A space right at the limit still lets the full window through
+            cut = text.rfind(" ", start, end + 1)
+            if cut <= start:
+                cut = end
+        end = cut
+        while text[end - 1] == " ":
+            end -= 1
+        yield start, end
+        start = cut
+
+
+class CleanCache:
+    """Bounded LRU of cleaning results, keyed by a digest of the text.
+
+    Each entry keeps the result from before the ASCII step, so flipping
+    ascii_only for text that was already cleaned only reruns that last step.
+    Entries are evicted oldest-first once their strings exceed max_bytes.
+
+    Safe to share between threads. The cleaning itself runs outside the lock,
+    so a long clean on one thread doesn't hold up hits on another. Text that
+    analyze() finds already clean comes straight back and isn't stored.
+    """
+
+    def __init__(self, *, max_bytes: int = 8 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.already_clean = 0
+        self._size = 0
+        # (digest, single_line, rules fingerprint) -> [pre-ASCII result, ASCII result or None]
+        self._entries: "OrderedDict[Tuple[bytes, bool, Optional[str]], list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def clean(
+        self,
+        text: str,
+        *,
+        ascii_only: bool = False,
+        single_line: bool = True,
+        rules: Optional["RuleSet"] = None,
+    ) -> str:
+        """Same as clean_text, served from the cache when possible."""
+        if not text:
+            return ""
+        key = (text_digest(text), single_line, rules.fingerprint if rules is not None else None)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if not ascii_only:
+                    self.hits += 1
+                    return entry[0]
+                if entry[1] is not None:
+                    self.hits += 1
+                    return entry[1]
+                # Only the ASCII step is missing
+                self.partial_hits += 1
+                base = entry[0]
+            else:
+                self.misses += 1
+                base = None
+        if base is None:
+            if not get_cleaner(ascii_only=ascii_only, single_line=single_line, rules=rules).analyze(text, 1).needs_cleaning:
+                with self._lock:
+                    self.already_clean += 1
+                return text
+            base = get_cleaner(single_line=single_line, rules=rules).clean(text)
+        ascii_text = force_ascii(base) if ascii_only else None
+        with self._lock:
+            # Another thread may have stored or dropped this key meanwhile
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= _entry_size(old)
+                if ascii_text is None:
+                    ascii_text = old[1]
+            entry = [base, ascii_text]
+            self._entries[key] = entry
+            self._size += _entry_size(entry)
+            self._evict()
+        return ascii_text if ascii_only else base
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "partial_hits": self.partial_hits,
+                "misses": self.misses,
+                "already_clean": self.already_clean,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _evict(self) -> None:
+        # Oversized results are returned but not kept
+        while self._size > self.max_bytes and self._entries:
+            _key, entry = self._entries.popitem(last=False)
+            self._size -= _entry_size(entry)
+
+
+def _entry_size(entry: list) -> int:
+    base, ascii_text = entry
+    size = sys.getsizeof(base)
+    if ascii_text is not None and ascii_text is not base:
+        size += sys.getsizeof(ascii_text)
+    return size
+
+
+def text_digest(text: str) -> bytes:
+    """16-byte digest of text; the one key for "same text" everywhere (caches, history, sessions)."""
+    return hashlib.blake2b(text.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+
+
+# Command line: python -m cleaner [paths...]
+#
+# Its imports live inside the functions; the app imports this module at
+# startup and shouldn't pay for multiprocessing or argparse.
+
+if TYPE_CHECKING:
+    import argparse
+
+
+def _read_chunks(f) -> Iterator[str]:
+    while True:
+        chunk = f.read(STREAM_PIECE_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _clean_file(job: Tuple[str, Optional[str], str, bool, bool, Optional[str]]) -> Tuple[str, int, Optional[str]]:
+    """Stream one file through the cleaner. Returns (path, size in bytes, error)."""
+    src, dst, encoding, ascii_only, single_line, rules_path = job
+    rules = _load_cli_rules(rules_path)
+    tmp = None
+    try:
+        size = os.path.getsize(src)
+        # newline="" so "\r\n" reaches the cleaner untouched
+        with open(src, "r", encoding=encoding, newline="") as f_in:
+            pieces = clean_stream(_read_chunks(f_in), ascii_only=ascii_only, single_line=single_line, rules=rules)
+            if dst is None:
+                sys.stdout.writelines(pieces)
+                sys.stdout.write("\n")
+                return src, size, None
+            parent = os.path.dirname(dst)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            tmp = dst + ".tmp"
+            with open(tmp, "w", encoding=encoding, newline="") as f_out:
+                f_out.writelines(pieces)
+        # Write-then-rename so --in-place never leaves a half-cleaned file
+        os.replace(tmp, dst)
+    except (OSError, UnicodeError) as e:
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+        return src, 0, str(e)
+    return src, size, None
+
+
+@lru_cache(maxsize=None)
+def _load_cli_rules(path: Optional[str]) -> Optional["RuleSet"]:
+    # Once per worker process, not once per file
+    if path is None:
+        return None
+    from rules import load_rules
+
+    return load_rules(path)
+
+
+def _collect_jobs(args: "argparse.Namespace") -> List[Tuple[str, Optional[str], str, bool, bool, Optional[str]]]:
+    import fnmatch
+
+    jobs = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            for dirpath, _dirnames, filenames in os.walk(path):
+                for name in sorted(filenames):
+                    if not fnmatch.fnmatch(name, args.glob):
+                        continue
+                    src = os.path.join(dirpath, name)
+                    if args.in_place:
+                        dst = src
+                    else:
+                        dst = os.path.join(args.output, os.path.relpath(src, path))
+                    jobs.append((src, dst, args.encoding, args.ascii_only, not args.multiline, args.rules))
+        else:
+            if args.in_place:
+                dst = path
+            elif args.output:
+                dst = os.path.join(args.output, os.path.basename(path))
+            else:
+                dst = None
+            jobs.append((path, dst, args.encoding, args.ascii_only, not args.multiline, args.rules))
+    return jobs
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from concurrent.futures import ProcessPoolExecutor
+    import argparse
+    import codecs
+
+    parser = argparse.ArgumentParser(
+        prog="python -m cleaner",
+        description="Clean text for Warframe chat. Reads stdin when no paths are given.",
+    )
+    parser.add_argument("paths", nargs="*", help="files or directories to clean")
+    parser.add_argument("--ascii-only", action="store_true", help="transliterate to ASCII (é→e, ß→ss, Ж→Zh)")
+    parser.add_argument("--multiline", action="store_true", help="don't force the output onto one line")
+    parser.add_argument("-o", "--output", help="write cleaned files here, mirroring directory trees")
+    parser.add_argument("-i", "--in-place", action="store_true", help="overwrite the input files")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--glob", default="*", help="file name pattern when walking directories (default: *)")
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--rules", help="JSON file of extra replacement rules (see rules.py)")
+    args = parser.parse_args(argv)
+
+    if args.output and args.in_place:
+        parser.error("--output and --in-place can't be combined")
+    if any(os.path.isdir(p) for p in args.paths) and not (args.output or args.in_place):
+        parser.error("directories need --output or --in-place")
+    if args.rules:
+        from rules import RulesError
+
+        try:
+            _load_cli_rules(args.rules)
+        except RulesError as e:
+            parser.error(str(e))
+
+    start = time.perf_counter()
+    if not args.paths:
+        stdin = open(sys.stdin.fileno(), "rb", closefd=False)
+        # Decode ourselves so the summary can count bytes
+        size = 0
+        decoder = codecs.getincrementaldecoder(args.encoding)()
 
-    # Collapse whitespace runs
-    text = WHITESPACE_PATTERN.sub(" ", text).strip()
+        def chunks() -> Iterator[str]:
+            nonlocal size
+            while True:
+                data = stdin.read(STREAM_PIECE_SIZE)
+                size += len(data)
+                text = decoder.decode(data, final=not data)
+                if text:
+                    yield text
+                if not data:
+                    return
 
-    if ascii_only:
-        # Remove diacritics and drop any remaining non-ASCII
-        text = strip_diacritics(text)
-        text = text.encode("ascii", errors="ignore").decode("ascii")
+        sys.stdout.writelines(
+            clean_stream(
+                chunks(),
+                ascii_only=args.ascii_only,
+                single_line=not args.multiline,
+                rules=_load_cli_rules(args.rules),
+            )
+        )
+        sys.stdout.write("\n")
+        results = [("<stdin>", size, None)]
+    else:
+        jobs = _collect_jobs(args)
+        # Files printed to stdout must stay in order, so only fan out real file output
+        if args.jobs > 1 and len(jobs) > 1 and all(job[1] is not None for job in jobs):
+            with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+                results = list(pool.map(_clean_file, jobs, chunksize=max(1, len(jobs) // (args.jobs * 4))))
+        else:
+            results = [_clean_file(job) for job in jobs]
+    elapsed = time.perf_counter() - start
 
-    return text
+    failed = [r for r in results if r[2] is not None]
+    for path, _size, error in failed:
+        print(f"{path}: {error}", file=sys.stderr)
+    mb = sum(r[1] for r in results) / (1024 * 1024)
+    rate = mb / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Cleaned {len(results) - len(failed)} of {len(results)} input(s), "
+        f"{mb:.2f} MB in {elapsed:.2f}s ({rate:.1f} MB/s)",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
 
 
+if __name__ == "__main__":
+    sys.exit(main())
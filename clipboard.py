@@ -0,0 +1,510 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+from typing import Any, Callable, Dict, Optional
+import os
+import select
+import sys
+import threading
+import time
+
+try:
+    import pyperclip
+except ImportError:
+    pyperclip = None
+
+try:
+    from Xlib import X
+    from Xlib import display as xdisplay
+    from Xlib.ext import xfixes
+except ImportError:
+    X = None
+    xdisplay = None
+    xfixes = None
+
+
+# Clipboard polling, for when changes can't be watched: at the floor interval
+# while things are happening, backing off to the ceiling while idle
+POLL_FLOOR = 0.3
+POLL_CEILING = 2.0
+
+# Longest wait for the selection owner to answer one step of a read
+SELECTION_TIMEOUT = 2.0
+
+
+class ClipboardWatcherUnavailable(RuntimeError):
+    """Raised when a watcher backend can't be used on this system."""
+
+
+class ClipboardReaderUnavailable(RuntimeError):
+    """Raised when the X selection can't be read directly on this system."""
+
+
+class CallStats:
+    """Running latency numbers for one kind of clipboard call."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.calls += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        mean = self.total / self.calls if self.calls else 0.0
+        return {
+            "calls": self.calls,
+            "mean_ms": mean * 1000.0,
+            "last_ms": self.last * 1000.0,
+            "max_ms": self.max * 1000.0,
+        }
+
+
+class ClipboardBackend:
+    """pyperclip-style paste()/copy() that records how long each call takes."""
+
+    name = "base"
+    # Whether paste()/copy() may be called from threads other than the one that made it
+    thread_safe = True
+    # Same, for paste() alone
+    thread_safe_reads = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.paste_stats = CallStats()
+        self.copy_stats = CallStats()
+
+    def paste(self) -> str:
+        start = time.perf_counter()
+        try:
+            return self._paste()
+        finally:
+            self.paste_stats.add(time.perf_counter() - start)
+
+    def copy(self, text: str) -> None:
+        start = time.perf_counter()
+        try:
+            self._copy(text)
+        finally:
+            self.copy_stats.add(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {"paste": self.paste_stats.as_dict(), "copy": self.copy_stats.as_dict()}
+
+    def close(self) -> None:
+        pass
+
+    def _paste(self) -> str:
+        raise NotImplementedError
+
+    def _copy(self, text: str) -> None:
+        raise NotImplementedError
+
+
+class PyperclipBackend(ClipboardBackend):
+    """Plain pyperclip. On Linux this starts xclip/xsel for every call."""
+
+    name = "pyperclip"
+
+    def _paste(self) -> str:
+        return pyperclip.paste()
+
+    def _copy(self, text: str) -> None:
+        pyperclip.copy(text)
+
+
+class XSelectionReader:
+    """Reads the X clipboard as text over a display connection of its own.
+
+    Unlike Tk's connection it isn't tied to a thread, so a worker can sit
+    through a slow selection owner or a long INCR transfer without holding
+    up the window. One read at a time; read() raises TimeoutError when the
+    owner stops answering.
+    """
+
+    def __init__(self, selection: str = "CLIPBOARD", timeout: float = SELECTION_TIMEOUT) -> None:
+        if xdisplay is None:
+            raise ClipboardReaderUnavailable("python-xlib is not installed")
+        try:
+            self._display = xdisplay.Display()
+        except Exception as e:
+            raise ClipboardReaderUnavailable(f"Could not open X display: {e}") from e
+        self.timeout = timeout
+        self._window = self._display.screen().root.create_window(
+            0, 0, 1, 1, 0, X.CopyFromParent, event_mask=X.PropertyChangeMask
+        )
+        atom = self._display.get_atom
+        self._selection = atom(selection)
+        self._targets = ((atom("UTF8_STRING"), "utf-8"), (atom("STRING"), "latin-1"))
+        self._incr = atom("INCR")
+        self._property = atom("PASTEPRIME_SELECTION")
+        self._lock = threading.Lock()
+
+    def read(self) -> str:
+        with self._lock:
+            for target, encoding in self._targets:
+                data = self._convert(target)
+                if data is not None:
+                    return data.decode(encoding, errors="replace")
+            # Empty clipboard or no text target, same as pyperclip
+            return ""
+
+    def close(self) -> None:
+        with self._lock:
+            self._display.close()
+
+    def _convert(self, target: int) -> Optional[bytes]:
+        # Anything still queued is from a read that timed out
+        while self._display.pending_events():
+            self._display.next_event()
+        self._window.convert_selection(self._selection, target, self._property, X.CurrentTime)
+        self._display.flush()
+        deadline = time.monotonic() + self.timeout
+        event = self._wait(deadline, lambda e: e.type == X.SelectionNotify)
+        if event.property == X.NONE:
+            return None
+        prop = self._window.get_full_property(self._property, X.AnyPropertyType)
+        self._window.delete_property(self._property)
+        self._display.flush()
+        if prop is None:
+            return None
+        if prop.property_type != self._incr:
+            return bytes(prop.value)
+        # Too big for one property: the owner sends it in pieces, each one
+        # after we delete the last, and an empty piece at the end
+        pieces = []
+        while True:
+            self._wait(
+                time.monotonic() + self.timeout,
+                lambda e: e.type == X.PropertyNotify and e.atom == self._property and e.state == X.PropertyNewValue,
+            )
+            prop = self._window.get_full_property(self._property, X.AnyPropertyType)
+            self._window.delete_property(self._property)
+            self._display.flush()
+            if prop is None or not prop.value:
+                return b"".join(pieces)
+            pieces.append(bytes(prop.value))
+
+    def _wait(self, deadline: float, wanted: Callable[[Any], bool]) -> Any:
+        fd = self._display.fileno()
+        while True:
+            while self._display.pending_events():
+                event = self._display.next_event()
+                if wanted(event):
+                    return event
+            left = deadline - time.monotonic()
+            if left <= 0:
+                raise TimeoutError(f"the clipboard owner didn't answer within {self.timeout:g} s")
+            select.select([fd], [], [], left)
+
+
+class TkClipboard(ClipboardBackend):
+    """Clipboard access through an existing Tk window's display connection.
+
+    No helper process per call; writes reuse the connection Tk already
+    holds open, and so do reads unless a reader (XSelectionReader) is given.
+    On X11 the selection is served by this process, so close() hands the
+    contents over to pyperclip (when available) to keep them on the
+    clipboard after the app exits.
+
+    Like everything else Tk, it must only be used from the Tk thread, except
+    for paste() with a reader, which works from any thread.
+    """
+
+    name = "tk"
+    thread_safe = False
+
+    def __init__(self, widget, reader: Optional[XSelectionReader] = None) -> None:
+        super().__init__()
+        self._widget = widget
+        self._reader = reader
+        self.thread_safe_reads = reader is not None
+        self._owned: Optional[str] = None
+
+    def _paste(self) -> str:
+        if self._reader is not None:
+            return self._reader.read()
+        return self._tk_paste()
+
+    def _tk_paste(self) -> str:
+        try:
+            # UTF8_STRING avoids Latin-1 mojibake on X11
+            return self._widget.clipboard_get(type="UTF8_STRING")
+        except Exception:
+            pass
+        try:
+            return self._widget.clipboard_get()
+        except Exception:
+            # Empty clipboard or no text target, same as pyperclip
+            return ""
+
+    def _copy(self, text: str) -> None:
+        self._widget.clipboard_clear()
+        self._widget.clipboard_append(text)
+        self._owned = text
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+            self.thread_safe_reads = False
+        if self._owned is None or pyperclip is None:
+            return
+        try:
+            # Still ours? Then hand it to xclip/xsel so it outlives us
+            if self._tk_paste() == self._owned:
+                pyperclip.copy(self._owned)
+        except Exception:
+            pass
+        self._owned = None
+
+
+class ClipboardWatcher:
+    """Tells the app when the clipboard may have changed.
+
+    Event-driven watchers call the notify callback (from their own thread)
+    when the clipboard owner changes. The others are checked on the app's
+    poll timer through changed().
+    """
+
+    name = "poll"
+    event_driven = False
+
+    def __init__(self) -> None:
+        self._notify: Optional[Callable[[], None]] = None
+
+    def start(self, notify: Callable[[], None]) -> None:
+        self._notify = notify
+
+    def stop(self) -> None:
+        self._notify = None
+
+    def changed(self) -> bool:
+        """Whether the clipboard may have changed since the last call."""
+        return True
+
+    def _fire(self) -> None:
+        notify = self._notify
+        if notify is not None:
+            notify()
+
+
+class PollingWatcher(ClipboardWatcher):
+    """No change notifications available; every poll reads the clipboard."""
+
+
+class PollSchedule:
+    """How long to wait before the next clipboard poll.
+
+    Polls every floor seconds to begin with. Once nothing has changed for
+    idle_after seconds, each quiet poll stretches the interval by backoff, up
+    to ceiling. A change, or boost() (hotkey pressed, window focused), brings
+    it straight back to floor. floor == ceiling polls at a fixed rate.
+
+    polled() is called by whoever polls; boost() may come from any thread.
+    """
+
+    def __init__(
+        self,
+        floor: float = POLL_FLOOR,
+        ceiling: float = POLL_CEILING,
+        *,
+        backoff: float = 1.5,
+        idle_after: float = 20.0,
+    ) -> None:
+        if floor <= 0 or ceiling < floor:
+            raise ValueError("need 0 < floor <= ceiling")
+        self.floor = floor
+        self.ceiling = ceiling
+        self.backoff = backoff
+        self.idle_after = idle_after
+        self.interval = floor
+        self.polls = 0
+        self.changes = 0
+        self.boosts = 0
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._active_until = self._started + idle_after
+
+    def polled(self, changed: bool) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.polls += 1
+            if changed:
+                self.changes += 1
+                self._wake(now)
+            elif now >= self._active_until:
+                self.interval = min(self.ceiling, self.interval * self.backoff)
+
+    def boost(self) -> None:
+        """Something suggests a copy is coming; poll at full rate for a while."""
+        with self._lock:
+            self.boosts += 1
+            self._wake(time.monotonic())
+
+    @property
+    def skipped(self) -> int:
+        """Wakeups saved compared to polling at floor the whole time."""
+        elapsed = time.monotonic() - self._started
+        return max(0, int(elapsed / self.floor) - self.polls)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "interval_s": self.interval,
+            "rate_hz": 1.0 / self.interval,
+            "polls": self.polls,
+            "changes": self.changes,
+            "boosts": self.boosts,
+            "skipped": self.skipped,
+        }
+
+    def _wake(self, now: float) -> None:
+        self.interval = self.floor
+        self._active_until = now + self.idle_after
+
+
+class XFixesWatcher(ClipboardWatcher):
+    """Listens for X11 selection-owner changes through the XFixes extension.
+
+    Copying anything makes the copying app take ownership of CLIPBOARD, so
+    one event arrives per copy and nothing at all while idle.
+    """
+
+    name = "xfixes"
+    event_driven = True
+
+    def __init__(self, selections: tuple = ("CLIPBOARD",)) -> None:
+        super().__init__()
+        if xdisplay is None:
+            raise ClipboardWatcherUnavailable("python-xlib is not installed")
+        try:
+            self._display = xdisplay.Display()
+        except Exception as e:
+            raise ClipboardWatcherUnavailable(f"Could not open X display: {e}") from e
+        if not self._display.has_extension("XFIXES"):
+            self._display.close()
+            raise ClipboardWatcherUnavailable("X server has no XFIXES extension")
+        self._display.xfixes_query_version()
+        root = self._display.screen().root
+        mask = (
+            xfixes.XFixesSetSelectionOwnerNotifyMask
+            | xfixes.XFixesSelectionWindowDestroyNotifyMask
+            | xfixes.XFixesSelectionClientCloseNotifyMask
+        )
+        for name in selections:
+            self._display.xfixes_select_selection_input(root, self._display.get_atom(name), mask)
+        self._display.flush()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, notify: Callable[[], None]) -> None:
+        if self._wake_r < 0:
+            raise ClipboardWatcherUnavailable("XFixes watcher was already stopped")
+        super().start(notify)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="xfixes-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching for good: the display connection and wake pipe are closed."""
+        super().stop()
+        if self._thread is not None:
+            # Wake the select() so the thread can exit
+            os.write(self._wake_w, b"x")
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._wake_r >= 0:
+            self._display.close()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._wake_r = self._wake_w = -1
+
+    def _run(self) -> None:
+        fd = self._display.fileno()
+        while self._notify is not None:
+            try:
+                readable, _, _ = select.select([fd, self._wake_r], [], [])
+            except (OSError, ValueError):
+                return
+            if self._wake_r in readable:
+                return
+            fired = False
+            while self._display.pending_events():
+                event = self._display.next_event()
+                # Owner changes, owner window destroyed and owner client gone all
+                # share this event type, and each means the contents changed
+                if event.type == self._display.extension_event.SetSelectionOwnerNotify[0]:
+                    fired = True
+            # Several events in one burst need only one clipboard read
+            if fired:
+                self._fire()
+
+
+class FakeClipboard(ClipboardBackend, ClipboardWatcher):
+    """In-memory clipboard for tests and headless runs.
+
+    Both the backend and its watcher: notifies synchronously on every copy,
+    like an event-driven backend would.
+    """
+
+    name = "fake"
+    event_driven = True
+
+    def __init__(self, text: str = "") -> None:
+        super().__init__()
+        self.text = text
+        self.reads = 0
+        self.writes = 0
+
+    def _paste(self) -> str:
+        self.reads += 1
+        return self.text
+
+    def _copy(self, text: str) -> None:
+        self.writes += 1
+        self.text = text
+        self._fire()
+
+
+def create_watcher() -> ClipboardWatcher:
+    """Best watcher for this platform, falling back to plain polling."""
+    if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+        try:
+            return XFixesWatcher()
+        except ClipboardWatcherUnavailable:
+            pass
+    return PollingWatcher()
+
+
+def create_backend(widget=None) -> Optional[ClipboardBackend]:
+    """Best clipboard backend for this platform, or None if there is none.
+
+    On Linux a Tk widget's own display connection is preferred over pyperclip,
+    which would fork xclip/xsel on every call. With python-xlib, reads go
+    over a second connection instead, so they don't have to wait for Tk.
+    """
+    if widget is not None and sys.platform.startswith("linux"):
+        try:
+            reader: Optional[XSelectionReader] = XSelectionReader()
+        except ClipboardReaderUnavailable:
+            reader = None
+        return TkClipboard(widget, reader)
+    if pyperclip is not None:
+        return PyperclipBackend()
+    return None
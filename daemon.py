@@ -0,0 +1,820 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+import heapq
+import importlib
+import importlib.util
+import itertools
+import json
+import os
+import selectors
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+import diagnostics
+from cleaner import CHAT_MESSAGE_LIMIT, CleanCache
+from clipboard import POLL_CEILING, POLL_FLOOR, ClipboardBackend, ClipboardWatcher, PollSchedule, create_backend, create_watcher
+from pipeline import LARGE_PAYLOAD_CHARS, LARGE_POLICIES, ClipboardPipeline, LoopChannel, PipelineResult
+from items import ItemFile
+from rules import RuleFile
+from typing_engine import KeyBackend, KeystrokePlan, PlanBuilder, PyAutoGuiBackend, TypingEngine
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+RULES_CHECK_INTERVAL = 2.0
+# Longest wait after the hotkey for its keys to be released before typing anyway
+HOTKEY_MAX_DELAY = 0.5
+# A request line bigger than this is refused and the connection closed
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# Longest "delay" a type request may ask for, in seconds
+MAX_TYPE_DELAY = 60.0
+# Longest a "clean" request waits for the pipeline to clean the clipboard
+CLEAN_NOW_TIMEOUT = 30.0
+
+COMMANDS = ("clean", "type", "cancel", "pause", "resume", "stats", "stop")
+
+
+class DaemonError(RuntimeError):
+    """The daemon couldn't start, or a control request failed."""
+
+
+def default_socket_path() -> str:
+    """Where the control socket lives (PASTEPRIME_SOCKET overrides it)."""
+    override = os.environ.get("PASTEPRIME_SOCKET")
+    if override:
+        return override
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return os.path.join(runtime, "pasteprime.sock")
+    uid = os.getuid() if hasattr(os, "getuid") else os.getpid()
+    return os.path.join(tempfile.gettempdir(), f"pasteprime-{uid}.sock")
+
+
+class HeadlessCleaner:
+    """The app's clipboard loop and hotkey without a window.
+
+    The same ClipboardPipeline as ClipboardCleanerApp reads, cleans and
+    writes back the clipboard on its worker thread. Its results, like
+    watcher, hotkey and typing callbacks, are handed to a selector loop on
+    the calling thread through call_soon(), the way the app marshals them
+    with after(0, ...). Options set after construction take effect through
+    _sync_options().
+
+    Control requests are one JSON object per line on a Unix socket, answered
+    with one JSON object per line:
+
+        {"cmd": "clean", "text": "..."}   -> {"ok": true, "text": "<cleaned>"}
+        {"cmd": "clean"}                  -> cleans the clipboard now
+        {"cmd": "type", "text": "..."}    -> types text (default: the clipboard)
+        {"cmd": "cancel" | "pause" | "resume" | "stats" | "stop"}
+    """
+
+    def __init__(
+        self,
+        *,
+        clipboard: Optional[ClipboardBackend] = None,
+        watcher: Optional[ClipboardWatcher] = None,
+        key_backend: Optional[KeyBackend] = None,
+        ascii_only: bool = False,
+        auto_clean: bool = True,
+        hotkey: Optional[str] = "ctrl+alt+v",
+        hotkey_max_delay: float = HOTKEY_MAX_DELAY,
+        large_above: int = LARGE_PAYLOAD_CHARS,
+        large_policy: str = "defer",
+        keys_per_second: float = 200.0,
+        chat_limit: int = CHAT_MESSAGE_LIMIT,
+        message_delay: float = 0.6,
+        poll_floor: float = POLL_FLOOR,
+        poll_ceiling: float = POLL_CEILING,
+        verbose: bool = True,
+    ) -> None:
+        self._clipboard = clipboard if clipboard is not None else create_backend()
+        if watcher is None:
+            watcher = clipboard if isinstance(clipboard, ClipboardWatcher) else create_watcher()
+        self._watcher = watcher
+        self.ascii_only = ascii_only
+        self.auto_clean = auto_clean
+        self.hotkey = hotkey
+        self.hotkey_max_delay = hotkey_max_delay
+        if large_policy not in LARGE_POLICIES:
+            raise ValueError(f"large_policy must be one of {', '.join(LARGE_POLICIES)}")
+        # Copies longer than large_above: "defer" cleans them once the pipeline
+        # is otherwise idle, "skip" leaves them for a "clean" request
+        self.large_above = large_above
+        self.large_policy = large_policy
+        self.chat_limit = chat_limit
+        self.message_delay = message_delay
+        self.verbose = verbose
+        self.cancel_hotkey = "esc"
+
+        self.paused = False
+        # Cleaned form of the clipboard; what the hotkey types
+        self.current = ""
+        self.status = "Starting"
+        self.counters = {"seen": 0, "cleaned": 0, "already_clean": 0, "deferred": 0, "skipped": 0, "requests": 0, "typed": 0}
+        self._clean_cache = CleanCache()
+        self._rules_file = RuleFile()
+        self._rules_file.reload_if_changed()
+        self._item_file = ItemFile()
+        self._item_file.reload_if_changed()
+
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._pending: Deque[Callable[[], None]] = deque()
+        self._channel = LoopChannel(self.call_soon, lambda e: self._set_status(f"Error: {e!r}"))
+        # Replies owed to "clean" requests, sent with the pipeline's manual result
+        self._clean_waiters: List[Callable[[Dict[str, Any]], None]] = []
+        self._pipeline = ClipboardPipeline(
+            self._clipboard,
+            self._clean_cache,
+            self._publish_result,
+            call_on_ui=self._channel.call,
+            # Without change notifications the worker polls, less often while nothing happens
+            poll=None if self._clipboard is None or watcher.event_driven else PollSchedule(poll_floor, poll_ceiling),
+        )
+        # Nothing is read until serve() starts watching
+        self._pipeline.enabled = False
+        self._sync_options()
+
+        if key_backend is None and importlib.util.find_spec("pyautogui") is not None:
+            key_backend = PyAutoGuiBackend()
+        self._typing: Optional[TypingEngine] = None
+        if key_backend is not None:
+            self._typing = TypingEngine(
+                key_backend,
+                keys_per_second=keys_per_second,
+                on_done=lambda *args: self.call_soon(lambda: self._on_typing_done(*args)),
+            )
+        # Keystrokes for the current text are worked out ahead of the hotkey
+        self._planner: Optional[PlanBuilder] = None
+        if self._typing is not None:
+            self._planner = PlanBuilder(self._typing)
+        self._hotkey_id = None
+        self._cancel_hotkey_id = None
+
+        self._started = time.time()
+        self._timers: List[Tuple[float, int, Callable[[], None]]] = []
+        self._timer_ids = itertools.count()
+        self._listener: Optional[socket.socket] = None
+        self._socket_path: Optional[str] = None
+        self._buffers: Dict[socket.socket, bytearray] = {}
+        # Connections waiting for a reply that comes later (see handle)
+        self._owed: Set[socket.socket] = set()
+        self._running = False
+
+    # Loop plumbing
+
+    def call_soon(self, fn: Callable[[], None]) -> None:
+        """Run fn on the loop thread. Safe to call from any thread or signal handler."""
+        # deque.append is atomic; a lock here could deadlock a signal handler
+        self._pending.append(fn)
+        try:
+            self._wake_w.send(b"x")
+        except (BlockingIOError, OSError):
+            # Wake buffer full means a wake-up is already on its way
+            pass
+
+    def call_later(self, delay: float, fn: Callable[[], None]) -> None:
+        """Run fn on the loop thread after delay seconds. Loop thread only."""
+        heapq.heappush(self._timers, (time.monotonic() + delay, next(self._timer_ids), fn))
+
+    def serve(self, socket_path: Optional[str] = None, *, control: bool = True) -> None:
+        """Run until stop() or a "stop" request. control=False skips the socket."""
+        try:
+            if control:
+                self._listen(socket_path or default_socket_path())
+            self._selector.register(self._wake_r, selectors.EVENT_READ, "wake")
+            self._running = True
+            self._start_watching()
+            self._register_hotkey()
+            self.call_later(RULES_CHECK_INTERVAL, self._check_rules_file)
+            while self._running:
+                timeout = None
+                if self._timers:
+                    timeout = max(0.0, self._timers[0][0] - time.monotonic())
+                for key, _events in self._selector.select(timeout):
+                    if key.data == "wake":
+                        self._drain_wake()
+                    elif key.data == "listener":
+                        self._accept()
+                    else:
+                        self._read_request(key.fileobj)
+                now = time.monotonic()
+                while self._timers and self._timers[0][0] <= now:
+                    _, _, fn = heapq.heappop(self._timers)
+                    self._run_callback(fn)
+                for _ in range(len(self._pending)):
+                    self._run_callback(self._pending.popleft())
+        finally:
+            self._shutdown()
+
+    def stop(self) -> None:
+        """Ask the loop to exit. Safe to call from any thread or signal handler."""
+        self.call_soon(self._stop_now)
+
+    def _stop_now(self) -> None:
+        self._running = False
+
+    def _run_callback(self, fn: Callable[[], None]) -> None:
+        try:
+            fn()
+        except Exception as e:
+            # One bad callback shouldn't take the daemon down
+            self._set_status(f"Error: {e!r}")
+
+    def _drain_wake(self) -> None:
+        try:
+            while self._wake_r.recv(4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+
+    # Clipboard pipeline
+
+    def _start_watching(self) -> None:
+        if self._clipboard is None:
+            self._set_status("No clipboard backend (pip install pyperclip); only socket cleaning works")
+            return
+        self._pipeline.enabled = not self.paused
+        if self._watcher.event_driven:
+            self._watcher.start(self._pipeline.check)
+        # Nothing will fire for what's already on the clipboard
+        self._pipeline.check()
+        self._set_status(f"Watching clipboard ({self._clipboard.name}, watcher: {self._watcher.name})")
+
+    def _sync_options(self) -> None:
+        # The worker reads these plain attributes once per job
+        pipeline = self._pipeline
+        pipeline.auto_clean = self.auto_clean
+        pipeline.ascii_only = self.ascii_only
+        pipeline.rules = self._rules_file.rules
+        pipeline.items = self._item_file.items
+        pipeline.large_above = self.large_above
+        pipeline.large_policy = self.large_policy
+
+    def _publish_result(self, result: PipelineResult) -> None:
+        # Worker thread
+        self._channel.post(lambda: self._on_pipeline_result(result))
+
+    def _on_pipeline_result(self, result: PipelineResult) -> None:
+        """Count and log what the pipeline did, and answer "clean" requests. Runs on the loop thread."""
+        if result.kind == "manual":
+            self._answer_clean_requests(result)
+        if result.kind == "check":
+            self.counters["seen"] += 1
+        if result.deferred:
+            if self.large_policy == "skip":
+                self.counters["skipped"] += 1
+                self._set_status(f"Large clipboard ({result.deferred:,} chars) not cleaned; send a clean request to clean it")
+            else:
+                self.counters["deferred"] += 1
+                self._set_status(f"Large clipboard ({result.deferred:,} chars): cleaning in background")
+            return
+        if result.original is None:
+            return
+        self._set_current(result.cleaned)
+        if result.wrote:
+            self.counters["cleaned"] += 1
+        if result.kind == "manual":
+            # clean_now's caller reports this one
+            return
+        prefix = "Large clipboard" if result.kind == "deferred" else "Clipboard"
+        if result.wrote:
+            self._set_status(f"{prefix} cleaned")
+        elif result.cleaned == result.original:
+            self.counters["already_clean"] += 1
+            self._set_status(f"{prefix} already clean")
+        else:
+            self._set_status(f"{prefix} changed (auto-clean off)")
+
+    def clean_now(self, on_done: Callable[[Dict[str, Any]], None], timeout: float = CLEAN_NOW_TIMEOUT) -> None:
+        """Clean the clipboard regardless of auto-clean. Loop thread only.
+
+        The pipeline does the work; on_done then gets the reply on the loop
+        thread: {"ok": true, "text": <cleaned>, "changed": <bool>}, or an
+        error, also after timeout seconds without a result.
+        """
+        if self._clipboard is None:
+            raise DaemonError("no clipboard backend")
+        if self.paused:
+            raise DaemonError("paused; send resume first")
+        self._clean_waiters.append(on_done)
+        self._pipeline.clean_now()
+
+        def give_up() -> None:
+            if on_done in self._clean_waiters:
+                self._clean_waiters.remove(on_done)
+                on_done({"ok": False, "error": "timed out waiting for the clipboard"})
+
+        self.call_later(timeout, give_up)
+
+    def _answer_clean_requests(self, result: PipelineResult) -> None:
+        # Requests coalesce into one manual clean, so one result answers them all
+        if result.error is not None:
+            reply: Dict[str, Any] = {"ok": False, "error": result.error}
+        elif not result.original:
+            reply = {"ok": True, "text": "", "changed": False}
+        else:
+            reply = {"ok": True, "text": result.cleaned, "changed": result.cleaned != result.original}
+        waiters, self._clean_waiters = self._clean_waiters, []
+        for on_done in waiters:
+            on_done(reply)
+
+    def _set_current(self, cleaned: str) -> None:
+        self.current = cleaned
+        if self._planner is not None:
+            self._planner.request(cleaned, self.chat_limit)
+
+    def _clean(self, text: str, ascii_only: Optional[bool] = None) -> str:
+        # Text sent with a request; the clipboard goes through the pipeline
+        if ascii_only is None:
+            ascii_only = self.ascii_only
+        cleaned = self._clean_cache.clean(text, ascii_only=ascii_only, rules=self._rules_file.rules)
+        if self._item_file.items is not None:
+            with diagnostics.span("clean.items"):
+                cleaned = self._item_file.items.canonicalize(cleaned, ascii_only=ascii_only)
+        return cleaned
+
+    def _check_rules_file(self) -> None:
+        try:
+            if self._rules_file.reload_if_changed():
+                if self._rules_file.error:
+                    self._set_status(f"Rules file error: {self._rules_file.error}")
+                else:
+                    rules = self._rules_file.rules
+                    self._set_status(f"Rules reloaded ({len(rules) if rules else 0} rules)")
+                    self._clean_cache.clear()
+            if self._item_file.reload_if_changed():
+                if self._item_file.error:
+                    self._set_status(f"Item names file error: {self._item_file.error}")
+                else:
+                    items = self._item_file.items
+                    self._set_status(f"Item names reloaded ({len(items) if items else 0} names)")
+            self._sync_options()
+        finally:
+            self.call_later(RULES_CHECK_INTERVAL, self._check_rules_file)
+
+    # Typing and hotkeys
+
+    def type_text(
+        self,
+        text: Optional[str] = None,
+        *,
+        delay: float = 0.0,
+        wait_for: Optional[Callable[[], bool]] = None,
+        requested_at: Optional[float] = None,
+    ) -> KeystrokePlan:
+        """Type text (already cleaned) or the current clipboard. Returns what is being typed.
+
+        Typing starts after delay seconds, or sooner once wait_for() is True.
+        Characters the key backend can't produce are skipped and listed in
+        the plan's untypeable.
+        """
+        if self._typing is None:
+            raise DaemonError("pyautogui is not installed")
+        if text is None:
+            text = self.current
+        if not text:
+            raise DaemonError("nothing to type")
+        if self._typing.busy:
+            raise DaemonError("already typing")
+        assert self._planner is not None
+        plan = self._planner.get(text, self.chat_limit)
+        if not plan.total:
+            raise DaemonError("nothing typeable; can't type: " + " ".join(plan.untypeable))
+        started = self._typing.play(
+            plan,
+            message_delay=self.message_delay,
+            submit_last=False,
+            requested_at=requested_at,
+            wait_for=wait_for,
+            max_wait=delay,
+        )
+        if not started:
+            raise DaemonError("already typing")
+        self._register_cancel_hotkey()
+        skipped = f", skipping {' '.join(plan.untypeable)}" if plan.untypeable else ""
+        self._set_status(f"Typing {plan.total} chars ({self.cancel_hotkey} to cancel{skipped})")
+        return plan
+
+    def _on_typing_done(self, typed: int, total: int, rate: float, cancelled: bool, error: Optional[Exception]) -> None:
+        self._remove_cancel_hotkey()
+        if error is not None:
+            self._set_status(f"Typing failed: {error}")
+        elif cancelled:
+            self._set_status(f"Typing cancelled after {typed}/{total} chars")
+        else:
+            self.counters["typed"] += 1
+            self._set_status(f"Typed {total} chars at {rate:.0f} keys/s")
+
+    def _on_hotkey_triggered(self) -> None:
+        # Called from a keyboard thread
+        requested_at = time.perf_counter()
+        # A paste is coming; get the clipboard's latest contents cleaned
+        self._pipeline.boost()
+
+        def trigger() -> None:
+            if self.paused:
+                return
+            try:
+                self.type_text(delay=self.hotkey_max_delay, wait_for=self._hotkey_released(), requested_at=requested_at)
+            except DaemonError as e:
+                self._set_status(f"Hotkey: {e}")
+
+        self.call_soon(trigger)
+
+    def _hotkey_released(self) -> Optional[Callable[[], bool]]:
+        keyboard = _keyboard()
+        keys = [part.strip() for part in (self.hotkey or "").split("+") if part.strip()]
+        if keyboard is None or not keys:
+            return None
+        # Typing while Ctrl/Alt are still down would send shortcuts instead of text
+        return lambda: not any(keyboard.is_pressed(key) for key in keys)
+
+    def _register_hotkey(self) -> None:
+        if not self.hotkey:
+            return
+        keyboard = _keyboard()
+        if keyboard is None:
+            self._set_status("keyboard is not installed; global hotkey unavailable")
+            return
+        try:
+            self._hotkey_id = keyboard.add_hotkey(self.hotkey, self._on_hotkey_triggered)
+            self._set_status(f"Global hotkey active: {self.hotkey}")
+        except Exception as e:
+            self._set_status(f"Could not register hotkey: {e}")
+
+    def _register_cancel_hotkey(self) -> None:
+        keyboard = _keyboard()
+        if keyboard is None or self._typing is None:
+            return
+        try:
+            self._cancel_hotkey_id = keyboard.add_hotkey(self.cancel_hotkey, self._typing.cancel)
+        except Exception:
+            self._cancel_hotkey_id = None
+
+    def _remove_cancel_hotkey(self) -> None:
+        self._cancel_hotkey_id = _remove_hotkey(self._cancel_hotkey_id)
+
+    # Control socket
+
+    def _listen(self, path: str) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonError("this platform has no Unix sockets; run with --no-socket")
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                # Left behind by a daemon that didn't exit cleanly
+                os.unlink(path)
+            else:
+                raise DaemonError(f"another daemon is already listening on {path}")
+            finally:
+                probe.close()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o077)
+        try:
+            # Only this user may connect
+            listener.bind(path)
+        finally:
+            os.umask(old_umask)
+        listener.listen(8)
+        listener.setblocking(False)
+        self._selector.register(listener, selectors.EVENT_READ, "listener")
+        self._listener = listener
+        self._socket_path = path
+        self._set_status(f"Control socket: {path}")
+
+    def _accept(self) -> None:
+        try:
+            conn, _ = self._listener.accept()
+        except (BlockingIOError, OSError):
+            return
+        # Reads only happen when select says so; the timeout bounds replies to slow readers
+        conn.settimeout(5.0)
+        self._buffers[conn] = bytearray()
+        self._selector.register(conn, selectors.EVENT_READ, "client")
+
+    def _read_request(self, conn: socket.socket) -> None:
+        buf = self._buffers[conn]
+        try:
+            data = conn.recv(65536)
+        except OSError:
+            data = b""
+        if not data:
+            self._close(conn)
+            return
+        start = len(buf)
+        buf += data
+        self._process_requests(conn, start)
+
+    def _process_requests(self, conn: socket.socket, start: int = 0) -> None:
+        buf = self._buffers.get(conn)
+        # Replies go out in request order, so nothing more is read while one is owed
+        while buf is not None and conn not in self._owed:
+            end = buf.find(b"\n", start)
+            if end < 0:
+                break
+            line = bytes(buf[:end])
+            del buf[:end + 1]
+            start = 0
+            if not line.strip():
+                continue
+            response = self._dispatch(line, lambda response: self._reply_later(conn, response))
+            if response is None:
+                self._owed.add(conn)
+            elif not self._reply(conn, response):
+                return
+        if buf is not None and len(buf) > MAX_REQUEST_BYTES:
+            self._reply(conn, {"ok": False, "error": "request too large"})
+            self._close(conn)
+
+    def _reply_later(self, conn: socket.socket, response: Dict[str, Any]) -> None:
+        self._owed.discard(conn)
+        if conn in self._buffers and self._reply(conn, response):
+            # Carry on with whatever was sent after that request
+            self._process_requests(conn)
+
+    def _dispatch(self, line: bytes, reply: Callable[[Dict[str, Any]], None]) -> Optional[Dict[str, Any]]:
+        self.counters["requests"] += 1
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            with diagnostics.span("daemon.request"):
+                return self.handle(request, reply)
+        except (ValueError, DaemonError) as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            # A bug answering one request mustn't take the daemon down with it
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def handle(
+        self, request: Dict[str, Any], reply: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Answer one control request (see the class docstring).
+
+        Returns the reply, or None when it goes to reply() later: cleaning
+        the clipboard waits for the pipeline without holding up the loop.
+        """
+        cmd = request.get("cmd")
+        text = request.get("text")
+        if text is not None and not isinstance(text, str):
+            raise DaemonError("text must be a string")
+        ascii_only = request.get("ascii_only")
+        if ascii_only is not None and not isinstance(ascii_only, bool):
+            raise DaemonError("ascii_only must be true or false")
+        delay = request.get("delay", 0.0)
+        if isinstance(delay, bool) or not isinstance(delay, (int, float)) or not 0 <= delay <= MAX_TYPE_DELAY:
+            raise DaemonError(f"delay must be a number of seconds from 0 to {MAX_TYPE_DELAY:g}")
+        if cmd == "clean":
+            if text is not None:
+                return {"ok": True, "text": self._clean(text, ascii_only)}
+            if reply is None:
+                raise DaemonError("cleaning the clipboard needs somewhere to send the reply")
+            self.clean_now(reply)
+            return None
+        if cmd == "type":
+            if text is not None:
+                text = self._clean(text)
+            plan = self.type_text(text, delay=float(delay))
+            return {"ok": True, "messages": len(plan), "untypeable": plan.untypeable}
+        if cmd == "cancel":
+            if self._typing is not None:
+                self._typing.cancel()
+            return {"ok": True}
+        if cmd == "pause":
+            self.paused = True
+            self._pipeline.enabled = False
+            self._set_status("Paused")
+            return {"ok": True}
+        if cmd == "resume":
+            self.paused = False
+            self._pipeline.enabled = self._clipboard is not None
+            self._set_status("Resumed")
+            # Pick up whatever was copied while paused
+            self._pipeline.check()
+            return {"ok": True}
+        if cmd == "stats":
+            return {"ok": True, "stats": self.stats()}
+        if cmd == "stop":
+            self.call_soon(self._stop_now)
+            return {"ok": True}
+        raise DaemonError(f"unknown command {cmd!r}; expected one of {', '.join(COMMANDS)}")
+
+    def _reply(self, conn: socket.socket, response: Dict[str, Any]) -> bool:
+        try:
+            conn.sendall(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+            return True
+        except OSError:
+            self._close(conn)
+            return False
+
+    def _close(self, conn: socket.socket) -> None:
+        self._owed.discard(conn)
+        if self._buffers.pop(conn, None) is not None:
+            self._selector.unregister(conn)
+        conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "status": self.status,
+            "paused": self.paused,
+            "uptime_s": round(time.time() - self._started, 1),
+            "counters": dict(self.counters),
+            "cache": self._clean_cache.stats(),
+            "typing": self._typing is not None and self._typing.busy,
+        }
+        if self._clipboard is not None:
+            out["clipboard"] = {"backend": self._clipboard.name, "watcher": self._watcher.name, **self._clipboard.stats()}
+            if self._pipeline.poll is not None:
+                out["poll"] = self._pipeline.poll.stats()
+        if resource is not None:
+            # Kilobytes on Linux, bytes on macOS
+            out["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if diagnostics.recorder is not None:
+            out["timings"] = diagnostics.recorder.summary()
+        return out
+
+    def _set_status(self, message: str) -> None:
+        self.status = message
+        if self.verbose:
+            print(f"[{time.strftime('%H:%M:%S')}] {message}", file=sys.stderr, flush=True)
+
+    def _shutdown(self) -> None:
+        if self._typing is not None:
+            self._typing.cancel()
+        self._hotkey_id = _remove_hotkey(self._hotkey_id)
+        self._remove_cancel_hotkey()
+        try:
+            self._watcher.stop()
+        except Exception:
+            pass
+        self._pipeline.stop()
+        self._channel.close()
+        if self._clipboard is not None:
+            self._clipboard.close()
+        for conn in list(self._buffers):
+            self._close(conn)
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+            try:
+                os.unlink(self._socket_path)
+            except OSError:
+                pass
+        self._selector.close()
+        self._wake_r.close()
+        self._wake_w.close()
+
+
+def _keyboard():
+    try:
+        return importlib.import_module("keyboard")
+    except ImportError:
+        return None
+
+
+def _remove_hotkey(hotkey_id) -> None:
+    keyboard = _keyboard()
+    try:
+        if hotkey_id is not None and keyboard is not None:
+            keyboard.remove_hotkey(hotkey_id)
+    except Exception:
+        pass
+    return None
+
+
+def send_command(cmd: str, *, socket_path: Optional[str] = None, timeout: float = 10.0, **fields: Any) -> Dict[str, Any]:
+    """Send one request to a running daemon and return its reply."""
+    request = {"cmd": cmd, **fields}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(timeout)
+        try:
+            conn.connect(socket_path or default_socket_path())
+        except OSError as e:
+            raise DaemonError(f"no daemon listening ({e})") from e
+        conn.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        reply = bytearray()
+        while not reply.endswith(b"\n"):
+            data = conn.recv(65536)
+            if not data:
+                raise DaemonError("daemon closed the connection")
+            reply += data
+    return json.loads(reply)
+
+
+# Command line: python -m daemon (or python main.py --headless)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m daemon",
+        description="Clean the clipboard without the window, controlled over a local socket.",
+    )
+    parser.add_argument("--socket", help=f"control socket path (default: {default_socket_path()})")
+    parser.add_argument("--no-socket", action="store_true", help="don't listen for control requests")
+    parser.add_argument("--ascii-only", action="store_true", help="transliterate to ASCII")
+    parser.add_argument("--no-auto-clean", action="store_true", help="only clean on request")
+    parser.add_argument("--hotkey", default="ctrl+alt+v", help="global hotkey that types the cleaned clipboard ('' for none)")
+    parser.add_argument("--rate", type=float, default=200.0, help="typing speed in keys/s")
+    parser.add_argument(
+        "--large-above",
+        type=int,
+        default=LARGE_PAYLOAD_CHARS,
+        help="copies longer than this many chars follow --large-policy (0: no limit)",
+    )
+    parser.add_argument(
+        "--large-policy",
+        choices=LARGE_POLICIES,
+        default="defer",
+        help="clean large copies in the background, skip them, or clean them right away",
+    )
+    parser.add_argument(
+        "--hotkey-delay",
+        type=int,
+        default=int(HOTKEY_MAX_DELAY * 1000),
+        help="longest wait in ms for the hotkey to be released before typing",
+    )
+    parser.add_argument("--poll-floor", type=float, default=POLL_FLOOR, help="shortest poll interval in seconds")
+    parser.add_argument(
+        "--poll-ceiling",
+        type=float,
+        default=POLL_CEILING,
+        help="longest poll interval in seconds, reached while the clipboard is idle",
+    )
+    parser.add_argument("--timings", action="store_true", help="record timings for the stats command")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't log status changes")
+    parser.add_argument("--send", metavar="CMD", choices=COMMANDS, help="send CMD to a running daemon and print the reply")
+    parser.add_argument("--text", help="text for --send clean/type ('-' reads stdin)")
+    args = parser.parse_args(argv)
+    if not 0 < args.poll_floor <= args.poll_ceiling:
+        parser.error("need 0 < --poll-floor <= --poll-ceiling")
+
+    if args.send:
+        fields: Dict[str, Any] = {}
+        if args.text is not None:
+            fields["text"] = sys.stdin.read() if args.text == "-" else args.text
+        try:
+            reply = send_command(args.send, socket_path=args.socket, **fields)
+        except DaemonError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 1
+        if reply.get("ok") and args.send == "clean":
+            print(reply["text"])
+        else:
+            print(json.dumps(reply, indent=2, ensure_ascii=False))
+        return 0 if reply.get("ok") else 1
+
+    if args.timings:
+        diagnostics.enable()
+    daemon = HeadlessCleaner(
+        ascii_only=args.ascii_only,
+        auto_clean=not args.no_auto_clean,
+        hotkey=args.hotkey or None,
+        hotkey_max_delay=max(0, args.hotkey_delay) / 1000.0,
+        large_above=max(0, args.large_above),
+        large_policy=args.large_policy,
+        poll_floor=args.poll_floor,
+        poll_ceiling=args.poll_ceiling,
+        keys_per_second=args.rate,
+        verbose=not args.quiet,
+    )
+    for signum in (getattr(signal, "SIGTERM", None), getattr(signal, "SIGHUP", None)):
+        if signum is not None:
+            signal.signal(signum, lambda *_: daemon.stop())
+    try:
+        daemon.serve(args.socket, control=not args.no_socket)
+    except DaemonError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
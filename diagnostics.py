@@ -0,0 +1,114 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+import json
+import threading
+import time
+
+
+class Recorder:
+    """Rolling window of timing samples per metric, e.g. "clean.nfkc"."""
+
+    def __init__(self, *, window: int = 1000) -> None:
+        self.window = window
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        # Timers fire from the Tk, watcher and typing threads
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append((time.time(), seconds))
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """count and p50/p95/p99 (ms) for every metric in the current window."""
+        with self._lock:
+            snapshot = {name: [s for _ts, s in samples] for name, samples in self._samples.items()}
+        result = {}
+        for name, values in sorted(snapshot.items()):
+            values.sort()
+            result[name] = {
+                "count": len(values),
+                "p50_ms": _percentile(values, 0.50) * 1000.0,
+                "p95_ms": _percentile(values, 0.95) * 1000.0,
+                "p99_ms": _percentile(values, 0.99) * 1000.0,
+            }
+        return result
+
+    def export_jsonl(self, path: str) -> int:
+        """Write every sample as one JSON object per line. Returns the line count."""
+        with self._lock:
+            rows: List[Tuple[float, str, float]] = [
+                (ts, name, seconds) for name, samples in self._samples.items() for ts, seconds in samples
+            ]
+        rows.sort()
+        with open(path, "w", encoding="utf-8") as f:
+            for ts, name, seconds in rows:
+                f.write(json.dumps({"ts": ts, "metric": name, "ms": seconds * 1000.0}) + "\n")
+        return len(rows)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+# The active recorder, or None when instrumentation is off (the default).
+# Hot paths check this once and skip all timing work when it's None.
+recorder: Optional[Recorder] = None
+
+_NULL_SPAN = nullcontext()
+
+
+def enable(*, window: int = 1000) -> Recorder:
+    global recorder
+    if recorder is None:
+        recorder = Recorder(window=window)
+    return recorder
+
+
+def disable() -> None:
+    global recorder
+    recorder = None
+
+
+def span(name: str):
+    """Time a block when instrumentation is on; a shared no-op otherwise."""
+    active = recorder
+    if active is None:
+        return _NULL_SPAN
+    return active.span(name)
+
+
+def record(name: str, seconds: float) -> None:
+    active = recorder
+    if active is not None:
+        active.add(name, seconds)
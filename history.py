@@ -0,0 +1,219 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Set
+import itertools
+import threading
+import time
+import zlib
+
+from cleaner import text_digest
+
+
+# Entries longer than this (in UTF-8 bytes) are kept zlib-compressed
+COMPRESS_ABOVE = 1024
+# Only the start of each entry is indexed; trade messages are far shorter
+INDEX_MAX_CHARS = 4096
+# Rough cost of one trigram posting, so the index counts against the memory cap
+POSTING_BYTES = 16
+PREVIEW_CHARS = 80
+# Longer copies aren't remembered; same default as pipeline.LARGE_PAYLOAD_CHARS
+MAX_TEXT_CHARS = 1_000_000
+
+
+class HistoryEntry:
+    """One remembered clipboard text, stored as (maybe compressed) UTF-8."""
+
+    __slots__ = ("id", "digest", "data", "compressed", "length", "preview", "grams", "copied_at", "times_copied", "recency")
+
+    def __init__(self, entry_id: int, digest: bytes, text: str, compress_above: int) -> None:
+        raw = text.encode("utf-8", errors="surrogatepass")
+        self.id = entry_id
+        self.digest = digest
+        self.compressed = len(raw) > compress_above
+        self.data = zlib.compress(raw, 6) if self.compressed else raw
+        self.length = len(text)
+        self.preview = " ".join(text[:PREVIEW_CHARS * 2].split())[:PREVIEW_CHARS]
+        self.grams = _trigrams(_fold(text[:INDEX_MAX_CHARS]))
+        self.copied_at = time.time()
+        self.times_copied = 1
+        # Bigger is more recently copied; set by ClipboardHistory
+        self.recency = 0
+
+    @property
+    def text(self) -> str:
+        raw = zlib.decompress(self.data) if self.compressed else self.data
+        return raw.decode("utf-8", errors="surrogatepass")
+
+    @property
+    def size(self) -> int:
+        return len(self.data) + len(self.preview) + POSTING_BYTES * len(self.grams)
+
+
+class ClipboardHistory:
+    """Bounded, deduplicated clipboard history with a trigram search index.
+
+    Copying the same text again moves its entry to the front instead of adding
+    a new one. Once there are more than max_entries, or the stored text and
+    index take more than max_bytes, the least recently copied entries go.
+
+    search() looks up every trigram of the query in an inverted index and only
+    checks the entries that have all of them, so it stays fast with thousands
+    of entries. Matching is case-insensitive.
+
+    Texts over max_chars (0: no limit) aren't remembered. Safe to use from
+    several threads: the app adds from its clipboard worker, where
+    compressing a big copy doesn't hold up the window, and searches from Tk.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        max_bytes: int = 4 * 1024 * 1024,
+        *,
+        compress_above: int = COMPRESS_ABOVE,
+        max_chars: int = MAX_TEXT_CHARS,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.compress_above = compress_above
+        self.max_chars = max_chars
+        self._entries: "OrderedDict[bytes, HistoryEntry]" = OrderedDict()
+        self._by_id: Dict[int, HistoryEntry] = {}
+        self._index: Dict[str, Set[int]] = {}
+        self._ids = itertools.count(1)
+        self._recency = itertools.count(1)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        """Newest first."""
+        with self._lock:
+            return reversed(list(self._entries.values()))
+
+    def add(self, text: str) -> Optional[HistoryEntry]:
+        """Remember text (or bump it to the front if it's already here)."""
+        if not text or text.isspace() or 0 < self.max_chars < len(text):
+            return None
+        digest = text_digest(text)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._bump(entry)
+                return entry
+        # Compressing and indexing happen outside the lock, so a search isn't kept waiting
+        entry = HistoryEntry(next(self._ids), digest, text, self.compress_above)
+        if entry.size > self.max_bytes:
+            # Would push out everything else and still not fit
+            return None
+        with self._lock:
+            existing = self._entries.get(digest)
+            if existing is not None:
+                # Added by another thread meanwhile
+                self._bump(existing)
+                return existing
+            entry.recency = next(self._recency)
+            self._entries[digest] = entry
+            self._by_id[entry.id] = entry
+            for gram in entry.grams:
+                self._index.setdefault(gram, set()).add(entry.id)
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+        return entry
+
+    def get(self, entry_id: int) -> Optional[HistoryEntry]:
+        with self._lock:
+            return self._by_id.get(entry_id)
+
+    def remove(self, entry_id: int) -> None:
+        with self._lock:
+            entry = self._by_id.get(entry_id)
+            if entry is not None:
+                self._drop(entry.digest)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_id.clear()
+            self._index.clear()
+            self._bytes = 0
+
+    def search(self, query: str, limit: int = 200) -> List[HistoryEntry]:
+        """Entries containing query, newest first. An empty query lists everything."""
+        needle = _fold(query.strip())
+        if not needle:
+            return list(itertools.islice(iter(self), limit))
+        grams = _trigrams(needle)
+        if grams:
+            with self._lock:
+                postings = []
+                for gram in grams:
+                    ids = self._index.get(gram)
+                    if not ids:
+                        return []
+                    postings.append(ids)
+                postings.sort(key=len)
+                candidates = [self._by_id[i] for i in set.intersection(*postings)]
+            # Newest first, like the other paths; a re-copied entry keeps its id
+            candidates.sort(key=lambda entry: entry.recency, reverse=True)
+            entries: Iterator[HistoryEntry] = iter(candidates)
+        else:
+            # One or two characters have no trigrams; scan, stopping at limit
+            entries = iter(self)
+        results = []
+        for entry in entries:
+            # Trigrams can all be present without being contiguous, so confirm
+            if needle in _fold(entry.text[:INDEX_MAX_CHARS]):
+                results.append(entry)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "compressed": sum(1 for e in self._entries.values() if e.compressed),
+                "trigrams": len(self._index),
+            }
+
+    def _bump(self, entry: HistoryEntry) -> None:
+        self._entries.move_to_end(entry.digest)
+        entry.copied_at = time.time()
+        entry.times_copied += 1
+        entry.recency = next(self._recency)
+
+    def _drop(self, digest: bytes) -> None:
+        entry = self._entries.pop(digest)
+        del self._by_id[entry.id]
+        for gram in entry.grams:
+            ids = self._index.get(gram)
+            if ids is not None:
+                ids.discard(entry.id)
+                if not ids:
+                    del self._index[gram]
+        self._bytes -= entry.size
+
+
+def _fold(text: str) -> str:
+    return text.casefold()
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
@@ -0,0 +1,303 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+from collections import Counter
+from itertools import chain
+from typing import Dict, List, Optional, Tuple
+import json
+import os
+import re
+
+from cleaner import clean_text
+from rules import WatchedFile, config_dir, load_cached
+
+
+# Bump when the cache layout or the index changes
+CACHE_VERSION = 3
+
+# Shorter words are only ever matched exactly; too many near-misses otherwise
+FUZZY_MIN_LEN = 5
+# Most trigrams of a word one _edit_distance edit can spoil: three for a
+# change, insertion or deletion, four for a swap of neighbours
+GRAMS_PER_EDIT = 4
+
+# Longer texts aren't chat messages; they're left alone
+MAX_TEXT_CHARS = 100_000
+
+# Trie nodes with up to this many words below them are searched directly
+# for typos rather than through the trigram index
+DIRECT_SEARCH_MAX = 64
+
+_WORD = re.compile(r"[^\W_]+(?:'[^\W_]+)*")
+
+
+class ItemsError(ValueError):
+    """The item names file couldn't be read or isn't in the expected format."""
+
+
+def default_items_path() -> str:
+    """Where the user's item names file lives (PASTEPRIME_ITEMS overrides it)."""
+    return os.environ.get("PASTEPRIME_ITEMS") or os.path.join(config_dir(), "items.txt")
+
+
+class ItemIndex:
+    """Item names, indexed for fixing their spelling inside trade messages.
+
+    Names are kept in a trie keyed by casefolded words, so each word of a
+    message costs a walk down the trie and the longest name starting there
+    wins. A word that isn't in the trie may be a typo of one that is, within
+    one edit (two for long words). Past the first word of a name only a few
+    words can follow, so those are compared directly; for the first word, a
+    trigram index of every word used in a name narrows down the candidates.
+
+    Fuzzy matches need an exact word alongside them: at most half the words
+    of a match may be typos, so single-word names only ever match exactly,
+    and then only when the word isn't all lowercase ("hate" is English,
+    "HATE" is the shotgun).
+    """
+
+    def __init__(self, names: List[str], *, index: Optional[dict] = None) -> None:
+        if index is None:
+            index = _build_index(names)
+        self.names: List[str] = index["names"]
+        self.trie: dict = index["trie"]
+        self.grams: Dict[str, List[str]] = index["grams"]
+        self.vocab = frozenset(index["vocab"])
+        self.index = index
+        self._similar_cache: Dict[str, Tuple[str, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __repr__(self) -> str:
+        return f"ItemIndex({len(self.names)} names, {len(self.vocab)} words)"
+
+    def canonicalize(self, text: str, *, ascii_only: bool = False) -> str:
+        """Replace item names in text with their canonical spelling.
+
+        With ascii_only, names that aren't plain ASCII are left as they are.
+        """
+        return self.canonicalize_spans(text, ascii_only=ascii_only)[0]
+
+    def canonicalize_spans(self, text: str, *, ascii_only: bool = False) -> Tuple[str, List[Tuple[int, int]]]:
+        """canonicalize(), plus the (start, end) spans of text that were replaced."""
+        spans: List[Tuple[int, int]] = []
+        if not text or len(text) > MAX_TEXT_CHARS or not self.names:
+            return text, spans
+        tokens = [(m.start(), m.end(), m.group().casefold()) for m in _WORD.finditer(text)]
+        out: List[str] = []
+        pos = 0
+        i = 0
+        while i < len(tokens):
+            found = self._match(text, tokens, i)
+            if found is None:
+                i += 1
+                continue
+            j, name = found
+            start, end = tokens[i][0], tokens[j - 1][1]
+            if text[start:end] != name and (name.isascii() or not ascii_only):
+                out.append(text[pos:start])
+                out.append(name)
+                spans.append((start, end))
+                pos = end
+            i = j
+        if not out:
+            return text, spans
+        out.append(text[pos:])
+        return "".join(out), spans
+
+    def _match(self, text: str, tokens: List[Tuple[int, int, str]], i: int) -> Optional[Tuple[int, str]]:
+        # Longest acceptable name starting at token i: (end token, name)
+        node = self.trie
+        best = None
+        typos = 0
+        for j in range(i, len(tokens)):
+            if j > i and text[tokens[j - 1][1]:tokens[j][0]].strip(" \t-&"):
+                # Only spaces, hyphens and ampersands go between a name's words
+                break
+            word = tokens[j][2]
+            child = node.get(word)
+            if child is None:
+                child = self._near_child(node, tokens, i, j)
+                if child is None:
+                    break
+                typos += 1
+            node = child
+            words = j + 1 - i
+            if "" in node and typos * 2 <= words:
+                if words > 1 or not text[tokens[i][0]:tokens[i][1]].islower():
+                    best = (j + 1, self.names[node[""]])
+        return best
+
+    def _near_child(self, node: dict, tokens: List[Tuple[int, int, str]], i: int, j: int) -> Optional[dict]:
+        word = tokens[j][2]
+        if len(word) < FUZZY_MIN_LEN or word.isdigit():
+            return None
+        if j > i and len(node) <= DIRECT_SEARCH_MAX:
+            limit = _typo_limit(word)
+            best = None
+            for candidate, child in node.items():
+                if candidate:
+                    distance = _edit_distance(word, candidate, limit)
+                    if distance <= limit and (best is None or distance < best[0]):
+                        best = (distance, child)
+            return best[1] if best is not None else None
+        if j == i:
+            # A typo can't start a match unless the next word is a real one;
+            # that keeps the trigram lookups to words next to item names
+            if j + 1 >= len(tokens) or tokens[j + 1][2] not in self.vocab:
+                return None
+        for candidate in self._similar(word):
+            child = node.get(candidate)
+            if child is not None:
+                return child
+        return None
+
+    def _similar(self, word: str) -> Tuple[str, ...]:
+        """Words from the names within a typo or two of word, closest first."""
+        cached = self._similar_cache.get(word)
+        if cached is not None:
+            return cached
+        limit = _typo_limit(word)
+        shared = Counter(chain.from_iterable(self.grams.get(gram, ()) for gram in _trigrams(word)))
+        need = max(1, len(word) - GRAMS_PER_EDIT * limit)
+        scored = []
+        for candidate, count in shared.items():
+            if count >= need and abs(len(candidate) - len(word)) <= limit:
+                distance = _edit_distance(word, candidate, limit)
+                if distance <= limit:
+                    scored.append((distance, -count, candidate))
+        result = tuple(candidate for _, _, candidate in sorted(scored))
+        if len(self._similar_cache) >= 8192:
+            self._similar_cache.clear()
+        self._similar_cache[word] = result
+        return result
+
+
+def _build_index(raw_names: List[str]) -> dict:
+    names: List[str] = []
+    trie: dict = {}
+    vocab = set()
+    for raw in raw_names:
+        # Cleaned like any other text, so the replacement doesn't undo cleaning
+        name = clean_text(raw)
+        words = [m.group().casefold() for m in _WORD.finditer(name)]
+        if not words:
+            continue
+        node = trie
+        for word in words:
+            node = node.setdefault(word, {})
+        if "" in node:
+            # First spelling wins
+            continue
+        node[""] = len(names)
+        names.append(name)
+        vocab.update(words)
+    grams: Dict[str, List[str]] = {}
+    for word in sorted(vocab):
+        # Anything shorter is too far from a word long enough to be fuzzy-matched
+        if len(word) >= FUZZY_MIN_LEN - 1 and not word.isdigit():
+            for gram in set(_trigrams(word)):
+                grams.setdefault(gram, []).append(word)
+    return {"names": names, "trie": trie, "grams": grams, "vocab": sorted(vocab)}
+
+
+def _typo_limit(word: str) -> int:
+    return 1 if len(word) < 9 else 2
+
+
+def _trigrams(word: str) -> List[str]:
+    padded = f" {word} "
+    return [padded[k:k + 3] for k in range(len(padded) - 2)]
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Edits (a swap of neighbours counts as one) from a to b, or limit + 1 past limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before[j - 2] + 1)
+            row[j] = value
+        if min(row) > limit:
+            return limit + 1
+        before, prev = prev, row
+    return min(prev[-1], limit + 1)
+
+
+def _parse_items(data: bytes, path: str) -> List[str]:
+    try:
+        body = data.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise ItemsError(f"{path}: {e}") from e
+    if not path.lower().endswith(".json"):
+        # One name per line; blank lines and # comments are skipped
+        return [line.strip() for line in body.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    try:
+        doc = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise ItemsError(f"{path}: {e}") from e
+    if isinstance(doc, dict):
+        # warframe.market's item list nests them under "payload"
+        payload = doc.get("payload")
+        doc = (payload if isinstance(payload, dict) else doc).get("items")
+    if not isinstance(doc, list):
+        raise ItemsError(f'{path}: expected a list of names, or {{"items": [{{"item_name": ...}}, ...]}}')
+    names = []
+    for entry in doc:
+        if isinstance(entry, dict):
+            entry = entry.get("item_name", entry.get("name"))
+        if not isinstance(entry, str):
+            raise ItemsError(f"{path}: item names must be strings, got {entry!r}")
+        names.append(entry)
+    return names
+
+
+def load_items(path: str, *, cache_path: Optional[str] = None) -> ItemIndex:
+    """Load an item names file and index it, reusing the on-disk index when it's current.
+
+    The file is either plain text, one name per line, or a .json list of
+    names (warframe.market's item list works as is). The cache sits next to
+    it unless cache_path is given.
+    """
+
+    def build(data: bytes):
+        items = ItemIndex(_parse_items(data, path))
+        return items, items.index
+
+    def restore(index: dict) -> ItemIndex:
+        return ItemIndex(index["names"], index=index)
+
+    return load_cached(path, cache_path, CACHE_VERSION, ItemsError, build, restore)
+
+
+class ItemFile(WatchedFile):
+    """The user's item names file, reloaded when it changes; items is None while there is none."""
+
+    error_type = ItemsError
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        super().__init__(path or default_items_path())
+
+    @property
+    def items(self) -> Optional[ItemIndex]:
+        return self.value
+
+    def _load(self, path: str) -> ItemIndex:
+        return load_items(path)
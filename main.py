@@ -11,29 +11,88 @@
 ==============================================================
 """
 
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import importlib
+import importlib.util
 import os
 import sys
 import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
-
-try:
-    import pyperclip
-except ImportError:
-    pyperclip = None
-
-try:
-    import pyautogui
-except ImportError:
-    pyautogui = None
+from tkinter import ttk, filedialog, messagebox
+
+import diagnostics
+from cleaner import CHAT_MESSAGE_LIMIT, Analysis, CleanCache, analyze, common_affixes, count_messages
+from clipboard import ClipboardBackend, ClipboardWatcher, PollSchedule, create_backend, create_watcher
+from history import ClipboardHistory
+from items import ItemFile
+from pipeline import LARGE_PAYLOAD_CHARS, ClipboardPipeline, PipelineResult, UiChannel
+from rules import RuleFile
+from session import SessionRecorder
+from typing_engine import KeyBackend, KeystrokePlan, PlanBuilder, PyAutoGuiBackend, TypingEngine
+
+
+# Previews longer than this show only the beginning, read-only; the full text is still used
+PREVIEW_MAX_CHARS = 20_000
+
+# What to do with very large copies, as shown in the options
+LARGE_POLICY_LABELS = {
+    "defer": "Clean in background",
+    "skip": "Don't auto-clean",
+    "clean": "Clean right away",
+}
+
+# "Show what changed" colors and status bar names, per analyze() category
+CHANGE_COLORS = {
+    "invisible": "#f6b8c4",
+    "space": "#bfdcf5",
+    "punctuation": "#ffe49a",
+    "newline": "#cbe8c0",
+    "whitespace": "#ddd2f4",
+    "unicode": "#fbcfa8",
+    "rule": "#b9ece6",
+    "non_ascii": "#dedede",
+    # Not from analyze(): item names the item stage fixed
+    "item": "#f9d7ef",
+}
+CHANGE_LABELS = {
+    "invisible": "invisible",
+    "space": "non-breaking space",
+    "punctuation": "punctuation",
+    "newline": "line break",
+    "whitespace": "extra whitespace",
+    "unicode": "unicode form",
+    "rule": "rule",
+    "non_ascii": "non-ASCII",
+    "item": "item name",
+}
+# Beyond this many highlighted spans the rest of the text is shown plain
+MAX_SHOWN_CHANGES = 2000
+
+
+# pyautogui pulls in PIL, pyscreeze, pymsgbox and pytweening, so optional
+# dependencies are imported the first time a feature needs them, not at startup
+_optional_modules: Dict[str, Any] = {}
+
+
+def _optional_import(name: str) -> Any:
+    """Import an optional dependency on first use; None if it isn't installed."""
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = importlib.import_module(name)
+        except ImportError:
+            _optional_modules[name] = None
+    return _optional_modules[name]
 
-try:
-    import keyboard
-except ImportError:
-    keyboard = None
 
-from cleaner import clean_text
+def _is_installed(name: str) -> bool:
+    """Check for an optional dependency without paying for its import."""
+    if name in _optional_modules:
+        return _optional_modules[name] is not None
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
 
 
 # this function just gets the right path for files whether running from PyInstaller or not, I don't know why it kept defaulting to tkinter icon without this
@@ -126,7 +185,13 @@ def add_tooltip(widget: tk.Widget, text: str) -> None:
 class ClipboardCleanerApp(tk.Tk):
     """Simple desktop app to clean clipboard text for Warframe chat pasting."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        *,
+        clipboard: Optional[ClipboardBackend] = None,
+        watcher: Optional[ClipboardWatcher] = None,
+        key_backend: Optional[KeyBackend] = None,
+    ) -> None:
         super().__init__()
         self.title("Paste Prime")
         self.minsize(520, 360)
@@ -140,24 +205,116 @@ class ClipboardCleanerApp(tk.Tk):
         except Exception:
             self._icon_path = None
 
+        # Clipboard access; on Linux this reuses Tk's display connection instead of forking xclip
+        self._clipboard = clipboard if clipboard is not None else create_backend(self)
+        if watcher is None:
+            watcher = clipboard if isinstance(clipboard, ClipboardWatcher) else create_watcher()
+        self._watcher = watcher
+        # Worker threads reach the Tk thread only through this
+        self._ui = UiChannel(self)
+
         # State
         self.auto_clean_enabled = tk.BooleanVar(value=True)
         self.ascii_only_enabled = tk.BooleanVar(value=False)
-        self.last_seen_clipboard_text: Optional[str] = None
-        self.is_setting_clipboard = False
+        # Copies over this many thousand chars follow large_policy_var
+        self.large_above_var = tk.IntVar(value=LARGE_PAYLOAD_CHARS // 1000)
+        self.large_policy_var = tk.StringVar(value=LARGE_POLICY_LABELS["defer"])
+        self._clean_cache = CleanCache()
+        # Everything copied, so the same trade messages can be found again
+        self._history = ClipboardHistory()
+        self._history_refresh: Optional[Callable[[], None]] = None
+        # Extra replacement rules from the user's rules file, reloaded when it changes
+        self._rules_file = RuleFile()
+        self._rules_file.reload_if_changed()
+        # Item names to fix the spelling of in trade messages, same deal
+        self._item_file = ItemFile()
+        self._item_file.reload_if_changed()
         self.app_enabled = tk.BooleanVar(value=True)
+        # Opt-in log of clipboard events for benchmarks.replay_session (PASTEPRIME_RECORD)
+        self._session: Optional[SessionRecorder] = None
+        session_error = None
+        try:
+            self._session = SessionRecorder.from_env(
+                clipboard=self._clipboard.name if self._clipboard is not None else None,
+                watcher=self._watcher.name,
+            )
+        except (OSError, ValueError) as e:
+            session_error = str(e)
+        # Clipboard reads, cleaning and write-back run on a worker thread, so a
+        # slow clipboard owner or a huge copy never stalls the window
+        self._pipeline = ClipboardPipeline(
+            self._clipboard,
+            self._clean_cache,
+            self._publish_result,
+            call_on_ui=self._ui.call,
+            # Without change notifications the worker polls, less often while nothing happens
+            poll=None if self._clipboard is None or self._watcher.event_driven else PollSchedule(),
+        )
+        self._sync_options()
 
         # Hotkey state
         self.hotkey_enabled = tk.BooleanVar(value=True)
         self.hotkey_var = tk.StringVar(value="ctrl+alt+v")
-        self._typing_delay_ms = 500
+        # After the hotkey, typing waits for its keys to be let go, at most this long
+        self.hotkey_delay_var = tk.IntVar(value=500)
         self._hotkey_id = None
 
+        # Typing runs on a worker thread so the window stays responsive
+        self.typing_rate_var = tk.IntVar(value=200)
+        # Longer text is sent as several chat messages
+        self.chat_limit_var = tk.IntVar(value=CHAT_MESSAGE_LIMIT)
+        self.message_delay_var = tk.IntVar(value=600)
+        self.cancel_hotkey = "esc"
+        self._cancel_hotkey_id = None
+        if key_backend is None and _is_installed("pyautogui"):
+            # Imported by the backend on the first keystroke
+            key_backend = PyAutoGuiBackend()
+        self._typing: Optional[TypingEngine] = None
+        if key_backend is not None:
+            self._typing = TypingEngine(
+                key_backend,
+                on_progress=lambda *args: self._ui.post(lambda: self._on_typing_progress(*args)),
+                on_done=lambda *args: self._ui.post(lambda: self._on_typing_done(*args)),
+            )
+        # Keystrokes for the preview are worked out in the background, ready for the hotkey
+        self._planner: Optional[PlanBuilder] = None
+        if self._typing is not None:
+            self._planner = PlanBuilder(self._typing, on_built=lambda plan: self._ui.post(self._update_length))
+
+        # What the preview holds. Kept as a plain string so the hotkey thread
+        # never has to touch the Tk widget, and so huge texts needn't be rendered.
+        self._preview_value = ""
+        self._preview_rendered = ""
+        # The last clipboard text and what cleaning changed in it, for "Show what changed"
+        # (copied text, its analysis, its length) for "Show what changed"; the
+        # text is only kept up to PREVIEW_MAX_CHARS, where it can be shown
+        self._changes: Tuple[Optional[str], Optional[Analysis], int] = (None, None, 0)
+        self._diagnostics_window: Optional[tk.Toplevel] = None
+        self._history_window: Optional[tk.Toplevel] = None
+
         # Build UI
         self._build_ui()
 
-        # Start polling clipboard
-        self.after(300, self._poll_clipboard)
+        self.after(2000, self._check_rules_file)
+        if self._rules_file.error:
+            self.status_var.set(f"Rules file error: {self._rules_file.error}")
+        if self._item_file.error:
+            self.status_var.set(f"Item names file error: {self._item_file.error}")
+        if session_error is not None:
+            self.status_var.set(f"Could not record session: {session_error}")
+        elif self._session is not None:
+            self.status_var.set(f"Recording clipboard session to {self._session.path}")
+
+        # Switching windows usually means a copy or a paste is coming
+        self.bind("<FocusIn>", lambda _event: self._pipeline.boost(), add=True)
+        self.bind("<FocusOut>", lambda _event: self._pipeline.boost(), add=True)
+
+        # Start watching the clipboard; without change notifications the pipeline polls
+        if self._clipboard is None:
+            self.status_var.set("pyperclip not installed. Run: pip install -r requirements.txt")
+        elif self._watcher.event_driven:
+            # Straight from the watcher's thread to the worker; Tk isn't involved
+            self._watcher.start(self._pipeline.check)
 
     def _build_ui(self) -> None:
         root = ttk.Frame(self, padding=12)
@@ -171,6 +328,7 @@ class ClipboardCleanerApp(tk.Tk):
             options_frame,
             text="Auto-clean clipboard when it changes",
             variable=self.auto_clean_enabled,
+            command=self._sync_options,
         )
         chk_auto.pack(anchor=tk.W, pady=(4, 0))
         add_tooltip(chk_auto, "When enabled, the app cleans text automatically whenever you copy something new.")
@@ -179,11 +337,41 @@ class ClipboardCleanerApp(tk.Tk):
             options_frame,
             text="Force ASCII (strip unsupported Unicode)",
             variable=self.ascii_only_enabled,
-            command=self._update_preview_from_clipboard,
+            command=self._on_ascii_toggled,
         )
         chk_ascii.pack(anchor=tk.W, pady=(4, 6))
         add_tooltip(chk_ascii, "Replace accented/Unicode characters with ASCII-only equivalents.")
 
+        large_row = ttk.Frame(options_frame)
+        large_row.pack(fill=tk.X, pady=(0, 6))
+        ttk.Label(large_row, text="Copies over").pack(side=tk.LEFT)
+        spn_large = ttk.Spinbox(
+            large_row,
+            from_=10,
+            to=100_000,
+            increment=100,
+            textvariable=self.large_above_var,
+            width=7,
+            command=self._sync_options,
+        )
+        spn_large.pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Label(large_row, text="K chars:").pack(side=tk.LEFT, padx=(4, 6))
+        cmb_large = ttk.Combobox(
+            large_row,
+            textvariable=self.large_policy_var,
+            values=list(LARGE_POLICY_LABELS.values()),
+            state="readonly",
+            width=20,
+        )
+        cmb_large.pack(side=tk.LEFT)
+        cmb_large.bind("<<ComboboxSelected>>", lambda _event: self._sync_options())
+        spn_large.bind("<FocusOut>", lambda _event: self._sync_options())
+        add_tooltip(
+            cmb_large,
+            "Huge copies can take a while to clean. Clean them once nothing else is going on, "
+            "leave them for Clean & Copy, or clean them like any other copy.",
+        )
+
         # Global hotkey controls
         hotkey_frame = ttk.Frame(options_frame)
         hotkey_frame.pack(fill=tk.X, pady=(0, 6))
@@ -206,6 +394,44 @@ class ClipboardCleanerApp(tk.Tk):
         btn_capture_hotkey.pack(side=tk.LEFT, padx=(8, 0))
         add_tooltip(ent_hotkey, "The current global hotkey (read-only). Click Change… to set a new one.")
         add_tooltip(btn_capture_hotkey, "Click, then press the desired key combination (e.g., Ctrl+Alt+V).")
+        ttk.Label(hotkey_row, text="Max delay:").pack(side=tk.LEFT, padx=(12, 0))
+        spn_hotkey_delay = ttk.Spinbox(hotkey_row, from_=0, to=2000, increment=50, textvariable=self.hotkey_delay_var, width=5)
+        spn_hotkey_delay.pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Label(hotkey_row, text="ms").pack(side=tk.LEFT, padx=(4, 0))
+        add_tooltip(
+            spn_hotkey_delay,
+            "Typing starts as soon as you let go of the hotkey, or after this long at most. "
+            "The measured wait is shown under Diagnostics.",
+        )
+
+        speed_row = ttk.Frame(options_frame)
+        speed_row.pack(fill=tk.X, pady=(6, 6))
+        ttk.Label(speed_row, text="Typing speed:").pack(side=tk.LEFT)
+        spn_speed = ttk.Spinbox(speed_row, from_=10, to=1000, increment=10, textvariable=self.typing_rate_var, width=6)
+        spn_speed.pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Label(speed_row, text="keys/s").pack(side=tk.LEFT, padx=(4, 0))
+        add_tooltip(spn_speed, "How fast the preview is typed. Lower this if characters go missing in game.")
+
+        message_row = ttk.Frame(options_frame)
+        message_row.pack(fill=tk.X, pady=(0, 6))
+        ttk.Label(message_row, text="Message limit:").pack(side=tk.LEFT)
+        spn_limit = ttk.Spinbox(
+            message_row,
+            from_=20,
+            to=1000,
+            increment=10,
+            textvariable=self.chat_limit_var,
+            width=6,
+            command=self._on_limit_changed,
+        )
+        spn_limit.pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Label(message_row, text="chars").pack(side=tk.LEFT, padx=(4, 12))
+        ttk.Label(message_row, text="Delay between messages:").pack(side=tk.LEFT)
+        spn_delay = ttk.Spinbox(message_row, from_=0, to=5000, increment=100, textvariable=self.message_delay_var, width=6)
+        spn_delay.pack(side=tk.LEFT, padx=(6, 0))
+        ttk.Label(message_row, text="ms").pack(side=tk.LEFT, padx=(4, 0))
+        add_tooltip(spn_limit, "Longer text is split at word boundaries into several chat messages.")
+        add_tooltip(spn_delay, "Pause after sending one message before typing the next.")
 
         # Buttons
         buttons_frame = ttk.Frame(root)
@@ -219,6 +445,14 @@ class ClipboardCleanerApp(tk.Tk):
         self.btn_type_preview.pack(side=tk.LEFT, padx=(8, 0))
         add_tooltip(self.btn_type_preview, "After a brief countdown, types the preview text into the active window.")
 
+        btn_history = ttk.Button(buttons_frame, text="History", command=self._open_history)
+        btn_history.pack(side=tk.LEFT, padx=(8, 0))
+        add_tooltip(btn_history, "Search everything you've copied and load an old entry into the preview.")
+
+        btn_diagnostics = ttk.Button(buttons_frame, text="Diagnostics", command=self._open_diagnostics)
+        btn_diagnostics.pack(side=tk.LEFT, padx=(8, 0))
+        add_tooltip(btn_diagnostics, "Timing percentiles for cleaning, clipboard polling and the hotkey.")
+
         self.btn_toggle_app = ttk.Button(buttons_frame, text="Disable App", command=self._toggle_app_enabled)
         self.btn_toggle_app.pack(side=tk.RIGHT)
         add_tooltip(self.btn_toggle_app, "Enable/Disable all features (auto-clean, hotkey, and actions).")
@@ -227,16 +461,26 @@ class ClipboardCleanerApp(tk.Tk):
         preview_frame = ttk.LabelFrame(root, text="Preview (Cleaned)")
         preview_frame.pack(fill=tk.BOTH, expand=True)
 
+        self.show_changes_var = tk.BooleanVar(value=False)
+        chk_changes = ttk.Checkbutton(
+            preview_frame, text="Show what changed", variable=self.show_changes_var, command=self._on_show_changes_toggled
+        )
+        chk_changes.pack(anchor=tk.W)
+        add_tooltip(chk_changes, "Show the copied text with everything cleaning changed highlighted. Read-only while on.")
+
         self.preview_text = tk.Text(preview_frame, wrap=tk.WORD, height=10)
         self.preview_text.pack(fill=tk.BOTH, expand=True)
+        self.preview_text.bind("<<Modified>>", self._on_preview_modified)
         add_tooltip(self.preview_text, "This shows what will be typed/copied. You can edit it here before using actions.")
+        for category, color in CHANGE_COLORS.items():
+            self.preview_text.tag_configure(f"change.{category}", background=color)
 
         # Status bar
         status_frame = ttk.Frame(root)
         status_frame.pack(fill=tk.X, pady=(8, 0))
 
         self.status_var = tk.StringVar(value="Waiting for clipboard…")
-        self.length_var = tk.StringVar(value="0 chars")
+        self.length_var = tk.StringVar(value="0 messages / 0 chars")
 
         status_label = ttk.Label(status_frame, textvariable=self.status_var, anchor=tk.W)
         status_label.pack(side=tk.LEFT)
@@ -244,100 +488,244 @@ class ClipboardCleanerApp(tk.Tk):
         length_label = ttk.Label(status_frame, textvariable=self.length_var, anchor=tk.E)
         length_label.pack(side=tk.RIGHT)
 
-        # Initialize preview from current clipboard
-        self._update_preview_from_clipboard()
-        # Register hotkey if enabled, then apply enabled/disabled state
-        self._update_hotkey_registration()
-        self._apply_enabled_state()
-
-    def _poll_clipboard(self) -> None:
-        """Poll the clipboard for changes and auto-clean if enabled."""
+        # Register hotkey if enabled and apply enabled/disabled state once the
+        # window is up, so loading keyboard doesn't delay the first paint. That
+        # also reads the clipboard for the first preview.
+        self.after_idle(self._apply_enabled_state)
+
+    def _publish_result(self, result: PipelineResult) -> None:
+        # Worker thread: log it, then hand it to the Tk thread
+        if self._session is not None:
+            self._session.record_result(result)
+        changes = None
+        original = result.original
+        remembered = False
+        if original and result.kind in ("check", "manual", "deferred"):
+            # Compressing and indexing a big copy happen here, not on the Tk thread
+            remembered = self._history.add(original) is not None
+        if original and result.cleaned != original and len(original) <= PREVIEW_MAX_CHARS:
+            if result.before_items == original:
+                # Only item names changed, which analyze() knows nothing about
+                changes = Analysis([(start, end, "item") for start, end in result.item_spans])
+            else:
+                # Found here so the Tk thread doesn't pay for the scan
+                changes = analyze(
+                    original, ascii_only=self._pipeline.ascii_only, rules=self._pipeline.rules, limit=MAX_SHOWN_CHANGES
+                )
+        self._ui.post(lambda: self._on_pipeline_result(result, changes, remembered))
+
+    def _on_pipeline_result(
+        self, result: PipelineResult, changes: Optional[Analysis] = None, remembered: bool = False
+    ) -> None:
+        """Show what the clipboard pipeline did. Runs on the Tk thread."""
+        if remembered and self._history_refresh is not None:
+            self._history_refresh()
+        if result.error is not None:
+            self.status_var.set(f"Clean & Copy failed: {result.error}")
+            return
+        if result.kind == "manual" and not result.original:
+            self.status_var.set("Clipboard is empty or not text")
+        elif result.kind == "manual":
+            self.status_var.set("Clipboard cleaned (manual)")
+        elif result.kind == "check":
+            if result.wrote:
+                self.status_var.set("Clipboard cleaned")
+            elif result.cleaned == result.original:
+                self.status_var.set("Clipboard already clean")
+            else:
+                self.status_var.set("Clipboard changed (auto-clean off)")
+        elif result.kind == "preview":
+            self.status_var.set("Loaded history entry into preview")
+        if result.deferred:
+            # A large copy; the preview keeps showing what it had
+            if self._pipeline.large_policy == "skip":
+                self.status_var.set(f"Large clipboard ({result.deferred:,} chars) not cleaned; use Clean & Copy")
+            else:
+                self.status_var.set(f"Large clipboard ({result.deferred:,} chars): cleaning in background…")
+            return
+        if result.kind == "deferred":
+            if result.wrote:
+                self.status_var.set("Large clipboard cleaned")
+            elif result.cleaned == result.original:
+                self.status_var.set("Large clipboard already clean")
+            else:
+                self.status_var.set("Large clipboard changed (auto-clean off)")
+        if changes is not None and result.kind != "preview":
+            self.status_var.set(f"{self.status_var.get()}: {_describe_changes(changes, len(result.item_spans))}")
+        original = result.original
+        length = len(original) if original is not None else 0
+        self._changes = (original if length <= PREVIEW_MAX_CHARS else None, changes, length)
+        with diagnostics.span("poll.preview"):
+            self._update_preview(result.cleaned)
+
+    def _sync_options(self) -> None:
+        # The worker reads these plain attributes, never the Tk variables
+        self._pipeline.enabled = self.app_enabled.get()
+        self._pipeline.auto_clean = self.auto_clean_enabled.get()
+        self._pipeline.ascii_only = self.ascii_only_enabled.get()
+        self._pipeline.rules = self._rules_file.rules
+        self._pipeline.items = self._item_file.items
         try:
-            if not self.app_enabled.get():
-                self.status_var.set("App disabled")
-                return
-            if pyperclip is None:
-                self.status_var.set("pyperclip not installed. Run: pip install -r requirements.txt")
-                self.after(750, self._poll_clipboard)
-                return
-
-            current_text: Optional[str] = None
-            try:
-                current_text = pyperclip.paste()
-            except Exception:
-                # Non-text or clipboard unavailable
-                pass
+            self._pipeline.large_above = max(0, self.large_above_var.get()) * 1000
+        except tk.TclError:
+            pass
+        # Copies too big to clean right away are too big to remember
+        self._history.max_chars = self._pipeline.large_above
+        labels = {label: policy for policy, label in LARGE_POLICY_LABELS.items()}
+        self._pipeline.large_policy = labels.get(self.large_policy_var.get(), "defer")
 
-            if isinstance(current_text, str):
-                if current_text != self.last_seen_clipboard_text:
-                    self.last_seen_clipboard_text = current_text
-                    if self.auto_clean_enabled.get():
-                        cleaned = clean_text(current_text, ascii_only=self.ascii_only_enabled.get())
-                        if cleaned != current_text:
-                            self.is_setting_clipboard = True
-                            try:
-                                pyperclip.copy(cleaned)
-                                self.status_var.set("Clipboard cleaned")
-                                self.last_seen_clipboard_text = cleaned
-                            finally:
-                                # Delay flag reset to avoid racing with next poll
-                                self.after(50, self._reset_setting_clipboard_flag)
-                        else:
-                            self.status_var.set("Clipboard already clean")
-                    else:
-                        self.status_var.set("Clipboard changed (auto-clean off)")
-                    self._update_preview(cleaned_text_hint=None)
+    def _check_rules_file(self) -> None:
+        try:
+            if self._rules_file.reload_if_changed():
+                if self._rules_file.error:
+                    self.status_var.set(f"Rules file error: {self._rules_file.error}")
+                else:
+                    rules = self._rules_file.rules
+                    self.status_var.set(f"Rules reloaded ({len(rules) if rules else 0} rules)")
+                    self._sync_options()
+                    # Results under the old rules can't be hit again
+                    self._clean_cache.clear()
+                    self._pipeline.refresh()
+            if self._item_file.reload_if_changed():
+                if self._item_file.error:
+                    self.status_var.set(f"Item names file error: {self._item_file.error}")
+                else:
+                    items = self._item_file.items
+                    self.status_var.set(f"Item names reloaded ({len(items) if items else 0} names)")
+                    self._sync_options()
+                    # Applied after the cache, so there's nothing to clear
+                    self._pipeline.refresh()
         finally:
-            self.after(300, self._poll_clipboard)
-
-    def _reset_setting_clipboard_flag(self) -> None:
-        self.is_setting_clipboard = False
+            self.after(2000, self._check_rules_file)
 
     def _clean_clipboard_now(self) -> None:
         if not self.app_enabled.get():
             self.status_var.set("App disabled")
             return
-        if pyperclip is None:
+        if self._clipboard is None:
             messagebox.showerror("Missing dependency", "pyperclip is not installed. Run: pip install -r requirements.txt")
             return
-        try:
-            original = pyperclip.paste()
-        except Exception:
-            original = ""
-        if not isinstance(original, str) or original == "":
-            self.status_var.set("Clipboard is empty or not text")
-            self._update_preview(cleaned_text_hint="")
-            return
-        cleaned = clean_text(original, ascii_only=self.ascii_only_enabled.get())
-        pyperclip.copy(cleaned)
-        self.last_seen_clipboard_text = cleaned
-        self.status_var.set("Clipboard cleaned (manual)")
-        self._update_preview(cleaned_text_hint=cleaned)
+        # Status and preview follow in _on_pipeline_result
+        self._pipeline.clean_now()
 
-    def _perform_typing(self, text: str) -> None:
+    def _perform_typing(self, text: str, *, requested_at: Optional[float] = None, from_hotkey: bool = False) -> None:
         if not self.app_enabled.get():
             self.status_var.set("App disabled")
             return
-        if pyautogui is None:
+        if self._typing is None:
             messagebox.showerror("Missing dependency", "pyautogui is not installed. Run: pip install -r requirements.txt")
             return
         if not text:
             self.status_var.set("Nothing to type")
             return
         try:
-            pyautogui.write(text, interval=0.005)
-            self.status_var.set("Typed cleaned text")
-        except Exception as e:
-            messagebox.showerror("Typing failed", f"Could not send keystrokes: {e}")
+            self._typing.keys_per_second = max(1, self.typing_rate_var.get())
+        except tk.TclError:
+            # Spinbox holds something that isn't a number; keep the last rate
+            pass
+        plan = self._keystroke_plan(text)
+        if not plan.total:
+            self.status_var.set(f"Nothing typeable; can't type: {_describe_chars(plan.untypeable)}")
+            return
+        try:
+            delay = max(0, self.message_delay_var.get()) / 1000.0
+        except tk.TclError:
+            delay = 0.6
+        wait_for = None
+        max_wait = 0.0
+        if from_hotkey:
+            wait_for = self._hotkey_released()
+            try:
+                max_wait = max(0, self.hotkey_delay_var.get()) / 1000.0
+            except tk.TclError:
+                max_wait = 0.5
+        # Every message but the last is submitted; the last is left for the user, like a single one
+        started = self._typing.play(
+            plan,
+            message_delay=delay,
+            submit_last=False,
+            requested_at=requested_at,
+            wait_for=wait_for,
+            max_wait=max_wait,
+        )
+        if not started:
+            self.status_var.set("Already typing…")
+            return
+        self._register_cancel_hotkey()
+        skipped = f", skipping {_describe_chars(plan.untypeable)}" if plan.untypeable else ""
+        self.status_var.set(f"Typing… 0/{plan.total} ({self.cancel_hotkey} to cancel{skipped})")
+
+    def _keystroke_plan(self, text: str) -> KeystrokePlan:
+        assert self._typing is not None
+        limit = self._chat_limit()
+        if self._planner is not None:
+            return self._planner.get(text, limit)
+        return self._typing.plan(text, limit)
+
+    def _request_plan(self, text: str) -> None:
+        if self._planner is not None:
+            self._planner.request(text, self._chat_limit())
+
+    def _hotkey_released(self) -> Optional[Callable[[], bool]]:
+        """A check for "none of the hotkey's keys are held", or None without keyboard."""
+        keyboard = _optional_import("keyboard")
+        if keyboard is None:
+            return None
+        keys = [part.strip() for part in (self.hotkey_var.get() or "").split("+") if part.strip()]
+        if not keys:
+            return None
+
+        def released() -> bool:
+            # Typing while Ctrl/Alt are still down would send shortcuts instead of text
+            return not any(keyboard.is_pressed(key) for key in keys)
+
+        return released
+
+    def _on_typing_progress(self, typed: int, total: int, rate: float) -> None:
+        if self._typing is None or not self._typing.busy:
+            return
+        prefix = "Typing…"
+        if self._typing.message_count > 1:
+            prefix = f"Typing message {self._typing.message_index}/{self._typing.message_count}…"
+        self.status_var.set(f"{prefix} {typed}/{total} at {rate:.0f} keys/s ({self.cancel_hotkey} to cancel)")
+
+    def _on_typing_done(self, typed: int, total: int, rate: float, cancelled: bool, error: Optional[Exception]) -> None:
+        self._remove_cancel_hotkey()
+        if error is not None:
+            messagebox.showerror("Typing failed", f"Could not send keystrokes: {error}")
+        elif cancelled:
+            self.status_var.set(f"Typing cancelled after {typed}/{total} chars")
+        elif self._typing is not None and self._typing.message_count > 1:
+            self.status_var.set(f"Typed {self._typing.message_count} messages ({total} chars at {rate:.0f} keys/s)")
+        else:
+            self.status_var.set(f"Typed cleaned text ({total} chars at {rate:.0f} keys/s)")
+
+    def _register_cancel_hotkey(self) -> None:
+        keyboard = _optional_import("keyboard")
+        if keyboard is None or self._typing is None:
+            return
+        try:
+            self._cancel_hotkey_id = keyboard.add_hotkey(self.cancel_hotkey, self._typing.cancel)
+        except Exception:
+            self._cancel_hotkey_id = None
+
+    def _remove_cancel_hotkey(self) -> None:
+        keyboard = _optional_import("keyboard")
+        try:
+            if self._cancel_hotkey_id is not None and keyboard is not None:
+                keyboard.remove_hotkey(self._cancel_hotkey_id)
+        except Exception:
+            pass
+        self._cancel_hotkey_id = None
 
     def _type_from_preview(self) -> None:
         if not self.app_enabled.get():
             self.status_var.set("App disabled")
             return
-        if pyautogui is None:
+        if self._typing is None:
             messagebox.showerror("Missing dependency", "pyautogui is not installed. Run: pip install -r requirements.txt")
             return
-        text = self.preview_text.get("1.0", tk.END).rstrip("\n")
+        text = self._preview_value
         if not text:
             self.status_var.set("Nothing to type")
             return
@@ -379,13 +767,19 @@ class ClipboardCleanerApp(tk.Tk):
         tick(3)
 
     def _on_hotkey_triggered(self) -> None:
-        # Called from a keyboard thread; marshal to Tk thread
-        if not self.app_enabled.get():
+        # Called from a keyboard thread: no Tk calls here, only plain attributes
+        if not self._pipeline.enabled:
             return
-        text = self.preview_text.get("1.0", tk.END).rstrip("\n")
-        self.after(self._typing_delay_ms, lambda: self._perform_typing(text))
+        text = self._preview_value
+        requested_at = time.perf_counter()
+        # Trading is going on; notice the next copy quickly
+        self._pipeline.boost()
+        # The keystroke plan is normally ready already; the typing thread then
+        # waits only until the hotkey is let go (see hotkey_delay_var)
+        self._ui.post(lambda: self._perform_typing(text, requested_at=requested_at, from_hotkey=True))
 
     def _update_hotkey_registration(self) -> None:
+        keyboard = _optional_import("keyboard")
         # Remove previous
         try:
             if self._hotkey_id is not None and keyboard is not None:
@@ -418,6 +812,7 @@ class ClipboardCleanerApp(tk.Tk):
             self.status_var.set("Global hotkey unavailable")
 
     def _start_hotkey_capture(self) -> None:
+        keyboard = _optional_import("keyboard")
         if keyboard is None:
             messagebox.showerror(
                 "Missing dependency",
@@ -454,12 +849,190 @@ class ClipboardCleanerApp(tk.Tk):
                 if combo and combo.lower() != "esc":
                     self.hotkey_var.set(combo)
                     self._update_hotkey_registration()
-            self.after(0, finish)
+            self._ui.post(finish)
 
         threading.Thread(target=capture_thread, daemon=True).start()
 
+    def _open_history(self) -> None:
+        if self._history_window is not None and self._history_window.winfo_exists():
+            self._history_window.lift()
+            return
+        win = tk.Toplevel(self)
+        win.title("Clipboard History")
+        win.minsize(420, 300)
+        try:
+            if getattr(self, "_icon_path", None):
+                win.iconbitmap(default=self._icon_path)  # type: ignore[arg-type]
+        except Exception:
+            pass
+        self._history_window = win
+
+        query_var = tk.StringVar()
+        count_var = tk.StringVar()
+        shown: List[int] = []
+
+        top = ttk.Frame(win, padding=8)
+        top.pack(fill=tk.X)
+        ttk.Label(top, text="Search:").pack(side=tk.LEFT)
+        ent_query = ttk.Entry(top, textvariable=query_var)
+        ent_query.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(6, 0))
+        ent_query.focus_set()
+
+        list_frame = ttk.Frame(win, padding=(8, 0))
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        listbox = tk.Listbox(list_frame, activestyle=tk.DOTBOX)
+        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=listbox.yview)
+        listbox.configure(yscrollcommand=scrollbar.set)
+        listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        bottom = ttk.Frame(win, padding=8)
+        bottom.pack(fill=tk.X)
+        ttk.Label(bottom, textvariable=count_var).pack(side=tk.LEFT)
+
+        def refresh() -> None:
+            if not win.winfo_exists():
+                return
+            results = self._history.search(query_var.get())
+            shown[:] = [entry.id for entry in results]
+            listbox.delete(0, tk.END)
+            for entry in results:
+                listbox.insert(tk.END, entry.preview)
+            count_var.set(f"{len(results)} of {len(self._history)} entries")
+
+        def load(_event=None) -> None:
+            selection = listbox.curselection()
+            if not selection:
+                return
+            entry = self._history.get(shown[selection[0]])
+            if entry is None:
+                refresh()
+                return
+            # Cleaned on the worker; _on_pipeline_result shows it
+            self._pipeline.preview(entry.text)
+
+        def clear() -> None:
+            self._history.clear()
+            refresh()
+
+        def on_close() -> None:
+            self._history_refresh = None
+            win.destroy()
+
+        ttk.Button(bottom, text="Load Into Preview", command=load).pack(side=tk.RIGHT)
+        ttk.Button(bottom, text="Clear", command=clear).pack(side=tk.RIGHT, padx=(0, 8))
+        listbox.bind("<Double-Button-1>", load)
+        listbox.bind("<Return>", load)
+        ent_query.bind("<Return>", lambda _event: (listbox.selection_set(0), load()))
+        query_var.trace_add("write", lambda *_: refresh())
+        win.protocol("WM_DELETE_WINDOW", on_close)
+        self._history_refresh = refresh
+        refresh()
+
+    def _open_diagnostics(self) -> None:
+        if self._diagnostics_window is not None and self._diagnostics_window.winfo_exists():
+            self._diagnostics_window.lift()
+            return
+        win = tk.Toplevel(self)
+        win.title("Diagnostics")
+        win.minsize(460, 320)
+        try:
+            if getattr(self, "_icon_path", None):
+                win.iconbitmap(default=self._icon_path)  # type: ignore[arg-type]
+        except Exception:
+            pass
+        self._diagnostics_window = win
+
+        recording_var = tk.BooleanVar(value=diagnostics.recorder is not None)
+        extra_var = tk.StringVar()
+
+        def toggle() -> None:
+            if recording_var.get():
+                diagnostics.enable()
+            else:
+                diagnostics.disable()
+            refresh(reschedule=False)
+
+        def reset() -> None:
+            if diagnostics.recorder is not None:
+                diagnostics.recorder.reset()
+            refresh(reschedule=False)
+
+        def export() -> None:
+            if diagnostics.recorder is None:
+                self.status_var.set("Nothing recorded; enable timings first")
+                return
+            path = filedialog.asksaveasfilename(
+                parent=win,
+                defaultextension=".jsonl",
+                filetypes=[("JSON lines", "*.jsonl"), ("All files", "*.*")],
+            )
+            if path:
+                count = diagnostics.recorder.export_jsonl(path)
+                self.status_var.set(f"Exported {count} timings")
+
+        top = ttk.Frame(win, padding=8)
+        top.pack(fill=tk.X)
+        chk = ttk.Checkbutton(top, text="Record timings", variable=recording_var, command=toggle)
+        chk.pack(side=tk.LEFT)
+        add_tooltip(chk, "Off by default; timers cost next to nothing while off.")
+        ttk.Button(top, text="Export JSONL…", command=export).pack(side=tk.RIGHT)
+        ttk.Button(top, text="Reset", command=reset).pack(side=tk.RIGHT, padx=(0, 8))
+
+        tree = ttk.Treeview(win, columns=("count", "p50", "p95", "p99"), height=12)
+        tree.heading("#0", text="Metric")
+        tree.column("#0", width=160)
+        for column, title in (("count", "Count"), ("p50", "p50 ms"), ("p95", "p95 ms"), ("p99", "p99 ms")):
+            tree.heading(column, text=title)
+            tree.column(column, width=70, anchor=tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=8)
+        ttk.Label(win, textvariable=extra_var, justify=tk.LEFT, padding=8).pack(fill=tk.X)
+
+        def refresh(reschedule: bool = True) -> None:
+            if not win.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            if diagnostics.recorder is not None:
+                for name, row in diagnostics.recorder.summary().items():
+                    tree.insert(
+                        "",
+                        tk.END,
+                        text=name,
+                        values=(row["count"], f"{row['p50_ms']:.3f}", f"{row['p95_ms']:.3f}", f"{row['p99_ms']:.3f}"),
+                    )
+            lines = []
+            cache = self._clean_cache.stats()
+            lines.append(
+                f"Clean cache: {cache['entries']} entries, {cache['bytes'] // 1024} KB, "
+                f"{cache['hits']} hits / {cache['partial_hits']} partial / {cache['misses']} misses "
+                f"({cache['already_clean']} already clean)"
+            )
+            history = self._history.stats()
+            lines.append(
+                f"History: {history['entries']} entries, {history['bytes'] // 1024} KB "
+                f"({history['compressed']} compressed), {history['trigrams']} indexed trigrams"
+            )
+            if self._clipboard is not None:
+                clip = self._clipboard.stats()
+                lines.append(
+                    f"Clipboard ({self._clipboard.name}, watcher: {self._watcher.name}): "
+                    f"read {clip['paste']['mean_ms']:.2f} ms avg, write {clip['copy']['mean_ms']:.2f} ms avg"
+                )
+            if self._pipeline.poll is not None:
+                poll = self._pipeline.poll.stats()
+                lines.append(
+                    f"Polling every {poll['interval_s']:.2f} s now ({poll['rate_hz']:.1f}/s): "
+                    f"{poll['polls']} polls, {poll['changes']} changes, {poll['skipped']} wakeups skipped"
+                )
+            extra_var.set("\n".join(lines))
+            if reschedule:
+                self.after(1000, refresh)
+
+        refresh()
+
     def _apply_enabled_state(self) -> None:
         enabled = self.app_enabled.get()
+        self._sync_options()
         # Buttons
         self.btn_clean_now.configure(state=(tk.NORMAL if enabled else tk.DISABLED))
         self.btn_type_preview.configure(state=(tk.NORMAL if enabled else tk.DISABLED))
@@ -469,14 +1042,20 @@ class ClipboardCleanerApp(tk.Tk):
             self.btn_toggle_app.configure(text="Disable App")
             if self.status_var.get() == "App disabled":
                 self.status_var.set("Enabled")
+            if self._clipboard is not None:
+                # Pick up what was copied while disabled (or before startup) right away
+                self._pipeline.check()
         else:
             # Remove hotkey if present
+            keyboard = _optional_import("keyboard")
             try:
                 if self._hotkey_id is not None and keyboard is not None:
                     keyboard.remove_hotkey(self._hotkey_id)
             except Exception:
                 pass
             self._hotkey_id = None
+            if self._typing is not None:
+                self._typing.cancel()
             self.btn_toggle_app.configure(text="Enable App")
             self.status_var.set("App disabled")
 
@@ -484,31 +1063,179 @@ class ClipboardCleanerApp(tk.Tk):
         self.app_enabled.set(not self.app_enabled.get())
         self._apply_enabled_state()
 
-    def _update_preview_from_clipboard(self) -> None:
-        if pyperclip is None:
-            self._update_preview(cleaned_text_hint="")
+    def _on_ascii_toggled(self) -> None:
+        self._sync_options()
+        # The pre-ASCII result is cached, so only the ASCII step reruns
+        self._pipeline.refresh()
+
+    def _update_preview(self, text: str) -> None:
+        self._preview_value = text
+        if self.show_changes_var.get():
+            self._render_changes()
+        elif len(text) > PREVIEW_MAX_CHARS:
+            hidden = len(text) - PREVIEW_MAX_CHARS
+            shown = text[:PREVIEW_MAX_CHARS] + f"\n\n[… {hidden} more chars not shown; too large to edit here]"
+            self.preview_text.configure(state=tk.NORMAL)
+            self._render_preview(shown)
+            self.preview_text.configure(state=tk.DISABLED)
+        else:
+            self.preview_text.configure(state=tk.NORMAL)
+            self._render_preview(text)
+        self._update_length(text)
+        self._request_plan(text)
+
+    def _render_preview(self, text: str) -> None:
+        """Change only the part of the preview widget that differs from text."""
+        old = self._preview_rendered
+        if text == old:
+            return
+        if (text and max(text) > "\uffff") or (old and max(old) > "\uffff"):
+            # Tk may count astral chars (emoji) as two, so offsets wouldn't line up
+            prefix = suffix = 0
+        else:
+            prefix, suffix = common_affixes(old, text)
+        start = f"1.0 + {prefix} chars"
+        self.preview_text.delete(start, f"1.0 + {len(old) - suffix} chars")
+        self.preview_text.insert(start, text[prefix:len(text) - suffix])
+        self._preview_rendered = text
+        # Our own edits shouldn't look like the user's
+        self.preview_text.edit_modified(False)
+
+    def _on_show_changes_toggled(self) -> None:
+        # Start over either way: the widget's contents are replaced wholesale
+        self.preview_text.configure(state=tk.NORMAL)
+        self.preview_text.delete("1.0", tk.END)
+        self._preview_rendered = ""
+        self._update_preview(self._preview_value)
+
+    def _render_changes(self) -> None:
+        """Show the last clipboard text with what cleaning changed highlighted."""
+        original, changes, length = self._changes
+        widget = self.preview_text
+        widget.configure(state=tk.NORMAL)
+        widget.delete("1.0", tk.END)
+        if length > PREVIEW_MAX_CHARS:
+            widget.insert(tk.END, f"[Too large to show what changed; over {PREVIEW_MAX_CHARS:,} chars]")
+        elif original is None:
+            widget.insert(tk.END, "[Nothing copied yet]")
+        elif changes is None:
+            widget.insert(tk.END, "[Cleaning didn't change anything]")
+        else:
+            # Piece by piece with tags rather than by offset, which Tk may count
+            # differently for astral chars (emoji)
+            pos = 0
+            for start, end, category in changes.changes:
+                if start < pos:
+                    continue
+                widget.insert(tk.END, original[pos:start])
+                widget.insert(tk.END, _visible_change(original[start:end], category), (f"change.{category}",))
+                pos = end
+            widget.insert(tk.END, original[pos:])
+            if changes.truncated:
+                widget.insert(tk.END, f"\n\n[Only the first {MAX_SHOWN_CHANGES:,} changes are highlighted]")
+        widget.configure(state=tk.DISABLED)
+        # Our own edits shouldn't look like the user's
+        widget.edit_modified(False)
+
+    def _on_preview_modified(self, _event=None) -> None:
+        if not self.preview_text.edit_modified():
             return
+        # The user edited the preview; that becomes the text to type
+        text = self.preview_text.get("1.0", tk.END).rstrip("\n")
+        self._preview_value = text
+        self._preview_rendered = text
+        self.preview_text.edit_modified(False)
+        self._update_length(text)
+        self._request_plan(text)
+
+    def _chat_limit(self) -> int:
+        try:
+            return max(1, self.chat_limit_var.get())
+        except tk.TclError:
+            return CHAT_MESSAGE_LIMIT
+
+    def _update_length(self, text: Optional[str] = None) -> None:
+        if text is None:
+            text = self._preview_value
+        limit = self._chat_limit()
+        count = count_messages(text, limit)
+        label = f"{count} message{'' if count == 1 else 's'} / {len(text)} chars"
+        plan = self._planner.latest if self._planner is not None else None
+        if plan is not None and plan.untypeable and plan.limit == limit and plan.text == text:
+            # Flag these before anyone presses the hotkey; they'd be skipped while typing
+            label += f" · can't type: {_describe_chars(plan.untypeable)}"
+        self.length_var.set(label)
+
+    def _on_limit_changed(self) -> None:
+        self._update_length()
+        self._request_plan(self._preview_value)
+
+    def destroy(self) -> None:
+        if self._typing is not None:
+            self._typing.cancel()
         try:
-            clip = pyperclip.paste()
+            self._watcher.stop()
         except Exception:
-            clip = ""
-        if not isinstance(clip, str):
-            clip = ""
-        cleaned = clean_text(clip, ascii_only=self.ascii_only_enabled.get())
-        self._update_preview(cleaned_text_hint=cleaned)
-
-    def _update_preview(self, cleaned_text_hint: Optional[str]) -> None:
-        if cleaned_text_hint is None:
-            # Recompute from last seen
-            source = self.last_seen_clipboard_text or ""
-            cleaned_text_hint = clean_text(source, ascii_only=self.ascii_only_enabled.get())
-        self.preview_text.delete("1.0", tk.END)
-        self.preview_text.insert("1.0", cleaned_text_hint)
-        self.length_var.set(f"{len(cleaned_text_hint)} chars")
+            pass
+        self._pipeline.stop()
+        self._ui.close()
+        if self._clipboard is not None:
+            self._clipboard.close()
+        if self._session is not None:
+            self._session.close()
+        super().destroy()
+
+
+def _describe_chars(chars: List[str], limit: int = 5) -> str:
+    """Short, readable list of characters for the status bar."""
+    shown = " ".join(repr(ch) if ch.isspace() or not ch.isprintable() else ch for ch in chars[:limit])
+    if len(chars) > limit:
+        shown += f" (+{len(chars) - limit} more)"
+    return shown
+
+
+def _describe_changes(changes: Analysis, items_fixed: int = 0) -> str:
+    """Status bar summary of an analysis, biggest category first, then item names fixed."""
+    counts = sorted(changes.counts().items(), key=lambda item: -item[1])
+    parts = [f"{count} {CHANGE_LABELS.get(category, category)}" for category, count in counts if category != "item"]
+    shown = ", ".join(parts) + (" and more" if changes.truncated else "")
+    if items_fixed:
+        names = "item name" if items_fixed == 1 else "item names"
+        shown = f"{shown}, {items_fixed} {names} fixed" if shown else f"{items_fixed} {names} fixed"
+    return shown
+
+
+def _visible_change(text: str, category: str) -> str:
+    """What to show for changed characters that would otherwise be invisible."""
+    if category == "invisible":
+        return "\u25af" * len(text)
+    if category == "newline":
+        return text.replace("\r\n", "\n").replace("\r", "\n").replace("\n", "\u21b5\n")
+    return text
+
+
+def _install_startup_probe(app: tk.Tk, path: str) -> None:
+    # Used by benchmarks/bench_startup.py: note when the window first maps, then quit
+    def on_map(event) -> None:
+        if event.widget is not app:
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(repr(time.time()))
+        app.after(0, app.destroy)
+
+    app.bind("<Map>", on_map, add=True)
 
 
 def main() -> None:
+    if "--headless" in sys.argv[1:]:
+        # No window at all; see daemon.py for the options
+        import daemon
+
+        sys.exit(daemon.main([arg for arg in sys.argv[1:] if arg != "--headless"]))
     app = ClipboardCleanerApp()
+    probe = os.environ.get("PASTEPRIME_STARTUP_PROBE")
+    if probe:
+        _install_startup_probe(app, probe)
     try:
         app.mainloop()
     except KeyboardInterrupt:
@@ -517,5 +1244,3 @@ def main() -> None:
 
 if __name__ == "__main__":
     main()
-
-
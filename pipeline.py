@@ -0,0 +1,480 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, List, Optional, Tuple, TypeVar
+import sys
+import threading
+import time
+
+import diagnostics
+from cleaner import STREAM_PIECE_SIZE, CleanCache, analyze, clean_stream, text_digest
+from clipboard import ClipboardBackend, PollSchedule
+
+T = TypeVar("T")
+
+# Texts longer than this are cleaned piece by piece so a newer clipboard
+# change can cancel them part way; shorter ones go through the cache
+CANCELLABLE_ABOVE = 4 * STREAM_PIECE_SIZE
+# While cleaning something big, look at the clipboard at most this often
+PROBE_INTERVAL = 0.05
+# New clipboard contents longer than this follow the large-payload policy
+# instead of being cleaned on the spot
+LARGE_PAYLOAD_CHARS = 1_000_000
+# "defer": clean later, behind any other work; "skip": leave it alone until
+# asked (clean_now); "clean": no special treatment
+LARGE_POLICIES = ("defer", "skip", "clean")
+
+
+class SeenText:
+    """The last clipboard text seen, without holding on to big ones.
+
+    Texts up to keep_up_to chars are kept and compared as they are. Longer
+    ones are remembered only by length and digest, so a huge copy isn't held
+    an extra time just to notice that it hasn't changed.
+    """
+
+    def __init__(self, keep_up_to: int = LARGE_PAYLOAD_CHARS) -> None:
+        self.keep_up_to = keep_up_to
+        # The text itself, when it was small enough to keep
+        self.text: Optional[str] = None
+        self._fingerprint: Optional[Tuple[int, bytes]] = None
+
+    def matches(self, text: str) -> bool:
+        if self.text is not None:
+            return text == self.text
+        seen = self._fingerprint
+        # Length first: a changed big copy almost never needs hashing
+        return seen is not None and seen[0] == len(text) and seen[1] == text_digest(text)
+
+    def mark(self, text: str) -> None:
+        if self.keep_up_to <= 0 or len(text) <= self.keep_up_to:
+            self.text = text
+            self._fingerprint = None
+        else:
+            self.text = None
+            self._fingerprint = (len(text), text_digest(text))
+
+    def clear(self) -> None:
+        self.text = None
+        self._fingerprint = None
+
+
+class UiChannel:
+    """The one way worker threads get work onto the Tk thread.
+
+    post() may be called from any thread. Callbacks run in order on the Tk
+    thread, a whole batch per after(0) instead of one after() per event.
+    """
+
+    def __init__(self, widget) -> None:
+        self._widget = widget
+        self._ui_thread = threading.get_ident()
+        self._queue: Deque[Callable[[], None]] = deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._closed = False
+
+    def post(self, fn: Callable[[], None]) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._queue.append(fn)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        try:
+            self._schedule(self._drain)
+        except Exception:
+            # Window already gone (or Tk not running yet); nothing to deliver to
+            with self._lock:
+                self._scheduled = False
+
+    def call(self, fn: Callable[[], T], timeout: float = 5.0) -> T:
+        """Run fn on the Tk thread and wait for its result."""
+        if threading.get_ident() == self._ui_thread:
+            return fn()
+        future: "Future[T]" = Future()
+
+        def run() -> None:
+            try:
+                future.set_result(fn())
+            except Exception as e:
+                future.set_exception(e)
+
+        self.post(run)
+        return future.result(timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._queue.clear()
+
+    def _drain(self) -> None:
+        with self._lock:
+            self._scheduled = False
+            batch = list(self._queue)
+            self._queue.clear()
+        for fn in batch:
+            try:
+                fn()
+            except Exception:
+                self._report()
+
+    def _schedule(self, fn: Callable[[], None]) -> None:
+        self._widget.after(0, fn)
+
+    def _report(self) -> None:
+        # Same reporting as an exception in a plain after() callback
+        self._widget.report_callback_exception(*sys.exc_info())
+
+
+class LoopChannel(UiChannel):
+    """UiChannel for an event loop without Tk, like the headless daemon's.
+
+    call_soon must be safe to call from any thread and run its argument on
+    the loop thread; report gets the exception from a callback that failed.
+    """
+
+    def __init__(self, call_soon: Callable[[Callable[[], None]], None], report: Callable[[Exception], None]) -> None:
+        super().__init__(None)
+        self._call_soon = call_soon
+        self._report_error = report
+
+    def _schedule(self, fn: Callable[[], None]) -> None:
+        self._call_soon(fn)
+
+    def _report(self) -> None:
+        self._report_error(sys.exc_info()[1])
+
+
+class PipelineResult:
+    """What one pipeline job did, handed to the publish callback."""
+
+    __slots__ = ("kind", "original", "cleaned", "wrote", "deferred", "started", "before_items", "item_spans", "error")
+
+    def __init__(
+        self,
+        kind: str,
+        original: Optional[str],
+        cleaned: str,
+        wrote: bool,
+        deferred: int = 0,
+        started: float = 0.0,
+        before_items: Optional[str] = None,
+        item_spans: Optional[List[Tuple[int, int]]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        # "check" (clipboard changed), "manual", "refresh", "preview" or
+        # "deferred" (a large copy cleaned later, see large_policy)
+        self.kind = kind
+        # None when the clipboard was empty or not text
+        self.original = original
+        self.cleaned = cleaned
+        # Whether the cleaned text was written back to the clipboard
+        self.wrote = wrote
+        # Length of a large copy that was deferred or skipped rather than
+        # cleaned; original and cleaned are then None and ""
+        self.deferred = deferred
+        # time.perf_counter() when the job began, before the clipboard was read
+        self.started = started
+        # When fixing item names changed something: the text as it was before,
+        # and the (start, end) spans in it that were replaced
+        self.before_items = before_items
+        self.item_spans = item_spans or []
+        # Why a manual clean didn't happen (paused, superseded, clipboard
+        # error); original and cleaned are then None and ""
+        self.error = error
+
+
+class _Superseded(Exception):
+    """A newer request made the running job pointless."""
+
+
+class ClipboardPipeline:
+    """Clipboard reads, cleaning and write-back on one worker thread.
+
+    Requests (check, clean_now, refresh, preview) may come from any thread.
+    A request of the same kind as one still waiting replaces it, so a burst
+    of clipboard changes costs one read. Results go to publish(), called on
+    the worker thread. Every clean_now() gets a result, with error set when
+    it couldn't be done.
+
+    A clean that is still running when the clipboard changes again is
+    dropped instead of finished: big texts are cleaned in pieces, with a
+    look at the clipboard between them, and nothing is written back over
+    newer contents.
+
+    A new clipboard text longer than large_above chars is handled by
+    large_policy: "defer" publishes a result with deferred set and cleans it
+    once nothing else is waiting, "skip" only publishes that result, and
+    "clean" treats it like any other text.
+
+    Backends that aren't thread_safe (TkClipboard) are called through
+    call_on_ui, which must run its argument on their thread and return the
+    result; reads skip it when the backend has thread_safe_reads. With a
+    poll schedule, the worker also polls on its own, as often as the
+    schedule says.
+    """
+
+    def __init__(
+        self,
+        clipboard: Optional[ClipboardBackend],
+        cache: CleanCache,
+        publish: Callable[[PipelineResult], None],
+        *,
+        call_on_ui: Optional[Callable[[Callable[[], Any]], Any]] = None,
+        poll: Optional[PollSchedule] = None,
+    ) -> None:
+        self._clipboard = clipboard
+        self._cache = cache
+        self._publish = publish
+        self._call_on_ui = call_on_ui
+        self.poll = poll
+        # Options, set from the UI thread; each job reads them once when it starts
+        self.enabled = True
+        self.auto_clean = True
+        self.ascii_only = False
+        self.rules = None
+        # Item names to fix the spelling of after cleaning (items.ItemIndex)
+        self.items = None
+        self.large_above = LARGE_PAYLOAD_CHARS
+        self.large_policy = "defer"
+        # Last clipboard text seen (or written); only the worker changes it
+        self.seen = SeenText(self.large_above)
+        self._jobs: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._working = False
+        self._last_probe = 0.0
+        self._thread = threading.Thread(target=self._run, name="clipboard-pipeline", daemon=True)
+        self._thread.start()
+
+    def check(self) -> None:
+        """The clipboard may have changed; read it and auto-clean if it did."""
+        self._post("check")
+
+    def clean_now(self) -> None:
+        """Clean the clipboard and write it back, whatever auto_clean says."""
+        self._post("manual")
+
+    def boost(self) -> None:
+        """A copy is likely soon (hotkey, window focus): poll now and at full rate."""
+        if self.poll is None:
+            return
+        self.poll.boost()
+        self.check()
+
+    @property
+    def idle(self) -> bool:
+        """Nothing queued or running (though a poll may be due)."""
+        with self._cond:
+            return not self._jobs and not self._working
+
+    def refresh(self) -> None:
+        """Re-clean the last clipboard text, e.g. after the options changed."""
+        self._post("refresh")
+
+    def preview(self, text: str) -> None:
+        """Clean text for the preview without touching the clipboard."""
+        self._post("preview", text)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._jobs.clear()
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+
+    def _post(self, kind: str, payload: Optional[str] = None) -> None:
+        with self._cond:
+            self._jobs.pop(kind, None)
+            self._jobs[kind] = payload
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._jobs and not self._stopped:
+                    timeout = self.poll.interval if self.poll is not None else None
+                    if not self._cond.wait(timeout) and timeout is not None:
+                        # Timed out: time for a poll
+                        self._jobs["check"] = None
+                if self._stopped:
+                    return
+                # A deferred clean waits for everything else
+                kind = next((k for k in self._jobs if k != "deferred"), "deferred")
+                payload = self._jobs.pop(kind)
+                self._working = True
+            started = time.perf_counter()
+            try:
+                self._handle(kind, payload)
+            except _Superseded:
+                self._failed(kind, "the clipboard changed while it was being cleaned", started)
+            except Exception as e:
+                # Clipboard unavailable or the UI went away; try again next time
+                self._failed(kind, f"{type(e).__name__}: {e}", started)
+            finally:
+                with self._cond:
+                    self._working = False
+
+    def _failed(self, kind: str, error: str, started: float) -> None:
+        # Someone is waiting on a manual clean; the rest just try again later
+        if kind != "manual":
+            return
+        try:
+            self._publish(PipelineResult(kind, None, "", False, started=started, error=error))
+        except Exception:
+            pass
+
+    def _handle(self, kind: str, payload: Optional[str]) -> None:
+        if kind == "manual" and not self.enabled:
+            self._failed(kind, "paused", time.perf_counter())
+            return
+        if kind in ("check", "deferred") and not self.enabled:
+            return
+        start = time.perf_counter()
+        original: Optional[str]
+        if kind == "preview":
+            original = payload
+        elif kind == "refresh" and self.seen.text is not None:
+            original = self.seen.text
+        else:
+            with diagnostics.span("poll.read"):
+                original = self._paste()
+        if not isinstance(original, str):
+            if kind == "check" and self.poll is not None:
+                self.poll.polled(False)
+            if kind == "manual":
+                self._publish(PipelineResult(kind, None, "", False, started=start))
+            return
+        if kind == "check":
+            unchanged = self.seen.matches(original)
+            if self.poll is not None:
+                self.poll.polled(not unchanged)
+            if unchanged:
+                diagnostics.record("poll.cycle", time.perf_counter() - start)
+                return
+            self.seen.keep_up_to = self.large_above
+            self.seen.mark(original)
+            if self._held_back(kind, original, start):
+                diagnostics.record("poll.cycle", time.perf_counter() - start)
+                return
+        elif kind == "deferred":
+            # Re-read when its turn came; a different text is the next check's business
+            if not self.seen.matches(original):
+                return
+        elif kind == "refresh" and self._held_back(kind, original, start):
+            return
+
+        with diagnostics.span("poll.clean"):
+            before_items, cleaned, item_spans = self._clean(kind, original)
+        wrote = False
+        if (kind == "manual" or (kind in ("check", "deferred") and self.auto_clean)) and cleaned != original:
+            # A slow clean leaves time for the user to copy something else; don't overwrite it
+            if time.perf_counter() - start > PROBE_INTERVAL and self._paste() != original:
+                raise _Superseded
+            # Set before copying, event-driven watchers re-check right away
+            self.seen.mark(cleaned)
+            with diagnostics.span("poll.write"):
+                self._copy(cleaned)
+            wrote = True
+        elif kind == "manual":
+            self.seen.mark(cleaned)
+        if kind == "check":
+            diagnostics.record("poll.cycle", time.perf_counter() - start)
+        if not item_spans:
+            before_items = None
+        self._publish(
+            PipelineResult(
+                kind, original, cleaned, wrote, started=start, before_items=before_items, item_spans=item_spans
+            )
+        )
+
+    def _held_back(self, kind: str, text: str, start: float) -> bool:
+        """Apply large_policy to a text; True when it isn't to be cleaned now."""
+        policy = self.large_policy
+        if policy == "clean" or self.large_above <= 0 or len(text) <= self.large_above:
+            return False
+        # Already clean costs one scan, so there's nothing to hold back
+        if not analyze(text, ascii_only=self.ascii_only, rules=self.rules, limit=1).needs_cleaning:
+            return False
+        if kind == "check":
+            if policy == "defer":
+                self._post("deferred")
+            self._publish(PipelineResult(kind, None, "", False, deferred=len(text), started=start))
+        # A refresh only feeds the preview and gives way to anything newer
+        return policy == "skip" or kind == "check"
+
+    def _clean(self, kind: str, text: str) -> Tuple[str, str, List[Tuple[int, int]]]:
+        # (text before fixing item names, final text, spans of names fixed)
+        cleaned = self._clean_text(kind, text)
+        items = self.items
+        if items is None:
+            return cleaned, cleaned, []
+        with diagnostics.span("clean.items"):
+            fixed, spans = items.canonicalize_spans(cleaned, ascii_only=self.ascii_only)
+        return cleaned, fixed, spans
+
+    def _clean_text(self, kind: str, text: str) -> str:
+        ascii_only = self.ascii_only
+        rules = self.rules
+        if len(text) <= CANCELLABLE_ABOVE:
+            return self._cache.clean(text, ascii_only=ascii_only, rules=rules)
+        if not analyze(text, ascii_only=ascii_only, rules=rules, limit=1).needs_cleaning:
+            return text
+        out = []
+        for piece in clean_stream((text,), ascii_only=ascii_only, rules=rules):
+            if self._superseded(kind, text):
+                raise _Superseded
+            out.append(piece)
+        return "".join(out)
+
+    def _superseded(self, kind: str, original: str) -> bool:
+        with self._cond:
+            if self._stopped:
+                return True
+            pending = set(self._jobs)
+        if kind in ("refresh", "preview"):
+            # Preview-only work; anything newer replaces it
+            return bool(pending)
+        if not pending & {"check", "manual"}:
+            return False
+        now = time.perf_counter()
+        if now - self._last_probe < PROBE_INTERVAL:
+            return False
+        self._last_probe = now
+        try:
+            current = self._paste()
+        except Exception:
+            return False
+        if current != original:
+            return True
+        with self._cond:
+            # Same text still on the clipboard; the waiting check would find nothing new
+            self._jobs.pop("check", None)
+        return False
+
+    def _paste(self) -> Optional[str]:
+        if self._clipboard is None:
+            return None
+        if self._clipboard.thread_safe_reads or self._call_on_ui is None:
+            return self._clipboard.paste()
+        return self._call_on_ui(self._clipboard.paste)
+
+    def _copy(self, text: str) -> None:
+        if self._clipboard.thread_safe or self._call_on_ui is None:
+            self._clipboard.copy(text)
+        else:
+            self._call_on_ui(lambda: self._clipboard.copy(text))
@@ -0,0 +1,310 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Pattern, Tuple
+import hashlib
+import json
+import os
+import re
+import sys
+import unicodedata
+
+
+# Bump when the cache layout or the compiler changes
+CACHE_VERSION = 3
+
+
+class RulesError(ValueError):
+    """The rules file couldn't be read or isn't in the expected format."""
+
+
+def config_dir() -> str:
+    """The per-user folder for PastePrime's config files."""
+    if sys.platform.startswith("win"):
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "PastePrime")
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "pasteprime")
+
+
+def default_rules_path() -> str:
+    """Where the user's rules file lives (PASTEPRIME_RULES overrides it)."""
+    return os.environ.get("PASTEPRIME_RULES") or os.path.join(config_dir(), "rules.json")
+
+
+class RuleSet:
+    """User replacement rules, compiled for one pass over the text.
+
+    Single-character rules are merged into the cleaner's translate table.
+    Longer patterns are compiled into one regex shaped like a trie, so each
+    position costs one walk down the trie rather than a try per rule, and
+    the longest pattern wins where several start at the same place.
+
+    Patterns are matched after NFKC, so they're normalized the same way.
+    The regex is only compiled when it's first used.
+    """
+
+    def __init__(self, rules: Dict[str, str]) -> None:
+        self.single: Dict[int, Optional[str]] = {}
+        self.multi: Dict[str, str] = {}
+        for src, dst in rules.items():
+            src = unicodedata.normalize("NFKC", src)
+            if not src:
+                continue
+            if len(src) == 1:
+                self.single[ord(src)] = dst or None
+            else:
+                self.multi[src] = dst
+        self.max_len = max((len(src) for src in self.multi), default=0)
+        self.pattern_source = _trie_regex(self.multi) if self.multi else None
+        self._pattern: Optional[Pattern[str]] = None
+        self.fingerprint = hashlib.sha1(
+            json.dumps(sorted(rules.items()), ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+
+    @classmethod
+    def from_cache(cls, payload: dict) -> "RuleSet":
+        """Rebuild a rule set from to_cache() output, skipping normalization and hashing."""
+        self = cls.__new__(cls)
+        self.single = {code: dst for code, dst in payload["single"]}
+        self.multi = payload["multi"]
+        self.max_len = payload["max_len"]
+        self.pattern_source = payload["pattern"]
+        self._pattern = None
+        self.fingerprint = payload["fingerprint"]
+        return self
+
+    def to_cache(self) -> dict:
+        return {
+            # JSON keys are strings, so the code points go in as pairs
+            "single": sorted(self.single.items()),
+            "multi": self.multi,
+            "max_len": self.max_len,
+            "pattern": self.pattern_source,
+            "fingerprint": self.fingerprint,
+        }
+
+    @property
+    def pattern(self) -> Optional[Pattern[str]]:
+        # Compiling is most of the cost of a big rules file; nothing is lost
+        # if two threads race to do it
+        if self._pattern is None and self.pattern_source:
+            self._pattern = re.compile(self.pattern_source)
+        return self._pattern
+
+    def __len__(self) -> int:
+        return len(self.single) + len(self.multi)
+
+    def __repr__(self) -> str:
+        return f"RuleSet({len(self.single)} single, {len(self.multi)} multi)"
+
+    def apply(self, text: str) -> str:
+        """Replace multi-character patterns (single characters go via translate)."""
+        if self.pattern is None:
+            return text
+        return self.pattern.sub(self._replacement, text)
+
+    def stream(self, pieces: Iterable[str]) -> Iterator[str]:
+        """apply() over a stream, holding back only what a match could still span."""
+        if self.pattern is None:
+            yield from pieces
+            return
+        carry = ""
+        for piece in pieces:
+            buf = carry + piece
+            # A match starting before `safe` fits entirely in buf, so more
+            # input can't change it; anything later waits for the next piece
+            safe = len(buf) - self.max_len + 1
+            out = []
+            pos = 0
+            for match in self.pattern.finditer(buf):
+                if match.start() >= safe:
+                    break
+                out.append(buf[pos:match.start()])
+                out.append(self.multi[match.group()])
+                pos = match.end()
+            cut = max(pos, safe)
+            out.append(buf[pos:cut])
+            carry = buf[cut:]
+            yield "".join(out)
+        if carry:
+            yield self.apply(carry)
+
+    def _replacement(self, match) -> str:
+        return self.multi[match.group()]
+
+
+def _trie_regex(patterns: Iterable[str]) -> str:
+    trie: dict = {}
+    for pattern in patterns:
+        node = trie
+        for ch in pattern:
+            node = node.setdefault(ch, {})
+        node[""] = True
+    return _node_regex(trie) or ""
+
+
+def _node_regex(node: dict) -> Optional[str]:
+    alternatives = []
+    leaves = []
+    for ch in sorted(k for k in node if k):
+        rest = _node_regex(node[ch])
+        if rest is None:
+            leaves.append(re.escape(ch))
+        else:
+            alternatives.append(re.escape(ch) + rest)
+    if leaves:
+        alternatives.append(leaves[0] if len(leaves) == 1 else "[" + "".join(leaves) + "]")
+    if not alternatives:
+        return None
+    body = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    if "" in node:
+        # A pattern ends here but longer ones continue; greedy ? prefers them
+        body = "(?:" + body + ")?"
+    return body
+
+
+def _parse_rules(data: bytes, path: str) -> Dict[str, str]:
+    try:
+        doc = json.loads(data.decode("utf-8-sig"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise RulesError(f"{path}: {e}") from e
+    rules = doc.get("replacements") if isinstance(doc, dict) else None
+    if not isinstance(rules, dict) or not all(isinstance(k, str) and isinstance(v, str) for k, v in rules.items()):
+        raise RulesError(f'{path}: expected {{"replacements": {{"from": "to", ...}}}}')
+    return rules
+
+
+def load_cached(
+    path: str,
+    cache_path: Optional[str],
+    version: int,
+    error: type,
+    build: Callable[[bytes], Tuple[Any, Any]],
+    restore: Callable[[Any], Any],
+) -> Any:
+    """Build something from a file's bytes, reusing the copy cached on disk when it's current.
+
+    build(data) returns (value, payload), payload being what goes in the
+    cache; restore(payload) turns the cached copy back into a value. The
+    cache sits next to the file unless cache_path is given. It's keyed by
+    the file's modification time and size, like WatchedFile, so a current
+    cache is used without reading the file at all. A file that can't be
+    read raises error.
+    """
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        raise error(f"{path}: {e.strerror or e}") from e
+    source = [st.st_mtime_ns, st.st_size]
+    if cache_path is None:
+        cache_path = path + ".cache"
+
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("version") == version and cached.get("source") == source:
+            return restore(cached["data"])
+    except (OSError, ValueError, KeyError, TypeError):
+        # Missing or stale cache; rebuild below
+        pass
+
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise error(f"{path}: {e.strerror or e}") from e
+    value, payload = build(data)
+    try:
+        tmp = cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "source": source, "data": payload}, f, ensure_ascii=False)
+        os.replace(tmp, cache_path)
+    except OSError:
+        # Read-only config dir; building again next time is fine
+        pass
+    return value
+
+
+def load_rules(path: str, *, cache_path: Optional[str] = None) -> RuleSet:
+    """Load a rules file, reusing the on-disk prepared copy when it's current.
+
+    The cache sits next to the rules file unless cache_path is given. It
+    holds the normalized rules, the regex source and the fingerprint; the
+    regex itself is compiled on first use.
+    """
+
+    def build(data: bytes):
+        ruleset = RuleSet(_parse_rules(data, path))
+        return ruleset, ruleset.to_cache()
+
+    return load_cached(path, cache_path, CACHE_VERSION, RulesError, build, RuleSet.from_cache)
+
+
+class WatchedFile:
+    """A config file that reloads itself when it changes on disk.
+
+    Call reload_if_changed() periodically; it only stats the file unless the
+    modification time or size moved. value is None while there is no file.
+    Subclasses say how to load it and which error means a bad file.
+    """
+
+    error_type: type = ValueError
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.value = None
+        self.error: Optional[str] = None
+        self._stamp: Optional[tuple] = None
+
+    def reload_if_changed(self) -> bool:
+        """Reload if the file changed. True when value (or error) changed."""
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        if stamp is None:
+            changed = self.value is not None or self.error is not None
+            self.value = None
+            self.error = None
+            return changed
+        try:
+            self.value = self._load(self.path)
+            self.error = None
+        except self.error_type as e:
+            # Keep using the last good copy until the file is fixed
+            self.error = str(e)
+        return True
+
+    def _load(self, path: str):
+        raise NotImplementedError
+
+
+class RuleFile(WatchedFile):
+    """The user's rules file, reloaded when it changes; rules is None while there is none."""
+
+    error_type = RulesError
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        super().__init__(path or default_rules_path())
+
+    @property
+    def rules(self) -> Optional[RuleSet]:
+        return self.value
+
+    def _load(self, path: str) -> RuleSet:
+        return load_rules(path)
@@ -0,0 +1,163 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import platform
+import threading
+import time
+import unicodedata
+
+from cleaner import text_digest
+from pipeline import PipelineResult
+
+
+# How much of each copy goes into the log
+CONTENT_MODES = ("none", "redacted", "full")
+# Copies longer than this are logged by size only, whatever the mode
+MAX_LOGGED_CHARS = 64 * 1024
+SESSION_VERSION = 1
+
+
+def redact(text: str) -> str:
+    """text with every letter and digit masked, same length.
+
+    Only the punctuation, invisible characters and whitespace the cleaner
+    acts on are kept. Masks keep a little of the shape that matters for
+    replay: non-ASCII letters stay non-ASCII, and compatibility forms (ﬁ,
+    fullwidth, superscripts) are masked with one, so replayed copies still
+    take the cleaner's slower paths.
+    """
+    return "".join(map(_mask, text))
+
+
+@lru_cache(maxsize=4096)
+def _mask(ch: str) -> str:
+    kind = unicodedata.category(ch)[0]
+    if kind not in "LN":
+        return ch
+    if ch.isascii():
+        return "0" if kind == "N" else "X" if ch.isupper() else "x"
+    if unicodedata.normalize("NFKC", ch) != ch:
+        return "\uff58"  # fullwidth x
+    return "\u0660" if kind == "N" else "\u0100" if ch.isupper() else "\u0101"
+
+
+def digest(text: str) -> str:
+    return text_digest(text).hex()
+
+
+class SessionRecorder:
+    """Writes clipboard events to a JSON-lines file for benchmarks.replay_session.
+
+    The first line describes the session, every later line is one event:
+
+        {"t": 1.52, "event": "copy", "size": 120, "digest": "…", "text": "…"}
+        {"t": 3.07, "event": "manual"}
+
+    t is seconds since recording started. A "copy" is new clipboard contents
+    as the app saw them; "text" is only there in the redacted and full
+    content modes, and only for copies up to max_chars. "manual" is a press
+    of Clean & Copy. Events may come from any thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        content: str = "none",
+        max_chars: int = MAX_LOGGED_CHARS,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if content not in CONTENT_MODES:
+            raise ValueError(f"content must be one of {', '.join(CONTENT_MODES)}")
+        self.path = path
+        self.content = content
+        self.max_chars = max_chars
+        self.events = 0
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._file = open(path, "w", encoding="utf-8")
+        header = {
+            "version": SESSION_VERSION,
+            "started": time.time(),
+            "content": content,
+            "platform": platform.platform(),
+            **(meta or {}),
+        }
+        self._write(header)
+
+    @classmethod
+    def from_env(cls, **meta: Any) -> Optional["SessionRecorder"]:
+        """A recorder when PASTEPRIME_RECORD names a file, otherwise None.
+
+        PASTEPRIME_RECORD_CONTENT picks the content mode (default "none").
+        """
+        path = os.environ.get("PASTEPRIME_RECORD")
+        if not path:
+            return None
+        return cls(path, content=os.environ.get("PASTEPRIME_RECORD_CONTENT", "none"), meta=meta)
+
+    def record_result(self, result: PipelineResult) -> None:
+        """Log the user action behind a ClipboardPipeline result, if any."""
+        if result.kind == "manual":
+            self.record("manual", at=result.started)
+        elif result.kind == "check" and result.deferred:
+            # Too big to have been looked at yet; all we know is its size
+            self.record("copy", at=result.started, size=result.deferred)
+        elif result.kind == "check" and result.original is not None:
+            self.copy(result.original, at=result.started)
+
+    def copy(self, text: str, *, at: Optional[float] = None) -> None:
+        fields: Dict[str, Any] = {"size": len(text), "digest": digest(text)}
+        if self.content != "none" and len(text) <= self.max_chars:
+            fields["text"] = text if self.content == "full" else redact(text)
+        self.record("copy", at=at, **fields)
+
+    def record(self, event: str, *, at: Optional[float] = None, **fields: Any) -> None:
+        """Log an event. at is its time.perf_counter(), default now."""
+        t = (time.perf_counter() if at is None else at) - self._start
+        self._write({"t": round(max(0.0, t), 4), "event": event, **fields})
+        self.events += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, obj: Dict[str, Any]) -> None:
+        # ASCII escapes keep lone surrogates from breaking the UTF-8 file
+        line = json.dumps(obj)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            # A crash is exactly when the log matters
+            self._file.flush()
+
+
+def read_session(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """(header, events) of a file written by SessionRecorder, events in time order."""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"{path} is empty")
+    header = json.loads(lines[0])
+    if header.get("version") != SESSION_VERSION:
+        raise ValueError(f"{path}: unsupported session version {header.get('version')!r}")
+    events = [json.loads(line) for line in lines[1:]]
+    events.sort(key=lambda event: event["t"])
+    return header, events
@@ -0,0 +1,200 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# Run from the repo root:
+#
+#   python -m unittest discover tests      (or: python -m pytest tests)
+
+from typing import List
+import importlib.util
+import random
+import unittest
+
+from cleaner import STREAM_PIECE_SIZE, CleanCache, TextCleaner, analyze, clean_stream, clean_text, common_affixes, force_ascii
+from rules import RuleSet
+
+OPTIONS = [(ascii_only, single_line) for ascii_only in (False, True) for single_line in (True, False)]
+
+# Each of these composes in NFKC although no part is a combining mark
+COMPOSING = [
+    "가",         # Hangul jamo -> U+AC00
+    "각",   # ... with a final consonant -> U+AC01
+    "ୋ",         # Oriya two-part vowel -> U+0B4B
+    "ୌ",         # -> U+0B4C
+    "ො",         # Sinhala two-part vowel -> U+0DDC
+    "é",              # plain combining mark -> é
+]
+
+# Bits of text that cleaning does (or deliberately doesn't) touch
+ALPHABET = list("ab Z9.,'\t\r\n") + [
+    "  ", " ", "​", "﻿", "’", "“", "—", "…", "ﬁ", "ａ",
+    "é", "　", "ẛ̣", "\U0001F600", "а", "\x1c", "\x1a", "́", "̣",
+    "̇", "ְ", "ֱ",
+] + [ch for pair in COMPOSING for ch in pair]
+
+
+def random_texts(seed: int, count: int, max_parts: int = 8) -> List[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, max_parts))) for _ in range(count)]
+
+
+def random_chunks(rng: random.Random, text: str, max_size: int) -> List[str]:
+    # Cuts anywhere, including between "\r\n" and between a char and its marks
+    chunks = []
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(0, max_size)
+        chunks.append(text[pos:pos + size])
+        pos += size
+    return chunks
+
+
+class AnalyzeTest(unittest.TestCase):
+    def test_composing_sequences_need_cleaning(self):
+        for text in COMPOSING:
+            for wrapped in (text, f"x {text} y", f"{text}{text}"):
+                with self.subTest(text=wrapped):
+                    self.assertNotEqual(clean_text(wrapped), wrapped)
+                    analysis = analyze(wrapped)
+                    self.assertTrue(analysis.needs_cleaning)
+                    self.assertEqual({category for _, _, category in analysis.changes}, {"unicode"})
+
+    def test_needs_cleaning_matches_clean_text(self):
+        for ascii_only in (False, True):
+            for single_line in (True, False):
+                for text in random_texts(7, 3000):
+                    with self.subTest(text=text, ascii_only=ascii_only, single_line=single_line):
+                        changed = clean_text(text, ascii_only=ascii_only, single_line=single_line) != text
+                        analysis = analyze(text, ascii_only=ascii_only, single_line=single_line)
+                        self.assertEqual(analysis.needs_cleaning, changed)
+                        self.assertEqual(analyze(text, ascii_only=ascii_only, single_line=single_line, limit=1).needs_cleaning, changed)
+
+    def test_spans_and_categories(self):
+        analysis = analyze("it’s  a ​test… Ａ")
+        self.assertEqual(
+            analysis.changes,
+            [(2, 3, "punctuation"), (5, 6, "whitespace"), (8, 9, "invisible"), (13, 14, "punctuation"), (15, 16, "unicode")],
+        )
+        self.assertFalse(analyze("already clean text").needs_cleaning)
+
+    def test_limit_truncates(self):
+        analysis = analyze("’a’b’c", limit=2)
+        self.assertTrue(analysis.truncated)
+        self.assertEqual(len(analysis.changes), 2)
+
+
+class CommonAffixesTest(unittest.TestCase):
+    def test_prefix_and_suffix_never_overlap(self):
+        self.assertEqual(common_affixes("abcxdef", "abcydef"), (3, 3))
+        self.assertEqual(common_affixes("aaa", "aaaa"), (3, 0))
+        self.assertEqual(common_affixes("", "abc"), (0, 0))
+        for old in random_texts(15, 300):
+            for new in random_texts(16, 20):
+                with self.subTest(old=old, new=new):
+                    prefix, suffix = common_affixes(old, new)
+                    self.assertLessEqual(prefix + suffix, min(len(old), len(new)))
+                    self.assertEqual(old[:prefix], new[:prefix])
+                    self.assertEqual(old[len(old) - suffix:], new[len(new) - suffix:])
+
+
+class CleanCacheTest(unittest.TestCase):
+    def test_results_match_clean_text(self):
+        cache = CleanCache()
+        for text in random_texts(13, 200):
+            for ascii_only, single_line in OPTIONS:
+                with self.subTest(text=text, ascii_only=ascii_only, single_line=single_line):
+                    expected = clean_text(text, ascii_only=ascii_only, single_line=single_line)
+                    self.assertEqual(cache.clean(text, ascii_only=ascii_only, single_line=single_line), expected)
+                    self.assertEqual(cache.clean(text, ascii_only=ascii_only, single_line=single_line), expected)
+
+    def test_ascii_flip_reuses_the_entry(self):
+        cache = CleanCache()
+        text = "WTS “Ash Prime”  ﬁsh…"
+        cache.clean(text)
+        cache.clean(text, ascii_only=True)
+        cache.clean(text, ascii_only=True)
+        self.assertEqual((cache.misses, cache.partial_hits, cache.hits), (1, 1, 1))
+        self.assertEqual(len(cache), 1)
+
+    def test_clean_text_is_not_stored(self):
+        cache = CleanCache()
+        self.assertEqual(cache.clean("WTS Ash Prime 100p"), "WTS Ash Prime 100p")
+        self.assertEqual((len(cache), cache.already_clean), (0, 1))
+
+    def test_rules_are_part_of_the_key(self):
+        cache = CleanCache()
+        text = "wts  ash"
+        self.assertEqual(cache.clean(text), "wts ash")
+        self.assertEqual(cache.clean(text, rules=RuleSet({"wts": "WTS"})), "WTS ash")
+        self.assertEqual(cache.clean(text, rules=RuleSet({"wts": "Selling"})), "Selling ash")
+        self.assertEqual(len(cache), 3)
+
+    def test_evicts_oldest_over_max_bytes(self):
+        cache = CleanCache(max_bytes=2000)
+        texts = [f"{i}  " + "x" * 300 for i in range(10)]
+        for text in texts:
+            cache.clean(text)
+        self.assertLessEqual(cache.size_bytes, 2000)
+        self.assertLess(len(cache), 10)
+        misses = cache.misses
+        cache.clean(texts[-1])
+        self.assertEqual(cache.misses, misses)
+        cache.clean(texts[0])
+        self.assertEqual(cache.misses, misses + 1)
+
+
+class StreamTest(unittest.TestCase):
+    def test_small_chunks_match_clean_text(self):
+        rng = random.Random(11)
+        for ascii_only, single_line in OPTIONS:
+            for text in random_texts(11, 500, max_parts=30):
+                chunks = random_chunks(rng, text, 4)
+                with self.subTest(chunks=chunks, ascii_only=ascii_only, single_line=single_line):
+                    streamed = "".join(clean_stream(chunks, ascii_only=ascii_only, single_line=single_line))
+                    self.assertEqual(streamed, clean_text(text, ascii_only=ascii_only, single_line=single_line))
+
+    def test_pieces_larger_than_stream_piece_size(self):
+        rng = random.Random(12)
+        # Several pieces' worth, so the carry between pieces is exercised too
+        text = "".join(random_texts(12, 8000, max_parts=40))
+        self.assertGreater(len(text), 2 * STREAM_PIECE_SIZE)
+        for ascii_only, single_line in OPTIONS:
+            with self.subTest(ascii_only=ascii_only, single_line=single_line):
+                chunks = random_chunks(rng, text, STREAM_PIECE_SIZE // 3)
+                streamed = "".join(clean_stream(chunks, ascii_only=ascii_only, single_line=single_line))
+                self.assertEqual(streamed, clean_text(text, ascii_only=ascii_only, single_line=single_line))
+
+
+@unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is not installed")
+class BulkTest(unittest.TestCase):
+    # clean_text only takes the numpy path for huge texts, so the engine is
+    # checked directly against it on short ones
+
+    def test_engine_matches_pure_path(self):
+        for ascii_only, single_line in OPTIONS:
+            cleaner = TextCleaner(ascii_only=ascii_only, single_line=single_line)
+            engine = cleaner._bulk_engine()
+            for text in random_texts(13, 2000, max_parts=20):
+                with self.subTest(text=text, ascii_only=ascii_only, single_line=single_line):
+                    bulk = engine.clean(cleaner._prepare(text), ascii_only=ascii_only)
+                    self.assertEqual(bulk, clean_text(text, ascii_only=ascii_only, single_line=single_line))
+
+    def test_to_ascii_matches_force_ascii(self):
+        engine = TextCleaner()._bulk_engine()
+        for text in random_texts(14, 2000, max_parts=20):
+            with self.subTest(text=text):
+                self.assertEqual(engine.to_ascii(text), force_ascii(text))
+
+
+if __name__ == "__main__":
+    unittest.main()
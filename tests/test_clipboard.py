@@ -0,0 +1,91 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# Run from the repo root:
+#
+#   python -m unittest discover tests      (or: python -m pytest tests)
+
+import threading
+import time
+import unittest
+
+from clipboard import PollSchedule
+
+
+class PollScheduleTest(unittest.TestCase):
+    def test_starts_at_floor_while_active(self):
+        schedule = PollSchedule(0.3, 2.0)
+        for _ in range(5):
+            schedule.polled(False)
+        self.assertEqual(schedule.interval, 0.3)
+
+    def test_backs_off_to_ceiling_when_idle(self):
+        schedule = PollSchedule(0.3, 2.0, backoff=2.0, idle_after=0.0)
+        intervals = []
+        for _ in range(5):
+            schedule.polled(False)
+            intervals.append(schedule.interval)
+        self.assertEqual(intervals, [0.6, 1.2, 2.0, 2.0, 2.0])
+
+    def test_change_and_boost_go_back_to_floor(self):
+        schedule = PollSchedule(0.3, 2.0, idle_after=0.0)
+        for _ in range(10):
+            schedule.polled(False)
+        self.assertEqual(schedule.interval, 2.0)
+        schedule.polled(True)
+        self.assertEqual(schedule.interval, 0.3)
+        for _ in range(10):
+            schedule.polled(False)
+        threading.Thread(target=schedule.boost).start()
+        self.assertTrue(wait_until(lambda: schedule.interval == 0.3))
+        stats = schedule.stats()
+        self.assertEqual((stats["polls"], stats["changes"], stats["boosts"]), (21, 1, 1))
+        self.assertAlmostEqual(stats["rate_hz"], 1 / 0.3)
+
+    def test_stays_fast_for_idle_after_a_change(self):
+        schedule = PollSchedule(0.3, 2.0, idle_after=60.0)
+        schedule.polled(True)
+        for _ in range(10):
+            schedule.polled(False)
+        self.assertEqual(schedule.interval, 0.3)
+
+    def test_fixed_rate(self):
+        schedule = PollSchedule(1.0, 1.0, idle_after=0.0)
+        for _ in range(5):
+            schedule.polled(False)
+        self.assertEqual(schedule.interval, 1.0)
+
+    def test_skipped_counts_saved_wakeups(self):
+        schedule = PollSchedule(0.01, 1.0)
+        time.sleep(0.1)
+        schedule.polled(False)
+        self.assertGreaterEqual(schedule.skipped, 5)
+
+    def test_bad_bounds(self):
+        with self.assertRaises(ValueError):
+            PollSchedule(0.0, 1.0)
+        with self.assertRaises(ValueError):
+            PollSchedule(2.0, 1.0)
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+if __name__ == "__main__":
+    unittest.main()
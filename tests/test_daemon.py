@@ -0,0 +1,136 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# Run from the repo root:
+#
+#   python -m unittest discover tests      (or: python -m pytest tests)
+
+from typing import Any, Dict, List
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from clipboard import FakeClipboard
+from daemon import HeadlessCleaner, send_command
+from typing_engine import FakeKeyBackend
+
+
+class BrokenClipboard(FakeClipboard):
+    """Reads fail once broken is set."""
+
+    broken = False
+
+    def _paste(self) -> str:
+        if self.broken:
+            raise OSError("clipboard owner went away")
+        return super()._paste()
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix sockets")
+class DaemonTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "daemon.sock")
+        self.clipboard = BrokenClipboard()
+        self.keys = FakeKeyBackend()
+        # Auto-clean off, or a poll could clean the clipboard before "clean" gets to it
+        self.daemon = HeadlessCleaner(
+            clipboard=self.clipboard, key_backend=self.keys, hotkey=None, auto_clean=False, verbose=False
+        )
+        self.thread = threading.Thread(target=self.daemon.serve, args=(self.path,))
+        self.thread.start()
+        deadline = time.monotonic() + 5.0
+        while not os.path.exists(self.path) and time.monotonic() < deadline:
+            time.sleep(0.005)
+
+    def tearDown(self):
+        self.daemon.stop()
+        self.thread.join(5.0)
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def send(self, cmd: str, **fields: Any) -> Dict[str, Any]:
+        return send_command(cmd, socket_path=self.path, timeout=5.0, **fields)
+
+    def send_lines(self, lines: List[bytes], replies: int) -> List[Dict[str, Any]]:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(5.0)
+            conn.connect(self.path)
+            conn.sendall(b"".join(lines))
+            data = b""
+            while data.count(b"\n") < replies:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+        return [json.loads(line) for line in data.splitlines()]
+
+    def test_clean_text(self):
+        self.assertEqual(self.send("clean", text="Straße “x”  y"), {"ok": True, "text": 'Straße "x" y'})
+        self.assertEqual(self.send("clean", text="Straße", ascii_only=True)["text"], "Strasse")
+
+    def test_clean_clipboard(self):
+        self.clipboard.text = "a​  b"
+        self.assertEqual(self.send("clean"), {"ok": True, "text": "a b", "changed": True})
+        self.assertEqual(self.clipboard.text, "a b")
+
+    def test_replies_keep_request_order(self):
+        self.clipboard.text = "c  d"
+        replies = self.send_lines([b'{"cmd": "clean"}\n', b'{"cmd": "clean", "text": "e  f"}\n', b"{}\n"], 3)
+        self.assertEqual(replies[0]["text"], "c d")
+        self.assertEqual(replies[1]["text"], "e f")
+        self.assertFalse(replies[2]["ok"])
+
+    def test_failed_clipboard_read_answers_right_away(self):
+        self.clipboard.broken = True
+        started = time.monotonic()
+        reply = self.send("clean")
+        self.assertFalse(reply["ok"])
+        self.assertIn("clipboard owner went away", reply["error"])
+        self.assertLess(time.monotonic() - started, 2.0)
+        # And the daemon is still there for the next one
+        self.assertTrue(self.send("stats")["ok"])
+
+    def test_paused_clean_is_refused(self):
+        self.assertTrue(self.send("pause")["ok"])
+        self.assertFalse(self.send("clean")["ok"])
+        self.assertTrue(self.send("resume")["ok"])
+
+    def test_bad_requests_get_errors(self):
+        replies = self.send_lines(
+            [
+                b"not json\n",
+                b'{"cmd": "type", "text": "hi", "delay": "1"}\n',
+                b'{"cmd": "clean", "text": 5}\n',
+                b'{"cmd": "bogus"}\n',
+                b'{"cmd": "clean", "text": "ok"}\n',
+            ],
+            5,
+        )
+        self.assertEqual([reply["ok"] for reply in replies], [False, False, False, False, True])
+
+    def test_type_request_types_cleaned_text(self):
+        reply = self.send("type", text="One  “two”")
+        self.assertTrue(reply["ok"])
+        deadline = time.monotonic() + 5.0
+        while self.keys.text != 'One "two"' and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.keys.text, 'One "two"')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# Run from the repo root:
+#
+#   python -m unittest discover tests      (or: python -m pytest tests)
+
+import threading
+import unittest
+
+from history import ClipboardHistory
+
+
+class HistoryTest(unittest.TestCase):
+    def test_recopied_entry_moves_to_front_on_every_search_path(self):
+        history = ClipboardHistory()
+        one = history.add("alpha message one")
+        two = history.add("alpha message two")
+        self.assertIs(history.add("alpha message one"), one)
+        self.assertEqual(len(history), 2)
+        self.assertEqual(one.times_copied, 2)
+        for query in ("", "al", "alpha", "ALPHA MESS"):
+            with self.subTest(query=query):
+                self.assertEqual(history.search(query), [one, two])
+
+    def test_search_confirms_trigram_hits(self):
+        history = ClipboardHistory()
+        history.add("abc xyz bcd")
+        # Every trigram of "abcd" is in there, but not "abcd" itself
+        self.assertEqual(history.search("abcd"), [])
+        self.assertEqual(len(history.search("bcd")), 1)
+
+    def test_big_texts_are_compressed_and_too_big_ones_skipped(self):
+        history = ClipboardHistory(compress_above=100, max_chars=10_000)
+        text = "WTS Ash Prime Set " * 100
+        entry = history.add(text)
+        self.assertTrue(entry.compressed)
+        self.assertEqual(entry.text, text)
+        self.assertIsNone(history.add("x" * 10_001))
+        self.assertEqual(len(history), 1)
+
+    def test_oldest_entries_go_first(self):
+        history = ClipboardHistory(max_entries=3)
+        for i in range(5):
+            history.add(f"message {i}")
+        self.assertEqual([entry.text for entry in history], ["message 4", "message 3", "message 2"])
+        self.assertEqual(history.search("message 1"), [])
+        self.assertEqual(history.stats()["entries"], 3)
+
+    def test_adds_from_several_threads(self):
+        history = ClipboardHistory(max_entries=10_000)
+
+        def add(offset: int) -> None:
+            for i in range(500):
+                history.add(f"copy {i % 250} of batch {offset % 2}")
+
+        threads = [threading.Thread(target=add, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(history), 500)
+        self.assertEqual(len(history.search("of batch")), 200)
+        self.assertEqual(len(history.search("of batch", limit=1000)), 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
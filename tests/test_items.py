@@ -0,0 +1,106 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# Run from the repo root:
+#
+#   python -m unittest discover tests      (or: python -m pytest tests)
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from items import ItemFile, ItemIndex, load_items
+
+NAMES = [
+    "Ash Prime Set",
+    "Ash Prime",
+    "Primed Continuity",
+    "Arcane Energize",
+    "Forma Blueprint",
+    "Hate",
+    "Sigma & Octantis",
+    "Kavasa Prime Kubrow Collar",
+    "Ember Prime Neuroptics Blueprint",
+]
+
+
+class CanonicalizeTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.items = ItemIndex(NAMES)
+
+    def check(self, text: str, expected: str) -> None:
+        self.assertEqual(self.items.canonicalize(text), expected)
+
+    def test_case_and_longest_name(self):
+        self.check("WTS ash prime set 120p", "WTS Ash Prime Set 120p")
+        self.check("wtb ASH PRIME", "wtb Ash Prime")
+
+    def test_typos(self):
+        self.check("primed contnuity and arcane enrgize", "Primed Continuity and Arcane Energize")
+        self.check("ember prime neuroptcis blueprint", "Ember Prime Neuroptics Blueprint")
+
+    def test_transposed_letters(self):
+        # A swap is one edit, even though it spoils four trigrams
+        self.check("WTS kavsaa prime kubrow collar", "WTS Kavasa Prime Kubrow Collar")
+        self.check("WTS kavasa prime kubrwo collar", "WTS Kavasa Prime Kubrow Collar")
+
+    def test_lowercase_single_words_left_alone(self):
+        self.check("i hate this, want HATE", "i hate this, want Hate")
+
+    def test_english_words_not_pulled_in(self):
+        self.check("prime time, set it", "prime time, set it")
+
+    def test_spans(self):
+        text, spans = self.items.canonicalize_spans("wts sigma & octantis, ash prime")
+        self.assertEqual(text, "wts Sigma & Octantis, Ash Prime")
+        self.assertEqual(spans, [(4, 20), (22, 31)])
+
+
+class ItemFileTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "items.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write(self, body: str) -> None:
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(body)
+
+    def test_cache_round_trip(self):
+        self.write("# comment\nAsh Prime Set\n\nForma Blueprint\n")
+        first = load_items(self.path)
+        self.assertTrue(os.path.exists(self.path + ".cache"))
+        second = load_items(self.path)
+        self.assertEqual(second.names, first.names)
+        self.assertEqual(second.canonicalize("forma blueprint"), "Forma Blueprint")
+
+    def test_reload_keeps_last_good_names(self):
+        item_file = ItemFile(self.path)
+        self.assertFalse(item_file.reload_if_changed())
+        self.write("Ash Prime Set\n")
+        self.assertTrue(item_file.reload_if_changed())
+        self.assertEqual(item_file.items.names, ["Ash Prime Set"])
+        with open(os.path.join(self.dir, "items.json"), "w", encoding="utf-8") as f:
+            f.write("{broken")
+        item_file.path = os.path.join(self.dir, "items.json")
+        self.assertTrue(item_file.reload_if_changed())
+        self.assertIsNotNone(item_file.error)
+        self.assertEqual(item_file.items.names, ["Ash Prime Set"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# Run from the repo root:
+#
+#   python -m unittest discover tests      (or: python -m pytest tests)
+
+from typing import Any, Callable, List
+import threading
+import time
+import unittest
+
+from cleaner import CleanCache
+from clipboard import FakeClipboard
+from items import ItemIndex
+from pipeline import ClipboardPipeline, PipelineResult
+
+
+def wait_until(condition: Callable[[], bool], timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+class PipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.clipboard = FakeClipboard()
+        self.results: List[PipelineResult] = []
+        self.pipeline = ClipboardPipeline(self.clipboard, CleanCache(), self.results.append)
+        # FakeClipboard notifies on every copy, like an event-driven watcher
+        self.clipboard.start(self.pipeline.check)
+
+    def tearDown(self):
+        self.clipboard.stop()
+        self.pipeline.stop()
+
+    def copy(self, text: str, results: int = 1) -> None:
+        expected = len(self.results) + results
+        self.clipboard.copy(text)
+        self.assertTrue(wait_until(lambda: len(self.results) >= expected and self.pipeline.idle))
+
+    def test_copy_is_cleaned_and_written_back(self):
+        self.copy("WTS “Ash Prime”​  set…")
+        self.assertEqual(self.clipboard.text, 'WTS "Ash Prime" set...')
+        result = self.results[-1]
+        self.assertEqual((result.kind, result.wrote), ("check", True))
+        self.assertEqual(result.original, "WTS “Ash Prime”​  set…")
+        # The write-back fired the watcher again, but nothing new came of it
+        self.assertEqual(len(self.results), 1)
+
+    def test_auto_clean_off_leaves_clipboard_alone(self):
+        self.pipeline.auto_clean = False
+        self.copy("a  b")
+        self.assertEqual(self.clipboard.text, "a  b")
+        self.assertFalse(self.results[-1].wrote)
+        self.assertEqual(self.results[-1].cleaned, "a b")
+        self.pipeline.clean_now()
+        self.assertTrue(wait_until(lambda: self.clipboard.text == "a b"))
+
+    def test_large_copy_skipped_until_clean_now(self):
+        self.pipeline.large_above = 10
+        self.pipeline.large_policy = "skip"
+        self.copy("a  b " * 10)
+        self.assertEqual(self.results[-1].deferred, 50)
+        self.assertEqual(self.clipboard.text, "a  b " * 10)
+        self.pipeline.clean_now()
+        self.assertTrue(wait_until(lambda: self.clipboard.text == " ".join(["a b"] * 10)))
+
+    def test_large_copy_deferred_is_cleaned_later(self):
+        self.pipeline.large_above = 10
+        self.copy("a  b " * 10, results=2)
+        self.assertEqual([result.kind for result in self.results], ["check", "deferred"])
+        self.assertEqual(self.clipboard.text, " ".join(["a b"] * 10))
+
+    def test_item_spans_when_only_names_changed(self):
+        self.pipeline.items = ItemIndex(["Ash Prime Set"])
+        self.copy("WTS ash prime set")
+        result = self.results[-1]
+        self.assertEqual(self.clipboard.text, "WTS Ash Prime Set")
+        self.assertEqual(result.before_items, result.original)
+        self.assertEqual(result.item_spans, [(4, 17)])
+
+    def test_disabled_pipeline_ignores_copies(self):
+        self.pipeline.enabled = False
+        self.clipboard.copy("a  b")
+        self.assertTrue(wait_until(lambda: self.pipeline.idle))
+        self.assertEqual(self.clipboard.text, "a  b")
+        self.assertEqual(self.results, [])
+
+
+class SplitThreadClipboard(FakeClipboard):
+    """Like TkClipboard with a reader: paste() from anywhere, copy() on the UI thread only."""
+
+    thread_safe = False
+    thread_safe_reads = True
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.paste_threads: List[str] = []
+        self.copy_threads: List[str] = []
+
+    def _paste(self) -> str:
+        self.paste_threads.append(threading.current_thread().name)
+        return super()._paste()
+
+    def _copy(self, text: str) -> None:
+        self.copy_threads.append(threading.current_thread().name)
+        super()._copy(text)
+
+
+class UiThreadTest(unittest.TestCase):
+    def test_reads_stay_on_worker_and_writes_go_to_ui(self):
+        clipboard = SplitThreadClipboard()
+        results: List[PipelineResult] = []
+
+        def call_on_ui(fn: Callable[[], Any]) -> Any:
+            out: List[Any] = []
+            ui = threading.Thread(target=lambda: out.append(fn()), name="ui")
+            ui.start()
+            ui.join()
+            return out[0]
+
+        pipeline = ClipboardPipeline(clipboard, CleanCache(), results.append, call_on_ui=call_on_ui)
+        try:
+            clipboard.text = "a  b"
+            pipeline.clean_now()
+            self.assertTrue(wait_until(lambda: results and pipeline.idle))
+        finally:
+            pipeline.stop()
+        self.assertEqual(clipboard.text, "a b")
+        self.assertEqual(set(clipboard.paste_threads), {"clipboard-pipeline"})
+        self.assertEqual(clipboard.copy_threads, ["ui"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# Run from the repo root:
+#
+#   python -m unittest discover tests      (or: python -m pytest tests)
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from cleaner import clean_text
+from rules import RuleFile, RuleSet, RulesError, load_rules
+
+
+class RuleSetTest(unittest.TestCase):
+    def test_longest_pattern_wins(self):
+        rules = RuleSet({"ab": "1", "abc": "2", "b": "3"})
+        self.assertEqual(rules.apply("abcd ab b"), "2d 1 b")
+        self.assertEqual(rules.single, {ord("b"): "3"})
+
+    def test_patterns_are_normalized(self):
+        # Fullwidth letters NFKC to ASCII, same as the text does
+        rules = RuleSet({"ｗｔｓ": "WTS"})
+        self.assertEqual(clean_text("ｗｔｓ set", rules=rules), "WTS set")
+
+    def test_stream_matches_apply(self):
+        rules = RuleSet({"prime": "Prime", "pset": "Prime Set"})
+        text = "ash pset and ember prime, pset" * 3
+        pieces = [text[i:i + 4] for i in range(0, len(text), 4)]
+        self.assertEqual("".join(rules.stream(pieces)), rules.apply(text))
+
+    def test_cache_round_trip(self):
+        rules = RuleSet({"ab": "1", "x": "", "ﬁsh": "fish"})
+        restored = RuleSet.from_cache(json.loads(json.dumps(rules.to_cache())))
+        self.assertEqual(restored.single, rules.single)
+        self.assertEqual(restored.multi, rules.multi)
+        self.assertEqual(restored.fingerprint, rules.fingerprint)
+        self.assertEqual(restored.apply("abfish"), rules.apply("abfish"))
+
+
+class LoadRulesTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "rules.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write(self, rules, mtime_ns: int) -> None:
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"replacements": rules}, f)
+        # Pin the time stamp so quick rewrites still look like edits
+        os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_cache_is_used_until_the_file_changes(self):
+        self.write({"wts": "WTS"}, 1_000_000_000)
+        first = load_rules(self.path)
+        self.assertTrue(os.path.exists(self.path + ".cache"))
+        cached = load_rules(self.path)
+        self.assertEqual(cached.fingerprint, first.fingerprint)
+        self.assertEqual(cached.apply("wts x"), "WTS x")
+        self.write({"wtb": "WTB"}, 2_000_000_000)
+        self.assertEqual(load_rules(self.path).apply("wts wtb"), "wts WTB")
+
+    def test_bad_file(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('{"replacements": ["not", "a", "dict"]}')
+        with self.assertRaises(RulesError):
+            load_rules(self.path)
+        with self.assertRaises(RulesError):
+            load_rules(os.path.join(self.dir, "missing.json"))
+
+    def test_rule_file_reloads_and_keeps_last_good_rules(self):
+        rule_file = RuleFile(self.path)
+        self.assertFalse(rule_file.reload_if_changed())
+        self.assertIsNone(rule_file.rules)
+        self.write({"wts": "WTS"}, 1_000_000_000)
+        self.assertTrue(rule_file.reload_if_changed())
+        self.assertFalse(rule_file.reload_if_changed())
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{broken")
+        self.assertTrue(rule_file.reload_if_changed())
+        self.assertIsNotNone(rule_file.error)
+        self.assertEqual(rule_file.rules.apply("wts"), "WTS")
+        os.remove(self.path)
+        self.assertTrue(rule_file.reload_if_changed())
+        self.assertIsNone(rule_file.rules)
+        self.assertIsNone(rule_file.error)
+
+
+if __name__ == "__main__":
+    unittest.main()
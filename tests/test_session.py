@@ -0,0 +1,83 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# Run from the repo root:
+#
+#   python -m unittest discover tests      (or: python -m pytest tests)
+
+import os
+import tempfile
+import unittest
+
+from benchmarks.replay_session import replay, synthetic_session
+from cleaner import analyze
+from pipeline import PipelineResult
+from session import SessionRecorder, read_session, redact
+
+
+class RedactTest(unittest.TestCase):
+    def test_letters_and_digits_masked_rest_kept(self):
+        text = "WTS Ash Prime 120p “now”​ — Straße ﬁ ٣ Дом\t!"
+        masked = redact(text)
+        self.assertEqual(len(masked), len(text))
+        for ch, mask in zip(text, masked):
+            with self.subTest(ch=ch):
+                if ch.isalnum():
+                    # Non-ASCII stays non-ASCII, so replays take the same paths
+                    self.assertIn(mask, "0Xx" if ch.isascii() else "\u0100\u0101\u0660\uff58")
+                else:
+                    self.assertEqual(mask, ch)
+
+    def test_cleaning_touches_the_same_places(self):
+        text = "a  “b” ﬁ Ｃ…\r\n"
+        self.assertEqual(analyze(redact(text)).changes, analyze(text).changes)
+
+
+class RecorderTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(handle)
+
+    def tearDown(self):
+        os.unlink(self.path)
+
+    def test_results_round_trip(self):
+        recorder = SessionRecorder(self.path, content="redacted", max_chars=10, meta={"clipboard": "fake"})
+        recorder.record_result(PipelineResult("check", "Hi there", "Hi there", False))
+        recorder.record_result(PipelineResult("check", "x" * 50, "x" * 50, False))
+        recorder.record_result(PipelineResult("check", None, "", False, deferred=5000))
+        recorder.record_result(PipelineResult("manual", "a", "a", False))
+        # Preview-only work isn't something the user did to the clipboard
+        recorder.record_result(PipelineResult("preview", "b", "b", False))
+        recorder.close()
+        header, events = read_session(self.path)
+        self.assertEqual((header["content"], header["clipboard"]), ("redacted", "fake"))
+        self.assertEqual([event["event"] for event in events], ["copy", "copy", "copy", "manual"])
+        self.assertEqual(events[0]["text"], "Xx xxxxx")
+        self.assertEqual([event["size"] for event in events[:3]], [8, 50, 5000])
+        # Over max_chars: size and digest only
+        self.assertNotIn("text", events[1])
+        self.assertIn("digest", events[1])
+
+
+class ReplayTest(unittest.TestCase):
+    def test_back_to_back_replay_handles_every_copy(self):
+        events = [event for event in synthetic_session(60, seed=3) if event.get("size", 0) < 100_000]
+        report = replay(events, speed=0, settle=5.0)
+        self.assertEqual(report["missed"], 0)
+        self.assertEqual(report["handled"], report["copies"] - report["unchanged"])
+        self.assertIsNotNone(report["copies_per_s"])
+
+
+if __name__ == "__main__":
+    unittest.main()
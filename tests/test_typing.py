@@ -0,0 +1,86 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+# Run from the repo root:
+#
+#   python -m unittest discover tests      (or: python -m pytest tests)
+
+from typing import List
+import random
+import unittest
+
+from cleaner import clean_text
+from typing_engine import FakeKeyBackend, KeystrokePlan, TypingEngine
+
+WORDS = ["WTS", "Ash", "Prime", "Set", "120p", "pm", "me", "ABC", "x", "Kavasa", "Kubrow", "Collar", "!?", "€", "ü", "naïve"]
+
+
+def random_messages(seed: int, count: int) -> List[str]:
+    rng = random.Random(seed)
+    # Plus one word longer than any limit, which gets cut mid-word
+    words = WORDS + [rng.choice(WORDS) * 20]
+    return [clean_text(" ".join(rng.choice(words) for _ in range(rng.randint(1, 60)))) for _ in range(count)]
+
+
+class PlanReplayTest(unittest.TestCase):
+    def play(self, backend: FakeKeyBackend, plan: KeystrokePlan) -> None:
+        done = []
+        engine = TypingEngine(backend, keys_per_second=0, on_done=lambda *args: done.append(args))
+        self.assertTrue(engine.play(plan, message_delay=0.0, submit_last=False))
+        engine.wait(5.0)
+        self.assertEqual(len(done), 1)
+        typed, total, _rate, cancelled, error = done[0]
+        self.assertIsNone(error)
+        self.assertFalse(cancelled)
+        self.assertEqual(typed, total)
+
+    def test_replayed_plan_types_its_messages(self):
+        for limit in (10, 40, 180):
+            for text in random_messages(limit, 40):
+                with self.subTest(text=text, limit=limit):
+                    backend = FakeKeyBackend(untypeable="€ü")
+                    plan = TypingEngine(backend).plan(text, limit)
+                    self.play(backend, plan)
+                    # Every message is typed, then submitted except the last
+                    self.assertEqual(backend.text, "<enter>".join(plan.messages))
+                    self.assertFalse(backend.shift_held)
+                    self.assertEqual(plan.total, sum(len(message) for message in plan.messages))
+                    self.assertEqual(plan.untypeable, sorted(set("€ü") & set(text)))
+                    kept = text.translate({ord("€"): None, ord("ü"): None})
+                    self.assertEqual("".join(plan.messages).replace(" ", ""), kept.replace(" ", ""))
+                    for message in plan.messages:
+                        self.assertTrue(0 < len(message) <= limit)
+                        self.assertEqual(message, message.strip(" "))
+
+    def test_untypeable_only_text_has_nothing_to_type(self):
+        plan = TypingEngine(FakeKeyBackend(untypeable="€")).plan("€ €")
+        self.assertEqual(plan.total, 0)
+        self.assertEqual(plan.untypeable, ["€"])
+
+    def test_shift_is_held_across_capitals_only(self):
+        backend = FakeKeyBackend()
+        plan = TypingEngine(backend, chunk_size=3).plan("ABCd E")
+        self.play(backend, plan)
+        self.assertEqual(backend.text, "ABCd E")
+        # Chunks are "ABC" and "d E"; shift never stays down past a chunk
+        self.assertEqual(
+            backend.events,
+            [
+                ("shift", True), ("a", True), ("a", False), ("b", True), ("b", False), ("c", True), ("c", False), ("shift", False),
+                ("d", True), ("d", False), (" ", True), (" ", False), ("shift", True), ("e", True), ("e", False), ("shift", False),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,503 @@
+"""
+==============================================================
+
+        ██████  ███████ ███████ ██   ██ ███████ ██    ██ 
+        ██   ██ ██      ██      ██   ██    ███   ██  ██  
+        ██████  █████   ███████ ███████   ███     ████   
+        ██   ██ ██           ██ ██   ██  ███       ██    
+        ██   ██ ███████ ███████ ██   ██ ███████    ██    
+                                                              
+                  Paste Prime – by Reshzy                     
+==============================================================
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import threading
+import time
+
+import diagnostics
+from cleaner import CHAT_MESSAGE_LIMIT, split_messages
+
+
+# (key, True) presses the key, (key, False) lets it go
+KeyEvent = Tuple[str, bool]
+
+# Messages this many characters into a plan get their key events worked out
+# when typing reaches them, so a huge preview doesn't cost a huge plan
+PRECOMPILED_CHARS = 20_000
+
+
+class KeyBackend:
+    """Sends key events worked out ahead of time by resolve()."""
+
+    name = "base"
+
+    def send(self, events: Sequence[KeyEvent]) -> None:
+        raise NotImplementedError
+
+    def press(self, key: str) -> None:
+        raise NotImplementedError
+
+    def resolve(self, ch: str) -> Optional[Tuple[str, bool]]:
+        """The key that types ch and whether shift is held for it; None if it can't be typed."""
+        return (ch, False)
+
+    def can_type(self, ch: str) -> bool:
+        return self.resolve(ch) is not None
+
+
+class PyAutoGuiBackend(KeyBackend):
+    """Types through pyautogui, importing it on first use unless one is passed in."""
+
+    name = "pyautogui"
+
+    def __init__(self, pyautogui=None) -> None:
+        self._pyautogui = pyautogui
+        self._keys: Dict[str, Optional[Tuple[str, bool]]] = {}
+        self._unshifted: Optional[Dict[str, str]] = None
+
+    def send(self, events: Sequence[KeyEvent]) -> None:
+        # _pause=False skips pyautogui's 100 ms PAUSE after every call; the
+        # engine does its own pacing between chunks
+        module = self._module()
+        for key, down in events:
+            if down:
+                module.keyDown(key, _pause=False)
+            else:
+                module.keyUp(key, _pause=False)
+
+    def press(self, key: str) -> None:
+        self._module().press(key, _pause=False)
+
+    def resolve(self, ch: str) -> Optional[Tuple[str, bool]]:
+        if ch in self._keys:
+            return self._keys[ch]
+        key: Optional[Tuple[str, bool]]
+        try:
+            module = self._module()
+            # pyautogui only has keys for what's in its keyboard mapping (on
+            # Windows, printable ASCII); anything else it drops without a word
+            if not module.isValidKey(ch):
+                key = None
+            elif module.isShiftCharacter(ch) and ch in self._shift_bases():
+                key = (self._shift_bases()[ch], True)
+            else:
+                # Unshifted, or a shifted one we can't place; keyDown shifts those itself
+                key = (ch, False)
+        except Exception:
+            # Can't tell (no display, say); typing will report the real problem
+            key = (ch, False)
+        self._keys[ch] = key
+        return key
+
+    def _shift_bases(self) -> Dict[str, str]:
+        # "A" -> "a", "!" -> "1" on US layouts: the unshifted character on
+        # the same key, found through pyautogui's own key codes (on Windows
+        # the shift state sits above the low byte)
+        if self._unshifted is None:
+            self._unshifted = {}
+            try:
+                module = self._module()
+                mapping = module.platformModule.keyboardMapping
+                by_code: Dict[int, str] = {}
+                for name, code in mapping.items():
+                    if len(name) == 1 and code is not None and not module.isShiftCharacter(name):
+                        by_code.setdefault(code & 0xFF, name)
+                for name, code in mapping.items():
+                    if len(name) == 1 and code is not None and module.isShiftCharacter(name):
+                        base = by_code.get(code & 0xFF)
+                        if base is not None:
+                            self._unshifted[name] = base
+            except Exception:
+                pass
+        return self._unshifted
+
+    def _module(self):
+        if self._pyautogui is None:
+            # Heavy import (PIL and friends), so only on the first keystroke
+            import pyautogui
+
+            self._pyautogui = pyautogui
+        return self._pyautogui
+
+
+class FakeKeyBackend(KeyBackend):
+    """Records key events instead of sending them, for headless tests.
+
+    Uppercase letters go through shift like on a real keyboard, and text
+    rebuilds what those events would have typed.
+    """
+
+    name = "fake"
+
+    def __init__(self, *, delay_per_key: float = 0.0, untypeable: str = "") -> None:
+        self.delay_per_key = delay_per_key
+        self.untypeable = set(untypeable)
+        self.events: List[KeyEvent] = []
+        self.pressed: List[str] = []
+        self.shift_held = False
+        self._typed: List[str] = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self._typed)
+
+    def send(self, events: Sequence[KeyEvent]) -> None:
+        if self.delay_per_key:
+            time.sleep(self.delay_per_key * sum(1 for key, down in events if down and key != "shift"))
+        for key, down in events:
+            self.events.append((key, down))
+            if key == "shift":
+                self.shift_held = down
+            elif down:
+                self._typed.append(key.upper() if self.shift_held else key)
+
+    def press(self, key: str) -> None:
+        # Keep submits visible in the typed text, e.g. "first<enter>second"
+        self.pressed.append(key)
+        self._typed.append(f"<{key}>")
+
+    def resolve(self, ch: str) -> Optional[Tuple[str, bool]]:
+        if ch in self.untypeable:
+            return None
+        if ch.isupper() and ch.lower().upper() == ch:
+            return (ch.lower(), True)
+        return (ch, False)
+
+
+class KeystrokePlan:
+    """Text worked out into exactly the key events TypingEngine will send.
+
+    Messages are split, characters the backend can't type are taken out (and
+    listed in untypeable) and each character is resolved to its key and
+    shift state, grouped into the chunks handed to the backend, so starting
+    to type needs no work at all. Only the first PRECOMPILED_CHARS worth of
+    messages are done up front; the rest when typing gets to them.
+    """
+
+    __slots__ = ("text", "limit", "messages", "untypeable", "total", "build_seconds", "_keys", "_chunk_size", "_compiled")
+
+    def __init__(
+        self,
+        text: str,
+        limit: int,
+        messages: List[str],
+        untypeable: List[str],
+        keys: Dict[str, Tuple[str, bool]],
+        chunk_size: int,
+    ) -> None:
+        self.text = text
+        self.limit = limit
+        self.messages = messages
+        self.untypeable = untypeable
+        self.total = sum(len(message) for message in messages)
+        self.build_seconds = 0.0
+        self._keys = keys
+        self._chunk_size = chunk_size
+        self._compiled: List[Optional[List[Tuple[int, Tuple[KeyEvent, ...]]]]] = [None] * len(messages)
+        budget = PRECOMPILED_CHARS
+        for index, message in enumerate(messages):
+            if budget <= 0:
+                break
+            self._compiled[index] = self._compile(message)
+            budget -= len(message)
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def chunks(self, index: int) -> List[Tuple[int, Tuple[KeyEvent, ...]]]:
+        """(characters, key events) chunks for message index."""
+        chunks = self._compiled[index]
+        if chunks is None:
+            chunks = self._compiled[index] = self._compile(self.messages[index])
+        return chunks
+
+    def _compile(self, message: str) -> List[Tuple[int, Tuple[KeyEvent, ...]]]:
+        keys = self._keys
+        size = self._chunk_size
+        chunks = []
+        for i in range(0, len(message), size):
+            piece = message[i:i + size]
+            events: List[KeyEvent] = []
+            shifted = False
+            for ch in piece:
+                key, shift = keys[ch]
+                if shift != shifted:
+                    # Held across a run of capitals rather than per letter
+                    events.append(("shift", shift))
+                    shifted = shift
+                events.append((key, True))
+                events.append((key, False))
+            if shifted:
+                # Never left down between chunks, in case typing is cancelled there
+                events.append(("shift", False))
+            chunks.append((len(piece), tuple(events)))
+        return chunks
+
+
+class TypingEngine:
+    """Types text on a worker thread, in chunks, at a target keys-per-second.
+
+    send() queues several chat messages, submitting each with submit_key and
+    pausing message_delay seconds before the next. Counts in the callbacks
+    cover all queued messages; message_index says which one is being typed.
+
+    on_progress(typed, total, keys_per_second) is called after every chunk and
+    on_done(typed, total, keys_per_second, cancelled, error) once at the end.
+    Both run on the worker thread; GUI callers should marshal them.
+    """
+
+    def __init__(
+        self,
+        backend: KeyBackend,
+        *,
+        keys_per_second: float = 200.0,
+        chunk_size: int = 8,
+        on_progress: Optional[Callable[[int, int, float], None]] = None,
+        on_done: Optional[Callable[[int, int, float, bool, Optional[Exception]], None]] = None,
+    ) -> None:
+        self.backend = backend
+        self.keys_per_second = keys_per_second
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.message_index = 0
+        self.message_count = 0
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, text: str) -> bool:
+        """Start typing text. Returns False if a previous job is still running."""
+        return self.send([text], submit_last=False)
+
+    def plan(self, text: str, limit: int = CHAT_MESSAGE_LIMIT) -> KeystrokePlan:
+        """Split text into chat messages and work out their keystrokes."""
+        start = time.perf_counter()
+        keys, untypeable = self._resolve(text)
+        if untypeable:
+            # Out before splitting, so no message starts or ends with the gap left behind
+            text_typed = text.translate({ord(ch): None for ch in untypeable})
+        else:
+            text_typed = text
+        plan = KeystrokePlan(text, limit, split_messages(text_typed, limit), untypeable, keys, self.chunk_size)
+        plan.build_seconds = time.perf_counter() - start
+        return plan
+
+    def _plan_messages(self, messages: List[str]) -> KeystrokePlan:
+        start = time.perf_counter()
+        text = "".join(messages)
+        keys, untypeable = self._resolve(text)
+        if untypeable:
+            drop = {ord(ch): None for ch in untypeable}
+            messages = [message.translate(drop).strip(" ") for message in messages]
+        messages = [message for message in messages if message]
+        limit = max((len(message) for message in messages), default=0)
+        plan = KeystrokePlan(text, limit, messages, untypeable, keys, self.chunk_size)
+        plan.build_seconds = time.perf_counter() - start
+        return plan
+
+    def _resolve(self, text: str) -> Tuple[Dict[str, Tuple[str, bool]], List[str]]:
+        keys: Dict[str, Tuple[str, bool]] = {}
+        untypeable = []
+        for ch in set(text):
+            key = self.backend.resolve(ch)
+            if key is None:
+                untypeable.append(ch)
+            else:
+                keys[ch] = key
+        return keys, sorted(untypeable)
+
+    def send(
+        self,
+        messages: List[str],
+        *,
+        submit_key: str = "enter",
+        message_delay: float = 0.5,
+        submit_last: bool = True,
+        requested_at: Optional[float] = None,
+        wait_for: Optional[Callable[[], bool]] = None,
+        max_wait: float = 0.0,
+    ) -> bool:
+        """Type and submit messages one after another. False if already busy.
+
+        With submit_last=False the final message is typed but left for the
+        user to send, same as a plain start(). requested_at is the
+        time.perf_counter() of the hotkey press, for the trigger-to-first-key timer.
+        """
+        if self.busy:
+            return False
+        plan = self._plan_messages(messages)
+        return self.play(
+            plan,
+            submit_key=submit_key,
+            message_delay=message_delay,
+            submit_last=submit_last,
+            requested_at=requested_at,
+            wait_for=wait_for,
+            max_wait=max_wait,
+        )
+
+    def play(
+        self,
+        plan: KeystrokePlan,
+        *,
+        submit_key: str = "enter",
+        message_delay: float = 0.5,
+        submit_last: bool = True,
+        requested_at: Optional[float] = None,
+        wait_for: Optional[Callable[[], bool]] = None,
+        max_wait: float = 0.0,
+    ) -> bool:
+        """Type a prepared plan; otherwise the same as send().
+
+        Typing starts once wait_for() returns True (e.g. the hotkey's keys are
+        released) or max_wait seconds have passed, whichever comes first.
+        Without wait_for it simply waits max_wait.
+        """
+        if self.busy:
+            return False
+        self._cancel.clear()
+        self.message_index = 0
+        self.message_count = len(plan)
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(plan, submit_key, message_delay, submit_last, requested_at, wait_for, max_wait),
+            name="typing-engine",
+            daemon=True,
+        )
+        self._thread.start()
+        return True
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(
+        self,
+        plan: KeystrokePlan,
+        submit_key: str,
+        message_delay: float,
+        submit_last: bool,
+        requested_at: Optional[float],
+        wait_for: Optional[Callable[[], bool]],
+        max_wait: float,
+    ) -> None:
+        total = plan.total
+        typed = 0
+        error: Optional[Exception] = None
+        interval = 1.0 / self.keys_per_second if self.keys_per_second > 0 else 0.0
+        if max_wait > 0:
+            self._wait_until_ready(wait_for, max_wait)
+        start = time.perf_counter()
+        # The pacing schedule restarts after each inter-message pause
+        slot_start = start
+        slot_typed = 0
+        try:
+            for index in range(len(plan)):
+                if self._cancel.is_set():
+                    break
+                self.message_index = index + 1
+                for count, events in plan.chunks(index):
+                    if self._cancel.is_set():
+                        break
+                    self.backend.send(events)
+                    if requested_at is not None:
+                        diagnostics.record("hotkey.first_key", time.perf_counter() - requested_at)
+                        requested_at = None
+                    typed += count
+                    if self.on_progress is not None:
+                        self.on_progress(typed, total, self._rate(typed, start))
+                    # Sleep until this chunk's slot on the schedule; waking on cancel
+                    delay = slot_start + (typed - slot_typed) * interval - time.perf_counter()
+                    if delay > 0 and typed < total:
+                        self._cancel.wait(delay)
+                last = index == len(plan) - 1
+                if self._cancel.is_set() or (last and not submit_last):
+                    continue
+                self.backend.press(submit_key)
+                if not last:
+                    # Give the game time to send before the next message starts
+                    self._cancel.wait(message_delay)
+                    slot_start = time.perf_counter()
+                    slot_typed = typed
+        except Exception as e:
+            error = e
+        if self.on_done is not None:
+            self.on_done(typed, total, self._rate(typed, start), self._cancel.is_set(), error)
+
+    def _wait_until_ready(self, wait_for: Optional[Callable[[], bool]], max_wait: float) -> None:
+        start = time.perf_counter()
+        if wait_for is None:
+            self._cancel.wait(max_wait)
+            return
+        deadline = start + max_wait
+        while not self._cancel.is_set():
+            try:
+                if wait_for():
+                    break
+            except Exception:
+                break
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._cancel.wait(min(0.005, remaining))
+        diagnostics.record("hotkey.release_wait", time.perf_counter() - start)
+
+    @staticmethod
+    def _rate(typed: int, start: float) -> float:
+        elapsed = time.perf_counter() - start
+        return typed / elapsed if elapsed > 0 else 0.0
+
+
+class PlanBuilder:
+    """Keeps a KeystrokePlan ready for the latest text, built on a background thread.
+
+    request() is cheap and may be called on every preview change; only the
+    newest request is built. get() returns that plan when it matches, and
+    otherwise builds one on the spot. on_built(plan) runs on the builder thread.
+    """
+
+    def __init__(self, engine: TypingEngine, *, on_built: Optional[Callable[[KeystrokePlan], None]] = None) -> None:
+        self.engine = engine
+        self.on_built = on_built
+        self.latest: Optional[KeystrokePlan] = None
+        self._wanted: Optional[Tuple[str, int]] = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="plan-builder", daemon=True)
+        self._thread.start()
+
+    def request(self, text: str, limit: int = CHAT_MESSAGE_LIMIT) -> None:
+        with self._cond:
+            self._wanted = (text, limit)
+            self._cond.notify()
+
+    def get(self, text: str, limit: int = CHAT_MESSAGE_LIMIT) -> KeystrokePlan:
+        plan = self.latest
+        if plan is not None and plan.limit == limit and plan.text == text:
+            return plan
+        return self.engine.plan(text, limit)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._wanted is None:
+                    self._cond.wait()
+                text, limit = self._wanted
+                self._wanted = None
+            latest = self.latest
+            if latest is not None and latest.limit == limit and latest.text == text:
+                continue
+            try:
+                plan = self.engine.plan(text, limit)
+            except Exception:
+                continue
+            self.latest = plan
+            if self.on_built is not None:
+                self.on_built(plan)